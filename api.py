@@ -0,0 +1,299 @@
+"""
+Aparavi Reporting Dashboard - Headless API
+
+A FastAPI server exposing the datasets behind the dashboard reports (overview
+metrics, folder rollups, metadata key statistics, services, classifications)
+to other tools, as JSON or Arrow IPC streams, without running Streamlit.
+
+- Datasets come from the same report functions as the dashboard and share
+  its result cache (config.CACHE_DIR) and derived tables
+- Every successful response carries an ETag derived from the database
+  fingerprint and the request, so clients can revalidate with If-None-Match
+  and get 304 Not Modified until the database changes; a failed query is
+  answered with 500 and no ETag
+- Handlers are async; DuckDB queries run on the database manager's query pool
+  (DatabaseManager.submit), each thread on its own cursor of the shared
+  connection, where failed queries raise instead of returning empty frames
+
+Run with:
+    python api.py --db /path/to/database.duckdb
+and request e.g. http://127.0.0.1:8000/reports/services/distribution?format=arrow
+"""
+
+import argparse
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+
+import config
+from modules import metadata_analysis
+from modules.analytics import extension_counts
+from modules.classification_analysis import classification_summary, classification_by_service
+from modules.database import DatabaseManager
+from modules.fact_tables import build_instance_facts
+from modules.predicates import FilterContext, build_folder_index, facts_where, instance_where, object_where
+from modules.folder_analysis import folder_rollup
+from modules.histograms import size_range_distribution
+from modules.service_analysis import (
+    refresh_service_rollup, service_compression, service_distribution,
+    service_pipe_breakdown, service_throughput
+)
+from modules.timeseries import time_series
+
+# MIME type of Arrow IPC streams
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Server settings; replaced by the command line arguments of main()
+settings = {
+    'db_path': config.DEFAULT_DB_PATH,
+    'derived_path': config.DERIVED_DB_PATH,
+    'workers': config.API_WORKERS
+}
+
+# Shared state created when the server starts
+state = {}
+
+
+def overview_metrics(db, filters, options):
+    """Totals shown at the top of the overview report."""
+    stats = db.get_storage_stats(instance_where(db, filters))
+    return pd.DataFrame([{
+        'total_objects': db.get_row_count('objects', object_where(db, filters)),
+        'total_instances': db.get_row_count('instances', instance_where(db, filters)),
+        'total_size': stats.get('total_size'),
+        'avg_size': stats.get('avg_size'),
+        'median_size': stats.get('median_size'),
+        'min_size': stats.get('min_size'),
+        'max_size': stats.get('max_size')
+    }])
+
+
+def metadata_keys(db, filters, options):
+    """Frequency of each metadata key over sampled files of an extension."""
+    analysis = metadata_analysis.analyze_metadata(db, options['extension'], options['samples'])
+    if not analysis:
+        return pd.DataFrame(columns=['key', 'count', 'percentage'])
+    return pd.DataFrame([
+        {'key': key, 'count': stats['count'], 'percentage': stats['percentage']}
+        for key, stats in analysis['keys'].items()
+    ]).sort_values(['count', 'key'], ascending=[False, True], ignore_index=True)
+
+
+# Datasets per report: name -> function(db, filters, options) returning a DataFrame
+DATASETS = {
+    'overview': {
+        'metrics': overview_metrics,
+        'extensions': lambda db, filters, options: extension_counts(
+            db, object_where(db, filters), options['limit']
+        ),
+        'creation': lambda db, filters, options: time_series(
+            db, 'objects', 'createdAt', freq=options['granularity'], where=object_where(db, filters)
+        ),
+        'sizes': lambda db, filters, options: size_range_distribution(db, where=instance_where(db, filters))
+    },
+    'folders': {
+        'rollup': lambda db, filters, options: folder_rollup(
+            db, options['depth'], options['limit'], object_where(db, filters, alias='o')
+        )
+    },
+    'metadata': {
+        'file_types': lambda db, filters, options: metadata_analysis.get_file_type_counts(db),
+        'keys': metadata_keys
+    },
+    'services': {
+        'distribution': lambda db, filters, options: service_distribution(db, instance_where(db, filters)),
+        'throughput': lambda db, filters, options: service_throughput(
+            db, options['granularity'], instance_where(db, filters)
+        ),
+        'compression': lambda db, filters, options: service_compression(db, instance_where(db, filters)),
+        'pipes': lambda db, filters, options: service_pipe_breakdown(db, instance_where(db, filters))
+    },
+    'classifications': {
+        'summary': lambda db, filters, options: classification_summary(db, facts_where(db, filters)),
+        'by_service': lambda db, filters, options: classification_by_service(db, facts_where(db, filters))
+    }
+}
+
+
+def warm_up(db):
+    """Build the derived tables the datasets read, before requests arrive."""
+    build_instance_facts(db)
+    refresh_service_rollup(db)
+    build_folder_index(db)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Open the database and its query thread pool for the server's lifetime."""
+    db = DatabaseManager(
+        settings['db_path'],
+        derived_path=settings['derived_path'],
+        cache_dir=config.CACHE_DIR,
+        cache_ttl=config.CACHE_TTL,
+        snapshot_dir=config.SNAPSHOT_DIR if config.SNAPSHOT_MODE else None,
+        query_workers=settings['workers']
+    )
+    state.update(db=db)
+    try:
+        await run_query(warm_up, db)
+        yield
+    finally:
+        db.close()
+        state.clear()
+
+
+app = FastAPI(title=f"{config.APP_TITLE} API", lifespan=lifespan)
+
+
+async def run_query(function, *args):
+    """Run a blocking DuckDB function on the query thread pool.
+
+    Raises:
+        Exception: The error of a failed query
+    """
+    return await asyncio.wrap_future(state['db'].submit(lambda: function(*args)))
+
+
+def make_etag(fingerprint, request, output_format):
+    """Build an ETag from the database fingerprint and the request."""
+    params = sorted(request.query_params.multi_items())
+    raw = repr((fingerprint, request.url.path, params, output_format)).encode()
+    return f'"{hashlib.md5(raw).hexdigest()}"'
+
+
+def etag_matches(request, etag):
+    """Check an If-None-Match header against an ETag."""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = [candidate.strip().removeprefix('W/') for candidate in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+def to_arrow(df):
+    """Serialize a DataFrame as an Arrow IPC stream."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+@app.get("/version")
+async def get_version():
+    """Database version information, including the fingerprint used in ETags."""
+    db = state['db']
+    fingerprint, version = await asyncio.gather(run_query(db.get_fingerprint), run_query(db.get_version))
+    return {
+        'fingerprint': fingerprint,
+        'duckdb_version': version,
+        'snapshot_version': db.snapshot['version'] if db.snapshot else None
+    }
+
+
+@app.get("/reports")
+async def list_reports():
+    """Available reports and their datasets."""
+    return {report: sorted(datasets) for report, datasets in DATASETS.items()}
+
+
+@app.get("/reports/{report}/{dataset}")
+async def get_dataset(
+    report: str,
+    dataset: str,
+    request: Request,
+    format: str = Query(None, pattern="^(json|arrow)$", description="Output format (default from the Accept header)"),
+    service: list[int] = Query([], description="Service IDs to include"),
+    category: list[str] = Query([], description="File categories to include"),
+    classification: list[str] = Query([], description="Classification keys to include"),
+    tag: list[str] = Query([], description="Tags to include"),
+    folder: str = Query(None, description="Folder subtree to include"),
+    start: date = Query(None, description="First creation date to include"),
+    end: date = Query(None, description="Last creation date to include"),
+    limit: int = Query(50, ge=1, le=10000),
+    granularity: str = Query('month', pattern="^(day|week|month|quarter|year)$"),
+    depth: int = Query(2, ge=1, le=64, description="Folder levels of the folder rollup"),
+    extension: str = Query(None, description="Extension analyzed by metadata/keys (all if omitted)"),
+    samples: int = Query(100, ge=1, le=10000, description="Files sampled by metadata/keys")
+):
+    """A report dataset as JSON records or an Arrow IPC stream, with the sidebar filters as parameters."""
+    function = DATASETS.get(report, {}).get(dataset)
+    if function is None:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {report}/{dataset}")
+
+    if format is None:
+        format = 'arrow' if ARROW_MEDIA_TYPE in request.headers.get('accept', '') else 'json'
+
+    db = state['db']
+    etag = make_etag(await run_query(db.get_fingerprint), request, format)
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    filters = FilterContext(
+        service_ids=tuple(service),
+        categories=tuple(category),
+        classification_keys=tuple(classification),
+        tags=tuple(tag),
+        path_prefix=folder,
+        start=start,
+        end=end
+    )
+    options = {
+        'limit': limit,
+        'granularity': granularity,
+        'depth': depth,
+        'extension': extension,
+        'samples': samples
+    }
+    try:
+        result = await run_query(function, db, filters, options)
+        if format == 'arrow':
+            content = await run_query(to_arrow, result)
+    except Exception as e:
+        # Without an ETag, so clients do not revalidate the error into a 304
+        raise HTTPException(status_code=500, detail=f"Query failed: {e}")
+
+    if format == 'arrow':
+        return Response(content=content, media_type=ARROW_MEDIA_TYPE, headers=headers)
+    return Response(
+        content=result.to_json(orient='records', date_format='iso'),
+        media_type="application/json",
+        headers=headers
+    )
+
+
+def main():
+    """Main function to handle command line arguments"""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='Serve the dashboard report datasets over HTTP')
+
+    parser.add_argument('--db', type=str, default=settings['db_path'],
+                        help='Path to the DuckDB database')
+
+    parser.add_argument('--derived', type=str, default=settings['derived_path'],
+                        help='Path of the derived tables database (use a separate file while the dashboard is running)')
+
+    parser.add_argument('--host', type=str, default=config.API_HOST,
+                        help='Interface to listen on')
+
+    parser.add_argument('--port', type=int, default=config.API_PORT,
+                        help='Port to listen on')
+
+    parser.add_argument('--workers', type=int, default=settings['workers'],
+                        help='Threads running DuckDB queries')
+
+    args = parser.parse_args()
+    settings.update(db_path=args.db, derived_path=args.derived, workers=args.workers)
+
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,7 +28,6 @@ The Aparavi branding is implemented through:
 """
 
 import streamlit as st
-import pandas as pd
 import os
 from datetime import datetime
 import time
@@ -44,14 +43,28 @@ import config
 from modules.database import DatabaseManager
 from modules.visualizations import (
     plot_bar_chart, plot_time_series, plot_pie_chart, 
-    plot_histogram, format_size_bytes
+    plot_histogram, plot_binned_histogram, plot_heatmap, format_size_bytes,
+    show_chart, CHART_STYLE_KEY
 )
 from modules.folder_analysis import (
-    process_folder_paths, aggregate_by_folder,
+    max_folder_depth, process_folder_paths, aggregate_by_folder,
     create_sunburst_chart, create_treemap_chart,
     find_top_folders, format_size, create_hierarchical_bar_chart
 )
 from modules.metadata_analysis import render_metadata_analysis_dashboard
+from modules.message_analysis import search_messages
+from modules.categories import category_sql
+from modules.query_plan import QuerySpec
+from modules.data_grid import render_data_grid
+from modules.filters import render_filter_sidebar
+from modules.predicates import object_where, instance_where
+from modules.folder_browser import breadcrumbs, children_source, files_source, get_folder
+from modules.memory import MemoryBudgetExceeded, start_budget
+from modules.scheduler import PageScheduler
+from modules.providers import (
+    overview_tasks, objects_data, instances_tasks, metadata_data,
+    classifications_data, classification_detail, services_data, messages_data
+)
 
 # Get base64 encoded image for favicon
 def get_base64_encoded_image(image_path):
@@ -148,7 +161,13 @@ st.markdown("""
 @st.cache_resource
 def get_database_connection(db_path):
     """Get a cached database connection"""
-    return DatabaseManager(db_path)
+    return DatabaseManager(
+        db_path,
+        derived_path=config.DERIVED_DB_PATH,
+        cache_dir=config.CACHE_DIR,
+        cache_ttl=config.CACHE_TTL,
+        snapshot_dir=config.SNAPSHOT_DIR if config.SNAPSHOT_MODE else None
+    )
 
 def render_header():
     """
@@ -251,15 +270,20 @@ def render_sidebar():
             "Visualization Style",
             list(chart_style_options.keys()),
             format_func=lambda x: chart_style_options[x],
-            index=0
+            index=0,
+            key=CHART_STYLE_KEY
         )
         
+        # Get database connection for filter options and version info
+        db_conn = get_database_connection(db_path)
+        
+        # Global filters applied to every report
+        filters = render_filter_sidebar(db_conn)
+        
         # About section
         st.markdown("---")
         st.markdown("### About")
         
-        # Get database connection for version info
-        db_conn = get_database_connection(db_path)
         duckdb_version = db_conn.get_version()
         
         st.markdown(f"""
@@ -274,54 +298,64 @@ def render_sidebar():
         "db_path": db_path,
         "selected_report": selected_report,
         "chart_style": chart_style,
+        "filters": filters,
         "export_format": None  # Export removed
     }
 
-def render_overview_report(db):
+def render_filter_notice(filters, applies=True):
+    """Tell the user whether the sidebar filters apply to this report"""
+    if filters is not None and filters.is_active:
+        if applies:
+            st.info("Sidebar filters are applied to this report.")
+        else:
+            st.info("Sidebar filters do not apply to this report.")
+
+def render_provider_errors(data):
+    """Warn about the queries of a report that failed"""
+    for name, error in data.errors.items():
+        st.warning(f"Could not load {name.replace('_', ' ')}: {error}")
+
+def render_overview_report(db, filters=None):
     """Render overview dashboard with key metrics"""
     st.markdown("<h2 class='section-header'>Executive Summary</h2>", unsafe_allow_html=True)
+    render_filter_notice(filters)
+    
+    # Start all queries; each widget below is drawn as soon as its data arrives
+    page = PageScheduler(db, overview_tasks(db, filters))
     
     # Key metrics row
     col1, col2, col3, col4 = st.columns(4)
     
     # Total objects
-    total_objects = db.get_row_count('objects')
     with col1:
-        st.metric("Total Documents", f"{total_objects:,}")
+        page.widget(lambda total_objects: st.metric("Total Documents", f"{total_objects:,}"), 'total_objects')
     
     # Total storage
-    storage_stats = db.get_storage_stats()
-    if storage_stats:
-        with col2:
-            total_size = format_size_bytes(storage_stats["total_size"])
-            st.metric("Total Storage", total_size)
+    def render_total_storage(storage_stats):
+        if storage_stats:
+            st.metric("Total Storage", format_size_bytes(storage_stats["total_size"]))
     
-        with col3:
-            avg_size = format_size_bytes(storage_stats["avg_size"])
-            st.metric("Average Size", avg_size)
+    def render_average_size(storage_stats):
+        if storage_stats:
+            st.metric("Average Size", format_size_bytes(storage_stats["avg_size"]))
+    
+    with col2:
+        page.widget(render_total_storage, 'storage_stats')
+    
+    with col3:
+        page.widget(render_average_size, 'storage_stats')
     
     # Total instances
-    total_instances = db.get_row_count('instances')
     with col4:
-        st.metric("Total Instances", f"{total_instances:,}")
+        page.widget(lambda total_instances: st.metric("Total Instances", f"{total_instances:,}"), 'total_instances')
     
     # Charts row
     st.markdown("<h3 class='subsection-header'>Document Analysis</h3>", unsafe_allow_html=True)
     
     chart_col1, chart_col2 = st.columns(2)
     
-    with chart_col1:
-        # File extension distribution
-        extension_counts = db.query("""
-            SELECT 
-                COALESCE(extension, 'No Extension') as ext,
-                COUNT(*) as count
-            FROM objects
-            GROUP BY ext
-            ORDER BY count DESC
-            LIMIT 10
-        """)
-        
+    # File extension distribution
+    def render_extension_counts(extension_counts):
         if not extension_counts.empty:
             fig = plot_bar_chart(
                 extension_counts, 
@@ -331,65 +365,33 @@ def render_overview_report(db):
                 figsize=(10, 6),
                 horizontal=True
             )
-            st.pyplot(fig)
+            show_chart(fig)
     
-    with chart_col2:
-        # Object creation over time
-        creation_over_time = db.query("""
-            SELECT 
-                DATE_TRUNC('month', to_timestamp(createdAt/1000)) as month,
-                COUNT(*) as count
-            FROM objects
-            WHERE createdAt IS NOT NULL 
-              AND createdAt > 86400000  -- Filter out dates before 1970-01-02 (one day after epoch)
-              AND createdAt < 4102444800000  -- Filter out dates after 2100-01-01
-            GROUP BY month
-            ORDER BY month
-        """)
-        
+    # Object creation over time
+    def render_creation_over_time(creation_over_time):
         if not creation_over_time.empty:
-            # Convert to pandas datetime if needed
-            creation_over_time['month'] = pd.to_datetime(creation_over_time['month'])
-            
             fig = plot_time_series(
                 creation_over_time,
-                'month', 'count',
+                'period', 'value',
                 'Document Creation Over Time',
                 'Date', 'Number of Documents',
                 figsize=(10, 6)
             )
-            st.pyplot(fig)
+            show_chart(fig)
+    
+    with chart_col1:
+        page.widget(render_extension_counts, 'extension_counts')
+    
+    with chart_col2:
+        page.widget(render_creation_over_time, 'creation_over_time')
     
     # Storage distribution
     st.markdown("<h3 class='subsection-header'>Storage Analysis</h3>", unsafe_allow_html=True)
     
     chart_col3, chart_col4 = st.columns(2)
     
-    with chart_col3:
-        # Size distribution
-        size_distribution = db.query("""
-            SELECT 
-                CASE
-                    WHEN size < 1024 THEN 'Under 1KB'
-                    WHEN size < 1024*1024 THEN '1KB-1MB'
-                    WHEN size < 1024*1024*10 THEN '1MB-10MB'
-                    WHEN size < 1024*1024*100 THEN '10MB-100MB'
-                    ELSE 'Over 100MB'
-                END as size_range,
-                COUNT(*) as count
-            FROM instances
-            WHERE size IS NOT NULL
-            GROUP BY size_range
-            ORDER BY 
-                CASE 
-                    WHEN size_range = 'Under 1KB' THEN 1
-                    WHEN size_range = '1KB-1MB' THEN 2
-                    WHEN size_range = '1MB-10MB' THEN 3
-                    WHEN size_range = '10MB-100MB' THEN 4
-                    WHEN size_range = 'Over 100MB' THEN 5
-                END
-        """)
-        
+    # Size distribution
+    def render_size_distribution(size_distribution):
         if not size_distribution.empty:
             fig = plot_pie_chart(
                 size_distribution,
@@ -397,132 +399,101 @@ def render_overview_report(db):
                 'Document Size Distribution',
                 figsize=(8, 8)
             )
-            st.pyplot(fig)
+            show_chart(fig)
+    
+    # Service distribution
+    def render_service_distribution(service_distribution):
+        if not service_distribution.empty:
+            fig = plot_bar_chart(
+                service_distribution,
+                'instance_count', 'service_name',
+                'Document Distribution by Service',
+                'Count', 'Service',
+                figsize=(10, 6),
+                horizontal=True
+            )
+            show_chart(fig)
+    
+    with chart_col3:
+        page.widget(render_size_distribution, 'size_distribution')
     
     with chart_col4:
-        # Service distribution
-        try:
-            service_distribution = db.query("""
-                SELECT 
-                    s.name as service_name,
-                    COUNT(*) as instance_count
-                FROM instances i
-                JOIN services s ON i.serviceId = s.serviceId
-                GROUP BY s.name
-                ORDER BY instance_count DESC
-            """)
-            
-            if not service_distribution.empty:
-                fig = plot_bar_chart(
-                    service_distribution,
-                    'instance_count', 'service_name',
-                    'Document Distribution by Service',
-                    'Count', 'Service',
-                    figsize=(10, 6),
-                    horizontal=True
-                )
-                st.pyplot(fig)
-        except Exception as e:
-            st.warning(f"Could not generate service distribution: {e}")
+        page.widget(render_service_distribution, 'service_distribution')
+    
+    page.run()
 
-def render_objects_report(db):
+def render_objects_report(db, filters=None):
     """Render document objects report"""
     st.markdown("<h2 class='section-header'>Content Type Analysis</h2>", unsafe_allow_html=True)
+    render_filter_notice(filters)
     
-    # Total objects
-    total_objects = db.get_row_count('objects')
-    st.metric("Total Documents", f"{total_objects:,}")
+    # Sections above the timeline control are filled once the data is fetched
+    summary_area = st.container()
     
-    # File extensions
-    st.markdown("<h3 class='subsection-header'>File Types</h3>", unsafe_allow_html=True)
+    # Object creation over time
+    st.markdown("<h3 class='subsection-header'>Document Timeline</h3>", unsafe_allow_html=True)
+    granularity = st.selectbox("Granularity", ['day', 'week', 'month', 'quarter', 'year'], index=2)
     
-    col1, col2 = st.columns(2)
+    data = objects_data(db, filters, granularity)
+    render_provider_errors(data)
     
-    with col1:
-        # File extension distribution
-        extension_counts = db.query("""
-            SELECT 
-                COALESCE(extension, 'No Extension') as ext,
-                COUNT(*) as count
-            FROM objects
-            GROUP BY ext
-            ORDER BY count DESC
-            LIMIT 15
-        """)
+    with summary_area:
+        # Total objects
+        st.metric("Total Documents", f"{data.total_objects:,}")
         
-        if not extension_counts.empty:
-            st.dataframe(extension_counts, use_container_width=True)
-    
-    with col2:
-        # Visualize extension distribution
-        if not extension_counts.empty:
-            # Limit to top 10 for better visualization
-            top_extensions = extension_counts.head(10)
-            
-            fig = plot_bar_chart(
-                top_extensions, 
-                'count', 'ext', 
-                'Top File Extensions',
-                'Count', 'Extension',
-                figsize=(10, 6),
-                horizontal=True
-            )
-            st.pyplot(fig)
-    
-    # Object creation over time
-    st.markdown("<h3 class='subsection-header'>Document Timeline</h3>", unsafe_allow_html=True)
+        # File extensions
+        st.markdown("<h3 class='subsection-header'>File Types</h3>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        extension_counts = data.extension_counts
+        
+        with col1:
+            # File extension distribution
+            if not extension_counts.empty:
+                st.dataframe(extension_counts, use_container_width=True)
+        
+        with col2:
+            # Visualize extension distribution
+            if not extension_counts.empty:
+                # Limit to top 10 for better visualization
+                top_extensions = extension_counts.head(10)
+                
+                fig = plot_bar_chart(
+                    top_extensions, 
+                    'count', 'ext', 
+                    'Top File Extensions',
+                    'Count', 'Extension',
+                    figsize=(10, 6),
+                    horizontal=True
+                )
+                show_chart(fig)
     
     # Creation timeline
-    creation_over_time = db.query("""
-        SELECT 
-            DATE_TRUNC('month', to_timestamp(createdAt/1000)) as month,
-            COUNT(*) as count
-        FROM objects
-        WHERE createdAt IS NOT NULL 
-          AND createdAt > 86400000  -- Filter out dates before 1970-01-02 (one day after epoch)
-          AND createdAt < 4102444800000  -- Filter out dates after 2100-01-01
-        GROUP BY month
-        ORDER BY month
-    """)
+    creation_over_time = data.creation_over_time
     
     if not creation_over_time.empty:
-        # Convert to pandas datetime if needed
-        creation_over_time['month'] = pd.to_datetime(creation_over_time['month'])
-        
         fig = plot_time_series(
             creation_over_time,
-            'month', 'count',
+            'period', 'value',
             'Document Creation Timeline',
             'Date', 'Number of Documents',
             figsize=(12, 6)
         )
-        st.pyplot(fig)
+        show_chart(fig)
     
     # Tags analysis
     st.markdown("<h3 class='subsection-header'>Tags Analysis</h3>", unsafe_allow_html=True)
+    if filters is not None and filters.is_active:
+        st.caption("Tag statistics are precomputed and cover all documents.")
     
-    try:
-        # Use a simpler approach that won't result in array values
-        tag_distribution = db.query("""
-            -- Count objects that have tags
-            SELECT 
-                'Has Tags' as tag_key,
-                COUNT(*) as count
-            FROM objects
-            WHERE tags IS NOT NULL AND tags != '[]' AND tags != ''
-            UNION ALL
-            -- Count objects without tags
-            SELECT 
-                'No Tags' as tag_key,
-                COUNT(*) as count
-            FROM objects
-            WHERE tags IS NULL OR tags = '[]' OR tags = ''
-        """)
+    tag_distribution = data.tag_presence
+    if not tag_distribution.empty:
+        col1, col2 = st.columns(2)
         
-        if not tag_distribution.empty and len(tag_distribution) > 0:
+        with col1:
             st.dataframe(tag_distribution, use_container_width=True)
-            
-            # Visualize tag distribution
+        
+        with col2:
             fig = plot_bar_chart(
                 tag_distribution, 
                 'count', 'tag_key', 
@@ -531,96 +502,114 @@ def render_objects_report(db):
                 figsize=(10, 6),
                 horizontal=True
             )
-            st.pyplot(fig)
-        else:
-            st.info("No tags found in the objects table")
-    except Exception as e:
-        st.warning(f"Error analyzing tags: {e}")
+            show_chart(fig)
+    
+    top_tags = data.top_tags
+    
+    if not top_tags.empty:
+        top_tags = top_tags.assign(formatted_size=top_tags['instance_size'].apply(format_size_bytes))
+        st.dataframe(
+            top_tags[['tag', 'object_count', 'instance_count', 'formatted_size']],
+            use_container_width=True
+        )
+        
+        fig = px.bar(
+            top_tags,
+            x='object_count',
+            y='tag',
+            orientation='h',
+            title='Most Used Tags',
+            labels={'object_count': 'Objects', 'tag': 'Tag'}
+        )
+        fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+        show_chart(fig)
+        
+        cooccurrence = data.tag_cooccurrence
+        if len(cooccurrence) > 1:
+            fig = plot_heatmap(cooccurrence, title='Tag Co-occurrence', figsize=(10, 8))
+            show_chart(fig)
+    else:
+        st.info("No tags found in the objects table")
 
-def render_instances_report(db):
+def render_instances_report(db, filters=None):
     """Render file instances report"""
     st.markdown("<h2 class='section-header'>Storage Analysis</h2>", unsafe_allow_html=True)
+    render_filter_notice(filters)
     
-    # Storage statistics
-    st.markdown("<h3 class='subsection-header'>Storage Statistics</h3>", unsafe_allow_html=True)
+    # Sections above the histogram control are laid out once the queries start
+    summary_area = st.container()
     
-    storage_stats = db.get_storage_stats()
-    if storage_stats:
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            total_size = format_size_bytes(storage_stats["total_size"])
-            st.metric("Total Storage", total_size)
-        
-        with col2:
-            avg_size = format_size_bytes(storage_stats["avg_size"])
-            st.metric("Average Size", avg_size)
-        
-        with col3:
-            min_size = format_size_bytes(storage_stats["min_size"])
-            st.metric("Min Size", min_size)
-        
-        with col4:
-            max_size = format_size_bytes(storage_stats["max_size"])
-            st.metric("Max Size", max_size)
+    # Log-scale size histogram, binned in the database
+    scale = st.radio("Histogram buckets", ['log2', 'log10'], horizontal=True)
     
-    # Size distribution visualization
-    size_distribution = db.query("""
-        SELECT 
-            CASE
-                WHEN size < 1024 THEN 'Under 1KB'
-                WHEN size < 1024*1024 THEN '1KB-1MB'
-                WHEN size < 1024*1024*10 THEN '1MB-10MB'
-                WHEN size < 1024*1024*100 THEN '10MB-100MB'
-                ELSE 'Over 100MB'
-            END as size_range,
-            COUNT(*) as count
-        FROM instances
-        WHERE size IS NOT NULL
-        GROUP BY size_range
-        ORDER BY 
-            CASE 
-                WHEN size_range = 'Under 1KB' THEN 1
-                WHEN size_range = '1KB-1MB' THEN 2
-                WHEN size_range = '1MB-10MB' THEN 3
-                WHEN size_range = '10MB-100MB' THEN 4
-                WHEN size_range = 'Over 100MB' THEN 5
-            END
-    """)
+    # Start all queries; each widget below is drawn as soon as its data arrives
+    page = PageScheduler(db, instances_tasks(db, filters, scale))
     
-    if not size_distribution.empty:
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.dataframe(size_distribution, use_container_width=True)
-        
-        with col2:
-            fig = plot_pie_chart(
-                size_distribution,
-                'count', 'size_range',
-                'Document Size Distribution',
-                figsize=(8, 8)
+    # Storage statistics
+    def render_storage_stats(storage_stats):
+        if storage_stats:
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                total_size = format_size_bytes(storage_stats["total_size"])
+                st.metric("Total Storage", total_size)
+            
+            with col2:
+                avg_size = format_size_bytes(storage_stats["avg_size"])
+                st.metric("Average Size", avg_size)
+            
+            with col3:
+                min_size = format_size_bytes(storage_stats["min_size"])
+                st.metric("Min Size", min_size)
+            
+            with col4:
+                max_size = format_size_bytes(storage_stats["max_size"])
+                st.metric("Max Size", max_size)
+    
+    # Size distribution visualization
+    def render_size_distribution(size_distribution):
+        if not size_distribution.empty:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.dataframe(size_distribution, use_container_width=True)
+            
+            with col2:
+                fig = plot_pie_chart(
+                    size_distribution,
+                    'count', 'size_range',
+                    'Document Size Distribution',
+                    figsize=(8, 8)
+                )
+                show_chart(fig)
+    
+    with summary_area:
+        st.markdown("<h3 class='subsection-header'>Storage Statistics</h3>", unsafe_allow_html=True)
+        page.widget(render_storage_stats, 'storage_stats')
+        page.widget(render_size_distribution, 'size_distribution')
+    
+    def render_size_histogram(size_buckets):
+        if not size_buckets.empty:
+            fig = plot_binned_histogram(
+                size_buckets['lower'], size_buckets['upper'], size_buckets['count'],
+                'Document Size Histogram',
+                'Size (bytes)', 'Documents',
+                figsize=(12, 5),
+                log_x=True
             )
-            st.pyplot(fig)
+            show_chart(fig)
+    
+    page.widget(render_size_histogram, 'size_histogram')
     
     # Service distribution
     st.markdown("<h3 class='subsection-header'>Service Distribution</h3>", unsafe_allow_html=True)
     
-    try:
-        service_distribution = db.query("""
-            SELECT 
-                s.name as service_name,
-                COUNT(*) as instance_count,
-                SUM(i.size) as total_size
-            FROM instances i
-            JOIN services s ON i.serviceId = s.serviceId
-            GROUP BY s.name
-            ORDER BY instance_count DESC
-        """)
-        
+    def render_service_distribution(service_distribution):
         if not service_distribution.empty:
             # Add formatted size column
-            service_distribution['formatted_size'] = service_distribution['total_size'].apply(format_size_bytes)
+            service_distribution = service_distribution.assign(
+                formatted_size=service_distribution['total_size'].apply(format_size_bytes)
+            )
             
             st.dataframe(service_distribution, use_container_width=True)
             
@@ -633,48 +622,53 @@ def render_instances_report(db):
                 figsize=(10, 6),
                 horizontal=True
             )
-            st.pyplot(fig)
-    except Exception as e:
-        st.warning(f"Error analyzing services: {e}")
+            show_chart(fig)
+    
+    page.widget(render_service_distribution, 'service_distribution')
+    
+    page.run()
 
-def render_folder_structure_report(db):
+def render_projection_stats(db, report):
+    """Show how many bytes a report's column-pruned queries avoided reading"""
+    stats = db.projection_stats.get(report)
+    if stats and stats['bytes_avoided'] > 0:
+        st.caption(
+            f"Read ~{format_size(stats['bytes_read'])} of column data; "
+            f"~{format_size(stats['bytes_avoided'])} of unused columns skipped."
+        )
+
+def render_folder_structure_report(db, filters=None):
     """Render folder structure report"""
     st.markdown("<h2 class='section-header'>Directory Structure</h2>", unsafe_allow_html=True)
+    render_filter_notice(filters)
+    objects_filter = object_where(db, filters, alias='o')
     
-    # Query parent paths data
-    parent_paths_df = db.query("""
-        SELECT * FROM parentPaths
-        WHERE parentPath IS NOT NULL AND parentPath != ''
-    """)
-    
-    if parent_paths_df.empty:
+    # Check for folder data without fetching it
+    if not db.has_rows('parentPaths', "parentPath IS NOT NULL AND parentPath != ''"):
         st.warning("No folder structure data found in the database.")
         return
     
-    # Get objects with parent paths
-    objects_with_paths = db.query("""
-        SELECT 
-            o.objectId,
-            o.name,
-            o.extension,
-            p.parentPath,
-            i.size
-        FROM 
-            objects o
-        JOIN
-            parentPaths p ON o.parentId = p.parentId
-        LEFT JOIN
-            instances i ON o.objectId = i.objectId
-        WHERE 
-            p.parentPath IS NOT NULL AND p.parentPath != ''
-    """)
+    # File count and size per folder; individual files are never fetched
+    objects_with_paths = db.select(QuerySpec(
+        table='objects o',
+        columns={'parentPath': 'p.parentPath'},
+        aggregates={
+            'size': 'COALESCE(SUM(i.size), 0)::BIGINT',
+            'count': 'COUNT(*)'
+        },
+        joins=[
+            'JOIN parentPaths p ON o.parentId = p.parentId',
+            'LEFT JOIN instances i ON o.objectId = i.objectId'
+        ],
+        where=["p.parentPath IS NOT NULL AND p.parentPath != ''"] + ([objects_filter] if objects_filter else [])
+    ), report='folder_structure')
     
     if objects_with_paths.empty:
         st.warning("No objects with folder paths found in the database.")
         return
     
-    # Process folder paths to create hierarchy
-    processed_df, max_depth = process_folder_paths(objects_with_paths, 'parentPath')
+    # Deepest folder level, for the depth control
+    max_depth = max_folder_depth(objects_with_paths['parentPath'])
     
     # Sidebar options for folder analysis
     st.sidebar.markdown("### Folder Analysis Options")
@@ -698,6 +692,7 @@ def render_folder_structure_report(db):
     aggregated_df = aggregate_by_folder(
         objects_with_paths, 
         size_column='size', 
+        count_column='count',
         path_column='parentPath',
         max_depth=depth_level
     )
@@ -742,7 +737,7 @@ def render_folder_structure_report(db):
                 title=f"Folder Structure - {metric} Distribution",
                 color_scale='viridis' if metric == 'Size' else 'blues'
             )
-            st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
             
         elif viz_type == "Treemap":
             fig = create_treemap_chart(
@@ -752,7 +747,7 @@ def render_folder_structure_report(db):
                 title=f"Folder Structure - {metric} Distribution",
                 color_scale='viridis' if metric == 'Size' else 'blues'
             )
-            st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
             
         elif viz_type == "Bar Chart":
             # Get top folders
@@ -766,34 +761,127 @@ def render_folder_structure_report(db):
                 title=f"Top {top_n} Folders by {metric}",
                 color_scale='viridis' if metric == 'Size' else 'blues'
             )
-            st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
     else:
         st.warning("No data available for visualization after applying filters.")
+    
+    st.caption("Open a folder and page through its largest files in the Folder Browser report.")
+    
+    render_projection_stats(db, 'folder_structure')
+
+# Session state key of the folder open in the folder browser
+FOLDER_BROWSER_KEY = "folder_browser_path"
+
+def open_folder(path):
+    """Open a folder in the folder browser (button callback)"""
+    st.session_state[FOLDER_BROWSER_KEY] = path
+
+def render_folder_browser_report(db, filters=None):
+    """Render the folder browser: subfolders with subtree totals and the largest files of a folder"""
+    st.markdown("<h2 class='section-header'>Folder Browser</h2>", unsafe_allow_html=True)
+    if filters is not None and filters.is_active:
+        st.info("Sidebar filters are applied to the file list; folder totals include all files.")
+    
+    if not db.has_rows('parentPaths', "parentPath IS NOT NULL AND parentPath != ''"):
+        st.warning("No folder structure data found in the database.")
+        return
+    
+    path = st.session_state.get(FOLDER_BROWSER_KEY)
+    folder = get_folder(db, path) if path else None
+    if folder is None:
+        # Start at the top, also when the open folder no longer exists
+        path = None
+        st.session_state.pop(FOLDER_BROWSER_KEY, None)
+    
+    # Breadcrumbs back to every ancestor
+    crumbs = [("All folders", None)] + breadcrumbs(path)
+    for column, (name, crumb) in zip(st.columns(len(crumbs)), crumbs):
+        with column:
+            st.button(name, key=f"folder_crumb_{crumb}", on_click=open_folder, args=(crumb,),
+                      disabled=crumb == path, use_container_width=True)
+    
+    if folder:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Size", format_size(folder['subtree_size']))
+        with col2:
+            st.metric("Total Files", f"{folder['subtree_files']:,}")
+        with col3:
+            st.metric("Subfolders", f"{folder['subfolders']:,}")
+        with col4:
+            st.metric("Files in Folder", f"{folder['files']:,}")
+    
+    # Subfolders, largest subtree first
+    if folder is None or folder['subfolders'] > 0:
+        st.markdown("<h3 class='subsection-header'>Subfolders</h3>", unsafe_allow_html=True)
+        source, where, params = children_source(db, path)
+        children = render_data_grid(
+            db,
+            'folder_children',
+            source,
+            key_column='path',
+            columns=['name', 'subfolders', 'subtree_files', 'subtree_size', 'files', 'size'],
+            default_sort='subtree_size',
+            descending=True,
+            where=where,
+            params=params,
+            filter_columns=['name']
+        )
+        
+        if not children.empty:
+            sizes = dict(zip(children['path'], children['subtree_size']))
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                child = st.selectbox(
+                    "Subfolder",
+                    children['path'].tolist(),
+                    format_func=lambda child_path: f"{child_path} ({format_size(sizes[child_path])})",
+                    key="folder_browser_child"
+                )
+            with col2:
+                st.button("Open", key="folder_browser_open", on_click=open_folder, args=(child,),
+                          use_container_width=True)
+    
+    # Largest files directly in the folder, paged with keyset pagination
+    if folder and folder['files'] > 0:
+        st.markdown("<h3 class='subsection-header'>Files</h3>", unsafe_allow_html=True)
+        source, params = files_source(db, folder, object_where(db, filters))
+        render_data_grid(
+            db,
+            'folder_files',
+            source,
+            key_column='objectId',
+            columns=['name', 'extension', 'size', 'created'],
+            default_sort='size',
+            descending=True,
+            params=params,
+            filter_columns=['name', 'extension']
+        )
 
-def render_storage_sunburst_report(db):
+def render_storage_sunburst_report(db, filters=None):
     """Render storage visualization report with sunburst chart"""
     st.markdown("<h2 class='section-header'>Storage Distribution</h2>", unsafe_allow_html=True)
-    
-    # Query objects with size data
-    objects_with_size = db.query("""
-        SELECT 
-            o.objectId,
-            o.name,
-            o.extension,
-            p.parentPath,
-            i.size
-        FROM 
-            objects o
-        JOIN
-            parentPaths p ON o.parentId = p.parentId
-        JOIN
-            instances i ON o.objectId = i.objectId
-        WHERE 
-            p.parentPath IS NOT NULL AND 
-            p.parentPath != '' AND
-            i.size IS NOT NULL AND
-            i.size > 0
-    """)
+    render_filter_notice(filters)
+    instances_filter = instance_where(db, filters, alias='i')
+    
+    # Total, count and largest size per folder
+    objects_with_size = db.select(QuerySpec(
+        table='objects o',
+        columns={'parentPath': 'p.parentPath'},
+        aggregates={
+            'size': 'SUM(i.size)::BIGINT',
+            'count': 'COUNT(*)',
+            'max_size': 'MAX(i.size)'
+        },
+        joins=[
+            'JOIN parentPaths p ON o.parentId = p.parentId',
+            'JOIN instances i ON o.objectId = i.objectId'
+        ],
+        where=[
+            "p.parentPath IS NOT NULL AND p.parentPath != ''",
+            "i.size IS NOT NULL AND i.size > 0"
+        ] + ([instances_filter] if instances_filter else [])
+    ), report='storage_sunburst')
     
     if objects_with_size.empty:
         st.warning("No objects with size data found in the database.")
@@ -807,23 +895,12 @@ def render_storage_sunburst_report(db):
     )
     
     # Convert size based on selected unit
-    if size_unit == "Bytes":
-        objects_with_size["Size_Converted"] = objects_with_size["size"]
-        size_label = "Bytes"
-    elif size_unit == "KB":
-        objects_with_size["Size_Converted"] = objects_with_size["size"] / 1024
-        size_label = "KB"
-    elif size_unit == "MB":
-        objects_with_size["Size_Converted"] = objects_with_size["size"] / (1024 * 1024)
-        size_label = "MB"
-    else:  # GB
-        objects_with_size["Size_Converted"] = objects_with_size["size"] / (1024 * 1024 * 1024)
-        size_label = "GB"
-    
-    # Process folder paths
-    processed_df, max_depth = process_folder_paths(objects_with_size, 'parentPath')
+    size_label = size_unit
+    divisor = {"Bytes": 1, "KB": 1024, "MB": 1024 * 1024, "GB": 1024 * 1024 * 1024}[size_unit]
+    objects_with_size["Size_Converted"] = objects_with_size["size"] / divisor
     
     # Depth control
+    max_depth = max_folder_depth(objects_with_size['parentPath'])
     depth_level = st.sidebar.slider(
         "Max Folder Depth (Storage)", 
         min_value=1, 
@@ -831,6 +908,9 @@ def render_storage_sunburst_report(db):
         value=min(3, max_depth)
     )
     
+    # Process folder paths down to the selected depth
+    processed_df, _ = process_folder_paths(objects_with_size, 'parentPath', depth_level)
+    
     # Create full path column with proper depth levels
     path_columns = [f'level_{i+1}' for i in range(depth_level)]
     
@@ -844,14 +924,14 @@ def render_storage_sunburst_report(db):
         title=f"Storage Usage by Folder ({size_label})"
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Display statistics
     st.markdown("<h3 class='subsection-header'>Storage Statistics</h3>", unsafe_allow_html=True)
     
     total_size = objects_with_size["Size_Converted"].sum()
-    max_size = objects_with_size["Size_Converted"].max()
-    avg_size = objects_with_size["Size_Converted"].mean()
+    max_size = objects_with_size["max_size"].max() / divisor
+    avg_size = total_size / objects_with_size["count"].sum()
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -864,30 +944,37 @@ def render_storage_sunburst_report(db):
     # Top folders by storage
     st.markdown("<h3 class='subsection-header'>Top Folders by Storage</h3>", unsafe_allow_html=True)
     
-    folder_storage = objects_with_size.groupby('parentPath')['Size_Converted'].sum().reset_index()
+    folder_storage = objects_with_size.groupby('parentPath', observed=True)['Size_Converted'].sum().reset_index()
     folder_storage = folder_storage.sort_values('Size_Converted', ascending=False).head(10)
     
     st.dataframe(
         folder_storage.rename(columns={'parentPath': 'Folder Path', 'Size_Converted': f'Size ({size_label})'}),
         use_container_width=True
     )
+    render_projection_stats(db, 'storage_sunburst')
 
-def render_file_distribution_report(db):
+def render_file_distribution_report(db, filters=None):
     """Render file distribution report"""
     st.markdown("<h2 class='section-header'>Document Distribution</h2>", unsafe_allow_html=True)
+    render_filter_notice(filters)
+    objects_filter = object_where(db, filters, alias='o')
     
-    # Query file extension data
-    file_extensions = db.query("""
+    # Query file extension data, categorized in SQL through the extension lookup table
+    category_join, category_expr = category_sql(db, 'o.extension')
+    file_extensions = db.query(f"""
         SELECT 
-            COALESCE(extension, 'Unknown') as extension,
+            COALESCE(o.extension, 'Unknown') as extension,
+            {category_expr} as category,
             COUNT(*) as count,
             p.parentPath
         FROM 
             objects o
         LEFT JOIN
             parentPaths p ON o.parentId = p.parentId
+        {category_join}
+        {f"WHERE {objects_filter}" if objects_filter else ""}
         GROUP BY 
-            extension, p.parentPath
+            o.extension, category, p.parentPath
         ORDER BY 
             count DESC
     """)
@@ -896,30 +983,6 @@ def render_file_distribution_report(db):
         st.warning("No file extension data found in the database.")
         return
     
-    # File type categories
-    file_categories = {
-        'documents': ['doc', 'docx', 'pdf', 'txt', 'rtf', 'odt', 'md', 'xps'],
-        'spreadsheets': ['xls', 'xlsx', 'csv', 'ods', 'tsv', 'numbers'],
-        'presentations': ['ppt', 'pptx', 'odp', 'key'],
-        'images': ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'webp', 'svg', 'heic', 'heif'],
-        'audio': ['mp3', 'wav', 'aac', 'ogg', 'flac', 'wma', 'm4a'],
-        'video': ['mp4', 'avi', 'mov', 'wmv', 'flv', 'mkv', 'webm', 'm4v'],
-        'archives': ['zip', 'rar', '7z', 'tar', 'gz', 'bz2', 'xz'],
-        'code': ['py', 'js', 'html', 'css', 'java', 'cpp', 'c', 'h', 'go', 'php', 'rb', 'pl', 'rs', 'ts'],
-        'data': ['json', 'xml', 'yaml', 'yml', 'toml', 'sql', 'db', 'sqlite'],
-        'executables': ['exe', 'app', 'msi', 'dll', 'so', 'bin', 'dmg']
-    }
-    
-    # Categorize extensions
-    def categorize_extension(ext):
-        ext = ext.lower().replace('.', '')
-        for category, extensions in file_categories.items():
-            if ext in extensions:
-                return category
-        return 'other'
-    
-    file_extensions['category'] = file_extensions['extension'].apply(categorize_extension)
-    
     # Metrics by category
     category_counts = file_extensions.groupby('category')['count'].sum().reset_index()
     category_counts = category_counts.sort_values('count', ascending=False)
@@ -938,12 +1001,12 @@ def render_file_distribution_report(db):
             color_discrete_sequence=px.colors.qualitative.Pastel,
             hole=0.4
         )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
     
     with col2:
         st.markdown("<h3 class='subsection-header'>Top File Extensions</h3>", unsafe_allow_html=True)
         
-        top_extensions = file_extensions.groupby('extension')['count'].sum().reset_index()
+        top_extensions = file_extensions.groupby('extension', observed=True)['count'].sum().reset_index()
         top_extensions = top_extensions.sort_values('count', ascending=False).head(10)
         
         fig = px.bar(
@@ -954,16 +1017,16 @@ def render_file_distribution_report(db):
             color='count',
             color_continuous_scale='Viridis'
         )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
     
     # File distribution by folder
     st.markdown("<h3 class='subsection-header'>File Type Distribution by Folder</h3>", unsafe_allow_html=True)
     
     # Group by folder and category
-    folder_category = file_extensions.groupby(['parentPath', 'category'])['count'].sum().reset_index()
+    folder_category = file_extensions.groupby(['parentPath', 'category'], observed=True)['count'].sum().reset_index()
     
     # Get top folders by file count
-    top_folders = folder_category.groupby('parentPath')['count'].sum().sort_values(ascending=False).head(5).index.tolist()
+    top_folders = folder_category.groupby('parentPath', observed=True)['count'].sum().sort_values(ascending=False).head(5).index.tolist()
     
     # Filter for top folders
     top_folder_data = folder_category[folder_category['parentPath'].isin(top_folders)]
@@ -977,33 +1040,314 @@ def render_file_distribution_report(db):
             title='File Type Distribution in Top Folders',
             barmode='stack'
         )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
     else:
         st.info("Not enough folder data to visualize distribution.")
 
-def render_metadata_analysis_report(db):
+def render_metadata_analysis_report(db, filters=None):
     """Render metadata analysis report"""
     st.markdown("<h2 class='section-header'>Metadata Insights</h2>", unsafe_allow_html=True)
     
+    data = metadata_data(db)
+    render_provider_errors(data)
+    
     # Call the render function from the metadata_analysis module
-    render_metadata_analysis_dashboard(db)
+    render_metadata_analysis_dashboard(db, data.file_type_counts)
+
+def render_classifications_report(db, filters=None):
+    """Render document classifications report"""
+    st.markdown("<h2 class='section-header'>Content Categories</h2>", unsafe_allow_html=True)
+    render_filter_notice(filters)
+    data = classifications_data(db, filters)
+    render_provider_errors(data)
+    
+    summary = data.summary
+    
+    if summary.empty:
+        st.warning("No classification data found in the database.")
+        return
+    
+    # Key metrics
+    total_instances = int(summary['instance_count'].sum())
+    unclassified = summary.loc[summary['classificationKey'] == 'Unclassified', 'instance_count'].sum()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Classifications", f"{(summary['classificationKey'] != 'Unclassified').sum():,}")
+    with col2:
+        st.metric("Classified Instances", f"{total_instances - int(unclassified):,}")
+    with col3:
+        st.metric("Unclassified Share", f"{(unclassified / total_instances * 100) if total_instances else 0:.1f}%")
+    
+    # Classification distribution
+    st.markdown("<h3 class='subsection-header'>Classification Distribution</h3>", unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        display_summary = summary.copy()
+        display_summary['formatted_size'] = display_summary['total_size'].fillna(0).apply(format_size_bytes)
+        st.dataframe(display_summary, use_container_width=True)
+    
+    with col2:
+        fig = plot_bar_chart(
+            summary.head(15),
+            'instance_count', 'classificationKey',
+            'Instances by Classification',
+            'Count', 'Classification',
+            figsize=(10, 6),
+            horizontal=True
+        )
+        show_chart(fig)
+    
+    # Classification by service
+    st.markdown("<h3 class='subsection-header'>Classifications by Service</h3>", unsafe_allow_html=True)
+    
+    by_service = data.by_service
+    if not by_service.empty:
+        fig = px.bar(
+            by_service,
+            x='classificationKey',
+            y='instance_count',
+            color='service_name',
+            title='Classification Distribution by Service',
+            barmode='stack'
+        )
+        show_chart(fig)
+    
+    # Drill-down into a single classification
+    st.markdown("<h3 class='subsection-header'>Classification Details</h3>", unsafe_allow_html=True)
+    
+    selected_classification = st.selectbox(
+        "Select a classification:",
+        summary['classificationKey'].tolist()
+    )
+    
+    detail = classification_detail(db, selected_classification, filters)
+    render_provider_errors(detail)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        top_extensions = detail.top_extensions
+        if not top_extensions.empty:
+            fig = px.bar(
+                top_extensions,
+                x='extension',
+                y='instance_count',
+                title=f'Top File Extensions - {selected_classification}',
+                color='instance_count',
+                color_continuous_scale='Viridis'
+            )
+            show_chart(fig)
+    
+    with col2:
+        top_folders = detail.top_folders
+        if not top_folders.empty:
+            top_folders = top_folders.assign(formatted_size=top_folders['total_size'].fillna(0).apply(format_size_bytes))
+            st.markdown(f"**Top Folders - {selected_classification}**")
+            st.dataframe(top_folders, use_container_width=True)
 
-def render_report(db, selected_report):
+def render_services_report(db, filters=None):
+    """Render service interactions report"""
+    st.markdown("<h2 class='section-header'>Service Interactions</h2>", unsafe_allow_html=True)
+    render_filter_notice(filters)
+    
+    # Sections above the throughput control are filled once the data is fetched
+    summary_area = st.container()
+    
+    # Throughput over time
+    st.markdown("<h3 class='subsection-header'>Processing Throughput</h3>", unsafe_allow_html=True)
+    
+    granularity = st.radio(
+        "Granularity",
+        ["day", "week", "month"],
+        index=2,
+        horizontal=True,
+        format_func=lambda x: x.capitalize()
+    )
+    
+    data = services_data(db, filters, granularity)
+    render_provider_errors(data)
+    
+    service_distribution = data.distribution
+    
+    if service_distribution.empty:
+        summary_area.warning("No service data found in the database.")
+        return
+    
+    # Key metrics
+    compression = data.compression
+    total_size = compression['total_size'].sum()
+    total_store_size = compression['total_store_size'].sum()
+    
+    col1, col2, col3 = summary_area.columns(3)
+    with col1:
+        st.metric("Services", f"{len(service_distribution):,}")
+    with col2:
+        st.metric("Instances", f"{int(service_distribution['instance_count'].sum()):,}")
+    with col3:
+        ratio = total_size / total_store_size if total_store_size else 0
+        st.metric("Overall Compression", f"{ratio:.2f}x")
+    
+    throughput = data.throughput
+    if not throughput.empty:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            fig = px.line(
+                throughput,
+                x='period',
+                y='instance_count',
+                color='service_name',
+                title='Instances Processed per Period'
+            )
+            show_chart(fig)
+        
+        with col2:
+            fig = px.line(
+                throughput,
+                x='period',
+                y='avg_store_latency_s',
+                color='service_name',
+                title='Average Process-to-Store Latency (seconds)'
+            )
+            show_chart(fig)
+    else:
+        st.info("No processing times recorded for instances.")
+    
+    # Compression
+    st.markdown("<h3 class='subsection-header'>Storage Compression</h3>", unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        display_compression = compression.copy()
+        display_compression['original'] = display_compression['total_size'].apply(format_size_bytes)
+        display_compression['stored'] = display_compression['total_store_size'].apply(format_size_bytes)
+        st.dataframe(
+            display_compression[['service_name', 'original', 'stored', 'stored_count', 'compression_ratio']],
+            use_container_width=True
+        )
+    
+    with col2:
+        fig = px.bar(
+            compression,
+            x='service_name',
+            y=['total_size', 'total_store_size'],
+            title='Original vs Stored Size by Service',
+            barmode='group'
+        )
+        show_chart(fig)
+    
+    # Processing pipes
+    st.markdown("<h3 class='subsection-header'>Processing Pipes</h3>", unsafe_allow_html=True)
+    
+    pipes = data.pipes
+    if not pipes.empty:
+        fig = px.bar(
+            pipes,
+            x='service_name',
+            y='instance_count',
+            color='process_pipe',
+            title='Instances by Service and Processing Pipe',
+            barmode='stack'
+        )
+        show_chart(fig)
+
+def render_messages_report(db, filters=None):
+    """Render system messages report"""
+    st.markdown("<h2 class='section-header'>System Messages</h2>", unsafe_allow_html=True)
+    render_filter_notice(filters, applies=False)
+    
+    # The total is shown above the volume control once the data is fetched
+    total_area = st.empty()
+    
+    # Message volume over time
+    st.markdown("<h3 class='subsection-header'>Message Volume</h3>", unsafe_allow_html=True)
+    
+    granularity = st.radio(
+        "Granularity",
+        ["day", "week", "month"],
+        index=1,
+        horizontal=True,
+        format_func=lambda x: x.capitalize()
+    )
+    
+    with st.spinner("Indexing messages..."):
+        data = messages_data(db, granularity)
+    render_provider_errors(data)
+    
+    if data.total_messages == 0:
+        total_area.warning("No system messages found in the database.")
+        return
+    
+    total_area.metric("Total Messages", f"{data.total_messages:,}")
+    
+    histogram = data.histogram
+    if not histogram.empty:
+        fig = px.bar(
+            histogram,
+            x='period',
+            y='message_count',
+            title=f'Messages per {granularity.capitalize()}',
+            color_discrete_sequence=[config.APARAVI_COLORS['primary']]
+        )
+        show_chart(fig)
+    
+    # Full-text search
+    st.markdown("<h3 class='subsection-header'>Search Messages</h3>", unsafe_allow_html=True)
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        search_text = st.text_input("Search text", placeholder="e.g. access denied")
+    with col2:
+        phrase = st.checkbox("Exact phrase", value=True)
+    
+    if search_text:
+        start_time = time.time()
+        results = search_messages(db, search_text, phrase=phrase)
+        elapsed = time.time() - start_time
+        
+        st.caption(f"{len(results):,} messages shown ({elapsed:.2f}s)")
+        if not results.empty:
+            st.dataframe(results, use_container_width=True)
+        else:
+            st.info("No messages match the search.")
+    
+    # Messages linked to the most documents
+    st.markdown("<h3 class='subsection-header'>Most Linked Messages</h3>", unsafe_allow_html=True)
+    
+    linked = data.linked
+    if not linked.empty:
+        st.dataframe(linked, use_container_width=True)
+    else:
+        st.info("No messages are linked to documents.")
+
+def render_report(db, selected_report, filters=None):
     """Render the selected report"""
     if selected_report == "overview":
-        render_overview_report(db)
+        render_overview_report(db, filters)
     elif selected_report == "objects":
-        render_objects_report(db)
+        render_objects_report(db, filters)
     elif selected_report == "instances":
-        render_instances_report(db)
+        render_instances_report(db, filters)
     elif selected_report == "folder_structure":
-        render_folder_structure_report(db)
+        render_folder_structure_report(db, filters)
+    elif selected_report == "folder_browser":
+        render_folder_browser_report(db, filters)
     elif selected_report == "storage_sunburst":
-        render_storage_sunburst_report(db)
+        render_storage_sunburst_report(db, filters)
     elif selected_report == "file_distribution":
-        render_file_distribution_report(db)
+        render_file_distribution_report(db, filters)
     elif selected_report == "metadata_analysis":
-        render_metadata_analysis_report(db)
+        render_metadata_analysis_report(db, filters)
+    elif selected_report == "classifications":
+        render_classifications_report(db, filters)
+    elif selected_report == "services":
+        render_services_report(db, filters)
+    elif selected_report == "messages":
+        render_messages_report(db, filters)
     else:
         # Display placeholder for other reports
         report_info = config.REPORTS[selected_report]
@@ -1011,11 +1355,32 @@ def render_report(db, selected_report):
         st.markdown(report_info['description'])
         st.info("This report is under development and will be available in a future release.")
 
+def render_memory_usage(budget):
+    """Show the memory the session's frames used in this run.
+    
+    Args:
+        budget (MemoryBudget): Budget of the run, or None outside memory-budget mode
+    """
+    if budget is None:
+        return
+    
+    if budget.sampled_loads:
+        st.warning(
+            f"{budget.sampled_loads} result(s) were sampled to fit the session's memory budget; "
+            "totals and counts on this page cover the sample only."
+        )
+    st.sidebar.caption(
+        f"Memory: {budget.used_bytes / 1024 / 1024:.1f} MB of {budget.limit_bytes / 1024 / 1024:.0f} MB budget"
+    )
+
 def main():
     """Main application entry point"""
     # Render header
     render_header()
     
+    # Frames loaded from now on, including the sidebar's, are charged to this run's budget
+    budget = start_budget(config.MEMORY_BUDGET_MB, config.MEMORY_BUDGET_ACTION)
+    
     # Render sidebar and get options
     options = render_sidebar()
     
@@ -1028,13 +1393,20 @@ def main():
         if not tables:
             st.error("Could not retrieve tables from the database. Please check the database path and try again.")
             return
-        
-        # Render the selected report
-        render_report(db, options["selected_report"])
-        
     except Exception as e:
         st.error(f"Error connecting to database: {e}")
         st.info("Please check that the database path is correct and that the file exists.")
+        return
+    
+    # Render the selected report
+    try:
+        render_report(db, options["selected_report"], options["filters"])
+        render_memory_usage(budget)
+    except MemoryBudgetExceeded as e:
+        st.error(f"This report was not loaded: {e}.")
+        st.info("Narrow the filters, or raise MEMORY_BUDGET_MB in config.py.")
+    except Exception as e:
+        st.error(f"Error rendering the report: {e}")
 
 if __name__ == "__main__":
     main()
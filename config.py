@@ -17,8 +17,28 @@ IMAGES_DIR = BASE_DIR / "images"  # Directory containing Aparavi logo images
 # Default database path
 DEFAULT_DB_PATH = str(BASE_DIR / "sample.duckdb")  # Path to the Aparavi Data Suite DuckDB database
 
+# Precomputed tables (closures, rollups, indexes) are kept in a separate file
+# so the Aparavi database itself is never modified
+DERIVED_DB_PATH = str(DATA_DIR / "derived.duckdb")
+
+# Snapshot mode: read Parquet exports written by utils/snapshot_database.py
+# instead of opening the database the collector writes to
+SNAPSHOT_MODE = False  # Set to True once a snapshot has been written
+SNAPSHOT_DIR = str(DATA_DIR / "snapshot")  # Directory of Parquet snapshots and their manifest
+
 # Cache settings
 CACHE_TTL = 3600  # Cache time to live in seconds for database query results
+CACHE_DIR = str(DATA_DIR / "cache")  # Directory for cached results (sketches, aggregates)
+
+# Memory budget mode: frames a dashboard session loads from the database are
+# compacted and limited, so one session cannot exhaust the process memory
+MEMORY_BUDGET_MB = None  # Memory per session script run in MB; None disables budget mode
+MEMORY_BUDGET_ACTION = "sample"  # "sample" results that do not fit the budget, or "refuse" to load them
+
+# Headless API settings (api.py)
+API_HOST = "127.0.0.1"  # Interface the API server listens on
+API_PORT = 8000  # Port of the API server
+API_WORKERS = 4  # Threads running DuckDB queries for API requests
 
 # UI Configuration
 APP_TITLE = "Aparavi Reporting Dashboard"  # Application title displayed in header and browser tab
@@ -76,6 +96,22 @@ CHART_COLORS = {
     ]
 }
 
+# File type categories keyed by lowercase extension without the leading dot
+# Extensions that appear in no category are reported as DEFAULT_FILE_CATEGORY
+FILE_CATEGORIES = {
+    "documents": ["doc", "docx", "pdf", "txt", "rtf", "odt", "md", "xps"],
+    "spreadsheets": ["xls", "xlsx", "csv", "ods", "tsv", "numbers"],
+    "presentations": ["ppt", "pptx", "odp", "key"],
+    "images": ["jpg", "jpeg", "png", "gif", "bmp", "tiff", "webp", "svg", "heic", "heif"],
+    "audio": ["mp3", "wav", "aac", "ogg", "flac", "wma", "m4a"],
+    "video": ["mp4", "avi", "mov", "wmv", "flv", "mkv", "webm", "m4v"],
+    "archives": ["zip", "rar", "7z", "tar", "gz", "bz2", "xz"],
+    "code": ["py", "js", "html", "css", "java", "cpp", "c", "h", "go", "php", "rb", "pl", "rs", "ts"],
+    "data": ["json", "xml", "yaml", "yml", "toml", "sql", "db", "sqlite"],
+    "executables": ["exe", "app", "msi", "dll", "so", "bin", "dmg"]
+}
+DEFAULT_FILE_CATEGORY = "other"
+
 # Export configuration
 EXPORT_FORMATS = ["csv", "json", "xlsx"]  # Supported export formats
 MAX_EXPORT_ROWS = 100000  # Maximum number of rows to export for performance
@@ -129,6 +165,11 @@ REPORT_CATEGORIES = {
                 "icon": "",
                 "description": "Visual representation of your folder hierarchies"
             },
+            "folder_browser": {
+                "title": "Folder Browser",
+                "icon": "",
+                "description": "Open folders to see subfolder totals and their largest files"
+            },
             "storage_sunburst": {
                 "title": "Storage Distribution",
                 "icon": "",
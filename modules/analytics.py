@@ -3,12 +3,21 @@ Advanced analytics module for document data analysis.
 """
 
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 
+from modules.categories import categorize_extensions
+from modules.sketches import SizeSketch, sketch_query, STREAM_BATCH_SIZE
+from modules.timeseries import time_series_from_frame
+from modules.timestamps import normalize_epoch_ms
+
 def time_series_analysis(data, time_column, value_column, freq='M'):
     """Perform time series analysis on document data.
     
+    Bucketing, moving averages, growth rates and outliers are computed in
+    DuckDB by modules.timeseries. Periods are labelled by their start date.
+    For data still in the database, use modules.timeseries.time_series
+    instead of loading the rows first.
+    
     Args:
         data (DataFrame): Data with timestamps and values
         time_column (str): Column containing timestamps
@@ -18,43 +27,29 @@ def time_series_analysis(data, time_column, value_column, freq='M'):
     Returns:
         dict: Dictionary with time series analysis results
     """
-    # Ensure time column is datetime
-    df = data.copy()
-    if not pd.api.types.is_datetime64_dtype(df[time_column]):
-        df[time_column] = pd.to_datetime(df[time_column])
-    
-    # Set time column as index
-    df = df.set_index(time_column)
-    
-    # Resample data to specified frequency
-    resampled = df[value_column].resample(freq).sum()
+    series = time_series_from_frame(data, time_column, value_column, freq)
+    series = series.rename(columns={'period': time_column, 'value': value_column})
     
-    # Calculate growth rate
-    growth_rate = resampled.pct_change().dropna()
+    def column(name):
+        return series[[time_column, name]].rename(columns={name: value_column})
     
-    # Calculate moving averages
-    ma_3 = resampled.rolling(window=3).mean()
-    ma_6 = resampled.rolling(window=6).mean()
-    
-    # Detect outliers (simple method: values > 2 std devs from mean)
-    mean = resampled.mean()
-    std = resampled.std()
-    outliers = resampled[(resampled > mean + 2*std) | (resampled < mean - 2*std)]
+    growth_rate = column('growth_rate').dropna()
+    outliers = series.loc[series['is_outlier'], [time_column, value_column]]
     
     # Predict next period (simple forecast - average of last 3 periods)
-    if len(resampled) >= 3:
-        forecast = resampled[-3:].mean()
+    if not series.empty:
+        forecast = series[value_column].tail(3).mean()
     else:
-        forecast = resampled.mean() if not resampled.empty else None
+        forecast = None
     
     # Return results
     results = {
         'original': data,
-        'resampled': resampled.reset_index(),
-        'growth_rate': growth_rate.reset_index(),
-        'moving_avg_3': ma_3.reset_index(),
-        'moving_avg_6': ma_6.reset_index(),
-        'outliers': outliers.reset_index() if not outliers.empty else pd.DataFrame(),
+        'resampled': series[[time_column, value_column]],
+        'growth_rate': growth_rate.reset_index(drop=True),
+        'moving_avg_3': column('moving_avg_3'),
+        'moving_avg_6': column('moving_avg_6'),
+        'outliers': outliers.reset_index(drop=True) if not outliers.empty else pd.DataFrame(),
         'forecast': forecast
     }
     
@@ -63,6 +58,9 @@ def time_series_analysis(data, time_column, value_column, freq='M'):
 def size_distribution_analysis(sizes):
     """Analyze file size distribution.
     
+    Sizes are summarized with a mergeable sketch in chunks, so percentiles are
+    t-digest estimates and the histogram uses log2 buckets.
+    
     Args:
         sizes (Series): Series containing file sizes in bytes
         
@@ -75,45 +73,64 @@ def size_distribution_analysis(sizes):
     if clean_sizes.empty:
         return {}
     
-    # Basic statistics
-    stats = {
-        'count': len(clean_sizes),
-        'min': clean_sizes.min(),
-        'max': clean_sizes.max(),
-        'mean': clean_sizes.mean(),
-        'median': clean_sizes.median(),
-        'std': clean_sizes.std(),
-        'total': clean_sizes.sum()
-    }
+    sketch = SizeSketch()
+    values = clean_sizes.to_numpy()
+    for start in range(0, len(values), STREAM_BATCH_SIZE):
+        sketch.update(values[start:start + STREAM_BATCH_SIZE])
     
-    # Calculate percentiles
-    percentiles = [10, 25, 50, 75, 90, 95, 99]
-    for p in percentiles:
-        stats[f'p{p}'] = np.percentile(clean_sizes, p)
-    
-    # Size categories
-    size_categories = {
-        'tiny': (0, 1024),  # 0-1KB
-        'small': (1024, 1024*1024),  # 1KB-1MB
-        'medium': (1024*1024, 1024*1024*10),  # 1MB-10MB
-        'large': (1024*1024*10, 1024*1024*100),  # 10MB-100MB
-        'huge': (1024*1024*100, float('inf'))  # >100MB
-    }
+    return sketch.summary()
+
+def size_distribution_from_db(db, table='instances', column='size', where=None):
+    """Analyze a size column directly from the database.
     
-    category_counts = {}
-    for category, (min_size, max_size) in size_categories.items():
-        category_counts[category] = len(clean_sizes[(clean_sizes >= min_size) & (clean_sizes < max_size)])
+    The column is streamed as Arrow batches into a sketch, so memory use does
+    not grow with the number of rows. The serialized sketch is cached per
+    database version.
     
-    stats['categories'] = category_counts
+    Args:
+        db (DatabaseManager): Database manager
+        table (str): Table holding the sizes
+        column (str): Size column
+        where (str, optional): SQL filter applied to the table
+        
+    Returns:
+        dict: Dictionary with size analysis results, as size_distribution_analysis
+    """
+    where_clause = f"WHERE {where}" if where else ""
     
-    # Calculate size histogram data
-    hist_data = np.histogram(clean_sizes, bins=20)
-    stats['histogram'] = {
-        'counts': hist_data[0].tolist(),
-        'bins': hist_data[1].tolist()
-    }
+    def compute():
+        sketch = sketch_query(db, f"SELECT {column} FROM {table} {where_clause}")
+        return sketch.to_dict()
     
-    return stats
+    data = db.cache.get_or_compute('size_sketch', (table, column, where), db.get_fingerprint(), compute)
+    return SizeSketch.from_dict(data).summary()
+
+def extension_counts(db, where=None, limit=10):
+    """Get the most common file extensions, cached per filter.
+    
+    Args:
+        db (DatabaseManager): Database manager
+        where (str, optional): SQL filter applied to the objects table
+        limit (int): Maximum number of extensions
+        
+    Returns:
+        DataFrame: ext and count, most common first
+    """
+    where_clause = f"WHERE {where}" if where else ""
+    
+    def compute():
+        return db.query(f"""
+            SELECT 
+                COALESCE(extension, 'No Extension') as ext,
+                COUNT(*) as count
+            FROM objects
+            {where_clause}
+            GROUP BY ext
+            ORDER BY count DESC
+            LIMIT {int(limit)}
+        """)
+    
+    return db.cache.get_or_compute('extension_counts', (where, limit), db.get_fingerprint(), compute)
 
 def file_type_analysis(extensions):
     """Analyze file type distribution.
@@ -124,33 +141,17 @@ def file_type_analysis(extensions):
     Returns:
         dict: Dictionary with file type analysis
     """
-    # Clean extensions (remove leading dots, convert to lowercase)
-    clean_extensions = extensions.str.replace(r'^\.*', '', regex=True).str.lower()
+    # Count raw values first so cleaning and categorization run once per
+    # distinct extension rather than once per row
+    raw_counts = extensions.value_counts()
+    clean_index = raw_counts.index.astype(str).str.replace(r'^\.*', '', regex=True).str.lower()
     
     # Count unique extensions
-    extension_counts = clean_extensions.value_counts()
+    extension_counts = raw_counts.groupby(clean_index).sum().sort_values(ascending=False)
     
     # Group by file type category
-    file_categories = {
-        'documents': ['doc', 'docx', 'pdf', 'txt', 'rtf', 'odt', 'md', 'xps'],
-        'spreadsheets': ['xls', 'xlsx', 'csv', 'ods', 'tsv', 'numbers'],
-        'presentations': ['ppt', 'pptx', 'odp', 'key'],
-        'images': ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff', 'webp', 'svg', 'heic', 'heif'],
-        'audio': ['mp3', 'wav', 'aac', 'ogg', 'flac', 'wma', 'm4a'],
-        'video': ['mp4', 'avi', 'mov', 'wmv', 'flv', 'mkv', 'webm', 'm4v'],
-        'archives': ['zip', 'rar', '7z', 'tar', 'gz', 'bz2', 'xz'],
-        'code': ['py', 'js', 'html', 'css', 'java', 'cpp', 'c', 'h', 'go', 'php', 'rb', 'pl', 'rs', 'ts'],
-        'data': ['json', 'xml', 'yaml', 'yml', 'toml', 'sql', 'db', 'sqlite'],
-        'executables': ['exe', 'app', 'msi', 'dll', 'so', 'bin', 'dmg']
-    }
-    
-    category_counts = {}
-    for category, exts in file_categories.items():
-        category_counts[category] = clean_extensions[clean_extensions.isin(exts)].count()
-    
-    # Add 'other' category for uncategorized extensions
-    categorized_extensions = [ext for category_exts in file_categories.values() for ext in category_exts]
-    category_counts['other'] = clean_extensions[~clean_extensions.isin(categorized_extensions)].count()
+    categories = categorize_extensions(extension_counts.index.to_series())
+    category_counts = extension_counts.groupby(categories.values, observed=False).sum().to_dict()
     
     return {
         'extension_counts': extension_counts.to_dict(),
@@ -187,7 +188,9 @@ def document_aging_analysis(creation_timestamps, current_time=None):
     """Analyze document age distribution.
     
     Args:
-        creation_timestamps (Series): Series with document creation timestamps (epoch milliseconds)
+        creation_timestamps (Series): Series with document creation timestamps,
+            either epoch milliseconds or datetimes (e.g. a column of the
+            instance fact table). Invalid epoch values are ignored.
         current_time (int, optional): Current time as epoch milliseconds. If None, uses current time.
         
     Returns:
@@ -197,7 +200,7 @@ def document_aging_analysis(creation_timestamps, current_time=None):
         current_time = int(datetime.now().timestamp() * 1000)
     
     # Convert timestamps to datetime
-    clean_timestamps = pd.to_datetime(creation_timestamps, unit='ms')
+    clean_timestamps = normalize_epoch_ms(creation_timestamps).dropna()
     
     # Calculate age in days
     current_datetime = pd.to_datetime(current_time, unit='ms')
@@ -213,10 +216,10 @@ def document_aging_analysis(creation_timestamps, current_time=None):
         'older': (365, float('inf'))  # More than a year
     }
     
-    # Count documents in each age category
-    category_counts = {}
-    for category, (min_age, max_age) in age_categories.items():
-        category_counts[category] = len(age_days[(age_days >= min_age) & (age_days < max_age)])
+    # Count documents in each age category in one binning pass
+    edges = [min_age for min_age, _ in age_categories.values()] + [float('inf')]
+    binned = pd.cut(age_days, bins=edges, right=False, labels=list(age_categories))
+    category_counts = binned.value_counts(sort=False).astype(int).to_dict()
     
     # Calculate basic statistics
     stats = {
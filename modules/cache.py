@@ -0,0 +1,233 @@
+"""
+Module for caching computed report results.
+
+Results are keyed by a namespace, a key describing the inputs (filters,
+granularity, ...) and the database fingerprint, so a modified database never
+serves stale results. Entries are kept in memory and, when a cache directory
+is configured, pickled to disk so they survive application restarts.
+
+The memory level holds the most recently used MEMORY_MAX_ENTRIES entries.
+When the fingerprint changes, entries of other fingerprints can never be hit
+again and are dropped from memory and disk, so a cache directory must only
+hold the entries of one database (DatabaseManager gives each database its own). Results computed while a query
+failed are not cached, so a transient error is not served until the next
+fingerprint change.
+"""
+
+import contextvars
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from modules.memory import is_sample
+
+# Entries kept in memory; the least recently used are evicted first
+MEMORY_MAX_ENTRIES = 256
+
+# Queries that failed during the computation running in the current context
+_failed_queries = contextvars.ContextVar('failed_queries', default=None)
+
+
+def note_query_failure(error):
+    """Record that a query failed, so the result being computed is not cached.
+
+    Args:
+        error (Exception): Error raised by the query
+    """
+    failures = _failed_queries.get()
+    if failures is not None:
+        failures.append(error)
+
+
+class QueryCache:
+    """Two-level (memory and disk) cache for computed results."""
+
+    def __init__(self, cache_dir=None, ttl=None, max_entries=MEMORY_MAX_ENTRIES):
+        """Initialize the cache.
+
+        Args:
+            cache_dir (str, optional): Directory for persisted entries. If None,
+                entries are only kept in memory.
+            ttl (int, optional): Time to live in seconds. If None, entries never
+                expire and are only invalidated by a fingerprint change.
+            max_entries (int): Entries kept in memory
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    def _fingerprint_tag(self, fingerprint):
+        """Get the short tag prefixing the ids of a fingerprint's entries."""
+        return hashlib.md5(repr(fingerprint).encode()).hexdigest()[:12]
+
+    def _entry_id(self, namespace, key, fingerprint):
+        """Build a stable identifier for an entry."""
+        raw = repr((namespace, key, fingerprint)).encode()
+        return f"{self._fingerprint_tag(fingerprint)}-{namespace}-{hashlib.md5(raw).hexdigest()}"
+
+    def _entry_path(self, entry_id):
+        """Get the disk path of an entry."""
+        return os.path.join(self.cache_dir, f"{entry_id}.pkl")
+
+    def _expired(self, stored_at):
+        """Check whether an entry stored at a given time has expired."""
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _remember(self, entry_id, entry):
+        """Keep an entry in memory, evicting the least recently used ones."""
+        with self._lock:
+            self._memory[entry_id] = entry
+            self._memory.move_to_end(entry_id)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _use_fingerprint(self, fingerprint):
+        """Drop the entries of other fingerprints when the fingerprint changes."""
+        if fingerprint == self._fingerprint:
+            return
+        tag = self._fingerprint_tag(fingerprint)
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return
+            self._fingerprint = fingerprint
+            for entry_id in [entry_id for entry_id in self._memory if not entry_id.startswith(f"{tag}-")]:
+                del self._memory[entry_id]
+        self.prune(keep_tag=tag)
+
+    def prune(self, keep_tag=None):
+        """Remove disk entries of other fingerprints and expired disk entries.
+
+        Args:
+            keep_tag (str, optional): Fingerprint tag of the entries to keep
+                (see _fingerprint_tag). If None, only expired entries are removed.
+        """
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith((".pkl", ".tmp")):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                if (keep_tag is not None and not filename.startswith(f"{keep_tag}-")) \
+                        or self._expired(os.path.getmtime(path)):
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def get(self, namespace, key, fingerprint):
+        """Get a cached value.
+
+        Args:
+            namespace (str): Kind of result (e.g. 'size_sketch')
+            key: Hashable description of the inputs
+            fingerprint (str): Database fingerprint the value was computed from
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        self._use_fingerprint(fingerprint)
+        entry_id = self._entry_id(namespace, key, fingerprint)
+
+        with self._lock:
+            entry = self._memory.get(entry_id)
+            if entry is not None:
+                self._memory.move_to_end(entry_id)
+        if entry is None and self.cache_dir:
+            try:
+                with open(self._entry_path(entry_id), "rb") as f:
+                    entry = pickle.load(f)
+                self._remember(entry_id, entry)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                entry = None
+
+        if entry is None:
+            return None
+
+        stored_at, value = entry
+        if self._expired(stored_at):
+            self.invalidate(namespace, key, fingerprint)
+            return None
+        return value
+
+    def set(self, namespace, key, fingerprint, value):
+        """Store a value.
+
+        Args:
+            namespace (str): Kind of result
+            key: Hashable description of the inputs
+            fingerprint (str): Database fingerprint the value was computed from
+            value: Picklable value to cache
+        """
+        self._use_fingerprint(fingerprint)
+        entry_id = self._entry_id(namespace, key, fingerprint)
+        entry = (time.time(), value)
+        self._remember(entry_id, entry)
+
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = self._entry_path(entry_id) + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._entry_path(entry_id))
+            except (OSError, pickle.PicklingError) as e:
+                print(f"Error writing cache entry: {e}")
+
+    def get_or_compute(self, namespace, key, fingerprint, compute):
+        """Get a cached value, computing and storing it if missing.
+
+        Args:
+            namespace (str): Kind of result
+            key: Hashable description of the inputs
+            fingerprint (str): Database fingerprint
+            compute (callable): Function returning the value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        value = self.get(namespace, key, fingerprint)
+        if value is None:
+            outer = _failed_queries.get()
+            failures = []
+            token = _failed_queries.set(failures)
+            try:
+                value = compute()
+            finally:
+                _failed_queries.reset(token)
+            if failures and outer is not None:
+                # The enclosing computation used this result
+                outer.extend(failures)
+            # A frame left empty by a failed query, or a sample fitting one
+            # session's memory budget, is not the result
+            if not failures and not is_sample(value):
+                self.set(namespace, key, fingerprint, value)
+        return value
+
+    def invalidate(self, namespace, key, fingerprint):
+        """Remove a single entry."""
+        entry_id = self._entry_id(namespace, key, fingerprint)
+        with self._lock:
+            self._memory.pop(entry_id, None)
+        if self.cache_dir:
+            try:
+                os.remove(self._entry_path(entry_id))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith(".pkl"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        pass
@@ -0,0 +1,250 @@
+"""
+Module for the schema and statistics catalog.
+
+The catalog describes the tables of the database (columns, types, primary
+keys and estimated row counts) and is read once per database fingerprint
+from DuckDB's metadata functions, without scanning any table. Row counts come
+from the storage statistics of duckdb_tables(); views (e.g. the tables of a
+snapshot) are counted instead.
+
+Column statistics (exact row count, and per column the null fraction,
+min/max and a HyperLogLog sketch of the distinct values) take one scan of a
+table and are computed on demand by table_stats.
+
+Both are kept in the result cache, so they are shared by reruns of the
+dashboard, the API and the utilities through config.CACHE_DIR, and report
+code can choose a strategy (e.g. sample or count exactly) from cardinalities
+without querying the database.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from modules.sketches import HLL_PRECISION, HyperLogLog, hll_registers_sql
+
+# Longest string or blob kept as a column's min/max; longer bounds are dropped
+MAX_BOUND_LENGTH = 256
+
+# Column types without an ordering usable for min/max
+UNORDERED_TYPE_PATTERN = re.compile(r"^(STRUCT|MAP|UNION)\b|\]$")
+
+
+@dataclass
+class ColumnInfo:
+    """A column of a table."""
+    name: str
+    type: str
+    nullable: bool = True
+    primary_key: bool = False
+
+
+@dataclass
+class TableInfo:
+    """A table or view of the database."""
+    name: str
+    columns: list = field(default_factory=list)
+    # Rows in storage; rows deleted since the last checkpoint may still be included
+    estimated_rows: int = None
+
+    @property
+    def column_names(self):
+        """Names of the table's columns, in order."""
+        return [column.name for column in self.columns]
+
+    @property
+    def primary_key(self):
+        """Name of the first primary key column, or None."""
+        return next((column.name for column in self.columns if column.primary_key), None)
+
+
+@dataclass
+class Catalog:
+    """Tables of a database version."""
+    fingerprint: str
+    duckdb_version: str
+    tables: dict = field(default_factory=dict)
+
+    def table_names(self):
+        """Names of all tables and views, in order."""
+        return list(self.tables)
+
+    def table(self, name):
+        """Get a table's TableInfo, or None if it does not exist."""
+        return self.tables.get(name)
+
+    def has_column(self, table, column):
+        """Check whether a table has a column."""
+        return table in self.tables and column in self.tables[table].column_names
+
+    def tables_with_column(self, column):
+        """Names of the tables that have a column."""
+        return [name for name, info in self.tables.items() if column in info.column_names]
+
+    def estimated_rows(self, table, default=None):
+        """Estimated row count of a table, without querying the database."""
+        info = self.tables.get(table)
+        return default if info is None or info.estimated_rows is None else info.estimated_rows
+
+
+@dataclass
+class ColumnStats:
+    """Statistics of a column's values."""
+    non_null: int = 0
+    null_fraction: float = 0.0
+    distinct: float = 0.0
+    min: object = None
+    max: object = None
+    sketch: HyperLogLog = None
+
+
+@dataclass
+class TableStats:
+    """Statistics of a table's columns."""
+    name: str
+    row_count: int = 0
+    columns: dict = field(default_factory=dict)
+
+
+def read_catalog(db):
+    """Read the catalog from the database's metadata.
+
+    Args:
+        db (DatabaseManager): Database manager
+
+    Returns:
+        Catalog: Tables and views of the main schema
+    """
+    columns = db.conn.execute("""
+        SELECT table_name, column_name, data_type, is_nullable
+        FROM duckdb_columns()
+        WHERE database_name = current_database() AND schema_name = 'main'
+        ORDER BY table_name, column_index
+    """).fetchall()
+    primary_keys = db.conn.execute("""
+        SELECT table_name, constraint_column_names
+        FROM duckdb_constraints()
+        WHERE database_name = current_database() AND schema_name = 'main'
+          AND constraint_type = 'PRIMARY KEY'
+    """).fetchall()
+    estimated_rows = dict(db.conn.execute("""
+        SELECT table_name, estimated_size
+        FROM duckdb_tables()
+        WHERE database_name = current_database() AND schema_name = 'main'
+    """).fetchall())
+
+    key_columns = {(table, column) for table, names in primary_keys for column in names}
+    tables = {}
+    for table, column, data_type, nullable in columns:
+        info = tables.setdefault(table, TableInfo(table))
+        info.columns.append(ColumnInfo(column, data_type, nullable, (table, column) in key_columns))
+
+    for table, info in tables.items():
+        if table in estimated_rows:
+            info.estimated_rows = estimated_rows[table]
+        else:
+            info.estimated_rows = db.conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+    return Catalog(
+        fingerprint=db.get_fingerprint(),
+        duckdb_version=db.conn.execute("SELECT version()").fetchone()[0],
+        tables=tables
+    )
+
+
+def get_catalog(db):
+    """Get the catalog of the current database version.
+
+    Args:
+        db (DatabaseManager): Database manager
+
+    Returns:
+        Catalog: Cached catalog, read again when the database changes
+    """
+    fingerprint = db.get_fingerprint()
+    return db.cache.get_or_compute('catalog', None, fingerprint, lambda: read_catalog(db))
+
+
+def _bound(value):
+    """Keep a min/max value unless it is a long string or blob."""
+    if isinstance(value, (str, bytes)) and len(value) > MAX_BOUND_LENGTH:
+        return None
+    return value
+
+
+def compute_table_stats(db, table, precision=HLL_PRECISION):
+    """Scan a table for the statistics of all its columns.
+
+    Args:
+        db (DatabaseManager): Database manager
+        table (str): Table name
+        precision (int): HyperLogLog precision of the distinct sketches
+
+    Returns:
+        TableStats: Table statistics
+    """
+    info = get_catalog(db).table(table)
+    if info is None:
+        raise KeyError(f"Unknown table: {table}")
+
+    aggregates = ['COUNT(*)']
+    for column in info.columns:
+        aggregates.append(f'COUNT("{column.name}")')
+        if UNORDERED_TYPE_PATTERN.search(column.type):
+            aggregates.append('NULL, NULL')
+        else:
+            aggregates.append(f'MIN("{column.name}"), MAX("{column.name}")')
+
+    conn = db.conn
+    row = conn.execute(f'SELECT {", ".join(aggregates)} FROM "{table}"').fetchone()
+    registers = conn.execute(hll_registers_sql(f'"{table}"', info.column_names, precision)).fetchdf()
+
+    row_count = row[0]
+    stats = TableStats(table, row_count)
+    for i, column in enumerate(info.columns):
+        non_null, minimum, maximum = row[1 + 3*i:4 + 3*i]
+        pairs = registers[registers['column_name'] == column.name]
+        sketch = HyperLogLog.from_registers(pairs['register'], pairs['rank'], precision)
+        stats.columns[column.name] = ColumnStats(
+            non_null=non_null,
+            null_fraction=1 - non_null / row_count if row_count else 0.0,
+            distinct=min(sketch.count(), non_null),
+            min=_bound(minimum),
+            max=_bound(maximum),
+            sketch=sketch
+        )
+    return stats
+
+
+def table_stats(db, table, precision=HLL_PRECISION):
+    """Get the column statistics of a table, scanning it once per database version.
+
+    Args:
+        db (DatabaseManager): Database manager
+        table (str): Table name
+        precision (int): HyperLogLog precision of the distinct sketches
+
+    Returns:
+        TableStats: Cached table statistics
+    """
+    return db.cache.get_or_compute(
+        'table_stats', (table, precision), db.get_fingerprint(),
+        lambda: compute_table_stats(db, table, precision)
+    )
+
+
+def catalog_stats(db, tables=None, precision=HLL_PRECISION):
+    """Get the column statistics of several tables, scanning them in parallel.
+
+    Args:
+        db (DatabaseManager): Database manager
+        tables (list, optional): Table names; all tables by default
+        precision (int): HyperLogLog precision of the distinct sketches
+
+    Returns:
+        tuple: (table name -> TableStats, table name -> error message)
+    """
+    tables = get_catalog(db).table_names() if tables is None else tables
+    return db.run_parallel({
+        table: (lambda table=table: table_stats(db, table, precision)) for table in tables
+    })
+
@@ -0,0 +1,147 @@
+"""
+Module for categorizing files by extension.
+
+The extension -> category mapping is defined once in config.FILE_CATEGORIES and
+used in two forms:
+
+- a lookup table in the derived database, joined in SQL so reports categorize
+  rows inside DuckDB
+- a pandas Categorical mapping for Series already loaded in memory, which maps
+  each distinct extension once and reuses the resulting codes for every row
+"""
+
+import hashlib
+
+import pandas as pd
+
+import config
+
+# Derived lookup table of (extension, category)
+EXTENSION_CATEGORIES_TABLE = "extensionCategories"
+
+
+def extension_category_map(categories=None):
+    """Flatten the category definition into an extension -> category dict.
+
+    Args:
+        categories (dict, optional): Category -> extensions mapping. Defaults
+            to config.FILE_CATEGORIES
+
+    Returns:
+        dict: Lowercase extension to category; the first category listing an
+            extension wins
+    """
+    categories = config.FILE_CATEGORIES if categories is None else categories
+    mapping = {}
+    for category, extensions in categories.items():
+        for ext in extensions:
+            mapping.setdefault(ext.lower().lstrip('.'), category)
+    return mapping
+
+
+def category_mapping_hash():
+    """Hash the extension -> category mapping.
+
+    Derived tables holding categories record it with their build (see
+    DatabaseManager.mark_derived_built), so they are rebuilt when
+    config.FILE_CATEGORIES changes.
+
+    Returns:
+        str: Hex digest of the mapping
+    """
+    mapping = sorted(extension_category_map().items())
+    return hashlib.md5(repr(mapping).encode()).hexdigest()
+
+
+def normalize_extension_sql(column):
+    """SQL expression normalizing an extension column the way the lookup is keyed."""
+    return f"lower(ltrim({column}, '.'))"
+
+
+def category_sql(db, column):
+    """Build a LEFT JOIN and category expression for an extension column.
+
+    Args:
+        db (DatabaseManager): Database manager
+        column (str): Qualified extension column in the outer query
+
+    Returns:
+        tuple: (join clause, category expression)
+    """
+    table = ensure_category_table(db)[0]
+    join = f"LEFT JOIN {table} ext_cat ON ext_cat.extension = {normalize_extension_sql(column)}"
+    expression = f"COALESCE(ext_cat.category, '{config.DEFAULT_FILE_CATEGORY}')"
+    return join, expression
+
+
+def ensure_category_table(db):
+    """Create or refresh the extension lookup table from the configuration.
+
+    Args:
+        db (DatabaseManager): Database manager
+
+    Returns:
+        tuple: (qualified table name, True if the table was (re)built)
+    """
+    table = db.derived_table(EXTENSION_CATEGORIES_TABLE)
+    mapping = pd.DataFrame(
+        sorted(extension_category_map().items()),
+        columns=['extension', 'category']
+    )
+
+    def is_current():
+        if not db.derived_table_exists(EXTENSION_CATEGORIES_TABLE):
+            return False
+        current = db.conn.execute(f"SELECT extension, category FROM {table} ORDER BY extension").fetchdf()
+        return current.reset_index(drop=True).equals(mapping)
+
+    if is_current():
+        return table, False
+
+    with db.build_lock:
+        # Another thread may have refreshed it while this one waited
+        if is_current():
+            return table, False
+
+        db.conn.register('extension_categories_df', mapping)
+        try:
+            db.conn.execute(f"""
+                CREATE OR REPLACE TABLE {table} AS
+                SELECT extension::VARCHAR AS extension, category::VARCHAR AS category
+                FROM extension_categories_df
+                ORDER BY extension
+            """)
+        finally:
+            db.conn.unregister('extension_categories_df')
+        return table, True
+
+
+def categorize_extensions(extensions):
+    """Categorize a Series of extensions in one vectorized pass.
+
+    Args:
+        extensions (Series): File extensions, with or without leading dots
+
+    Returns:
+        Series: Categorical Series of file categories aligned with the input
+    """
+    mapping = extension_category_map()
+    category_names = list(config.FILE_CATEGORIES) + [config.DEFAULT_FILE_CATEGORY]
+
+    # Map each distinct extension once, then broadcast through the codes
+    codes, uniques = pd.factorize(extensions, use_na_sentinel=True)
+    unique_categories = (
+        pd.Series(uniques, dtype='object').astype(str).str.lstrip('.').str.lower()
+        .map(mapping).fillna(config.DEFAULT_FILE_CATEGORY)
+    )
+    category_codes = pd.Categorical(unique_categories, categories=category_names).codes
+
+    default_code = category_names.index(config.DEFAULT_FILE_CATEGORY)
+    row_codes = category_codes[codes] if len(uniques) else codes.copy()
+    row_codes[codes < 0] = default_code
+
+    return pd.Series(
+        pd.Categorical.from_codes(row_codes, categories=category_names),
+        index=extensions.index,
+        name='category'
+    )
@@ -0,0 +1,138 @@
+"""
+Module for analyzing document classifications.
+
+Classifications are reached through instances.classificationId. All queries
+here read the denormalized instance fact table, so slicing by classification,
+folder and service is a single-table scan instead of a multi-way join.
+"""
+
+from modules.fact_tables import build_instance_facts
+
+
+def _where_clause(*conditions):
+    """Build a WHERE clause from optional conditions."""
+    conditions = [f"({condition})" for condition in conditions if condition]
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def classification_summary(db, where=None):
+    """Get instance counts and storage per classification.
+
+    Args:
+        db (DatabaseManager): Database manager
+        where (str, optional): SQL filter on the fact table (see modules.predicates)
+
+    Returns:
+        DataFrame: Classification key, instance count and total size
+    """
+    def compute():
+        facts_table = build_instance_facts(db)
+        return db.query(f"""
+            SELECT
+                classificationKey,
+                COUNT(*) AS instance_count,
+                SUM(size) AS total_size
+            FROM {facts_table}
+            {_where_clause(where)}
+            GROUP BY classificationKey
+            ORDER BY instance_count DESC
+        """)
+
+    return db.cache.get_or_compute('classification_summary', where, db.get_fingerprint(), compute)
+
+
+def classification_by_service(db, where=None):
+    """Get instance counts per classification and service.
+
+    Args:
+        db (DatabaseManager): Database manager
+        where (str, optional): SQL filter on the fact table (see modules.predicates)
+
+    Returns:
+        DataFrame: Classification key, service name, instance count and total size
+    """
+    def compute():
+        facts_table = build_instance_facts(db)
+        return db.query(f"""
+            SELECT
+                classificationKey,
+                COALESCE(serviceName, 'Unknown') AS service_name,
+                COUNT(*) AS instance_count,
+                SUM(size) AS total_size
+            FROM {facts_table}
+            {_where_clause(where)}
+            GROUP BY classificationKey, service_name
+            ORDER BY classificationKey, instance_count DESC
+        """)
+
+    return db.cache.get_or_compute('classification_by_service', where, db.get_fingerprint(), compute)
+
+
+def classification_by_extension(db, classification_key, limit=15, where=None):
+    """Get the most common extensions within a classification.
+
+    Args:
+        db (DatabaseManager): Database manager
+        classification_key (str): Classification to inspect
+        limit (int): Maximum number of extensions to return
+        where (str, optional): SQL filter on the fact table (see modules.predicates)
+
+    Returns:
+        DataFrame: Extension, instance count and total size
+    """
+    def compute():
+        facts_table = build_instance_facts(db)
+        return db.query(f"""
+            SELECT
+                extension,
+                COUNT(*) AS instance_count,
+                SUM(size) AS total_size
+            FROM {facts_table}
+            {_where_clause('classificationKey = $classification_key', where)}
+            GROUP BY extension
+            ORDER BY instance_count DESC
+            LIMIT {int(limit)}
+        """, {'classification_key': classification_key})
+
+    return db.cache.get_or_compute('classification_by_extension', (classification_key, limit, where), db.get_fingerprint(), compute)
+
+
+def classification_top_folders(db, classification_key, limit=10, where=None):
+    """Get the folders holding the most instances of a classification.
+
+    Folders are aggregated on the fact table first; only the resulting top
+    folder ids are joined to parentPaths for display.
+
+    Args:
+        db (DatabaseManager): Database manager
+        classification_key (str): Classification to inspect
+        limit (int): Maximum number of folders to return
+        where (str, optional): SQL filter on the fact table (see modules.predicates)
+
+    Returns:
+        DataFrame: Folder path, instance count and total size
+    """
+    def compute():
+        facts_table = build_instance_facts(db)
+        return db.query(f"""
+            WITH folder_totals AS (
+                SELECT
+                    parentId,
+                    COUNT(*) AS instance_count,
+                    SUM(size) AS total_size
+                FROM {facts_table}
+                {_where_clause('classificationKey = $classification_key', where)}
+                GROUP BY parentId
+                ORDER BY instance_count DESC
+                LIMIT {int(limit)}
+            )
+            SELECT
+                COALESCE(p.parentPath, 'Unknown') AS parentPath,
+                f.instance_count,
+                f.total_size
+            FROM folder_totals f
+            LEFT JOIN parentPaths p ON p.parentId = f.parentId
+            ORDER BY f.instance_count DESC
+        """, {'classification_key': classification_key})
+
+    return db.cache.get_or_compute('classification_top_folders', (classification_key, limit, where), db.get_fingerprint(), compute)
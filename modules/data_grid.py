@@ -0,0 +1,260 @@
+"""
+Module for paginated, server-side data grids.
+
+Listings that can reach millions of rows (e.g. the files of a folder) are
+never fetched whole. Sorting and filtering are pushed into the SQL query, and
+only the current page and a prefetched next page are kept per grid in the
+Streamlit session, so memory per session stays constant however large the
+listing is.
+
+Pages are read with keyset pagination when the previous page is known (the
+query continues after the last row of that page, which DuckDB can do without
+scanning the skipped rows); jumps to arbitrary pages fall back to
+LIMIT/OFFSET.
+"""
+
+import math
+
+import pandas as pd
+
+# Default number of rows per page
+DEFAULT_PAGE_SIZE = 50
+
+# Page sizes offered in the grid controls
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def _order_sql(sort_column, key_column, descending):
+    """Build the ORDER BY clause; the key column makes the order total."""
+    direction = "DESC" if descending else "ASC"
+    if sort_column == key_column:
+        return f"{key_column} {direction}"
+    return f"{sort_column} {direction} NULLS LAST, {key_column} ASC"
+
+
+def _after_sql(sort_column, key_column, descending, after):
+    """Build the keyset predicate selecting rows after a (sort value, key) position."""
+    sort_value, key_value = after
+    if sort_column == key_column:
+        return f"{key_column} {'<' if descending else '>'} $after_key"
+    if sort_value is None:
+        # NULL sort values come last and are ordered by key only
+        return f"({sort_column} IS NULL AND {key_column} > $after_key)"
+    comparison = '<' if descending else '>'
+    return (
+        f"({sort_column} {comparison} $after_sort OR {sort_column} IS NULL"
+        f" OR ({sort_column} = $after_sort AND {key_column} > $after_key))"
+    )
+
+
+def fetch_rows(db, source, key_column, sort_column=None, descending=False, where=None,
+               params=None, limit=DEFAULT_PAGE_SIZE, offset=0, after=None):
+    """Fetch a window of rows from a relation, sorted and filtered in SQL.
+
+    Args:
+        db (DatabaseManager): Database manager
+        source (str): Table, view or parenthesized subquery with an alias
+        key_column (str): Unique column used to break ties and for keyset paging
+        sort_column (str, optional): Column to sort by (defaults to the key)
+        descending (bool): Sort in descending order
+        where (list, optional): SQL filter conditions, combined with AND
+        params (dict, optional): Named parameters used by source and where
+        limit (int): Maximum number of rows
+        offset (int): Rows to skip (ignored if after is given)
+        after (tuple, optional): (sort value, key) of the row to continue after
+
+    Returns:
+        DataFrame: Requested rows
+    """
+    sort_column = sort_column or key_column
+    conditions = list(where or [])
+    params = dict(params or {})
+    if after is not None:
+        conditions.append(_after_sql(sort_column, key_column, descending, after))
+        params['after_key'] = after[1]
+        if sort_column != key_column and after[0] is not None:
+            params['after_sort'] = after[0]
+
+    sql = f"SELECT * FROM {source}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(f"({condition})" for condition in conditions)
+    sql += f" ORDER BY {_order_sql(sort_column, key_column, descending)} LIMIT {int(limit)}"
+    if after is None and offset:
+        sql += f" OFFSET {int(offset)}"
+    return db.query(sql, params or None)
+
+
+def count_rows(db, source, where=None, params=None):
+    """Count the rows of a relation matching the filters (cached per database version)."""
+    conditions = list(where or [])
+    sql = f"SELECT COUNT(*) AS count FROM {source}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(f"({condition})" for condition in conditions)
+    key = (sql, tuple(sorted((params or {}).items())))
+
+    def compute():
+        result = db.query(sql, params or None)
+        return int(result['count'].iloc[0]) if not result.empty else 0
+
+    return db.cache.get_or_compute('grid_count', key, db.get_fingerprint(), compute)
+
+
+def _python_value(value):
+    """Convert a pandas/numpy scalar to a value DuckDB accepts as a parameter."""
+    if pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _position(row, sort_column, key_column):
+    """Get the (sort value, key) position of a row for keyset paging."""
+    return _python_value(row[sort_column]), _python_value(row[key_column])
+
+
+def load_page(db, state, source, key_column, sort_column, descending, where, params, page, page_size):
+    """Get a page from the session state, fetching it (and the next page) if needed.
+
+    Only the requested page and the prefetched next page are kept in the
+    state; positions of visited page boundaries are kept for keyset paging.
+
+    Args:
+        db (DatabaseManager): Database manager
+        state (dict): Grid state from the Streamlit session
+        source (str): Relation to read
+        key_column (str): Unique key column
+        sort_column (str): Sort column
+        descending (bool): Sort in descending order
+        where (list): SQL filter conditions
+        params (dict): Named parameters
+        page (int): Zero-based page number
+        page_size (int): Rows per page
+
+    Returns:
+        DataFrame: Rows of the page
+    """
+    if page in state['pages']:
+        rows = state['pages'][page]
+        if page + 1 not in state['pages'] and len(rows) == page_size:
+            # Prefetch the next page after the current one
+            after = state['bookmarks'].get(page + 1)
+            state['pages'][page + 1] = fetch_rows(
+                db, source, key_column, sort_column, descending, where, params,
+                limit=page_size, offset=(page + 1) * page_size, after=after
+            )
+    else:
+        after = state['bookmarks'].get(page)
+        window = fetch_rows(
+            db, source, key_column, sort_column, descending, where, params,
+            limit=2 * page_size, offset=page * page_size, after=after
+        )
+        rows = window.iloc[:page_size].reset_index(drop=True)
+        state['pages'] = {page: rows, page + 1: window.iloc[page_size:].reset_index(drop=True)}
+
+    # Keep only the current and next page
+    state['pages'] = {number: frame for number, frame in state['pages'].items() if number in (page, page + 1)}
+
+    for number in (page, page + 1):
+        frame = state['pages'].get(number)
+        if frame is not None and len(frame) == page_size:
+            state['bookmarks'][number + 1] = _position(frame.iloc[-1], sort_column, key_column)
+    return rows
+
+
+def render_data_grid(db, grid_id, source, key_column, columns=None, default_sort=None,
+                     descending=False, where=None, params=None, page_size=DEFAULT_PAGE_SIZE,
+                     filter_columns=None, column_config=None):
+    """Render a paginated table whose rows are fetched page by page from DuckDB.
+
+    Args:
+        db (DatabaseManager): Database manager
+        grid_id (str): Unique identifier of the grid on the page
+        source (str): Table, view or parenthesized subquery with an alias
+        key_column (str): Unique key column of the source
+        columns (list, optional): Columns to display (and offer for sorting)
+        default_sort (str, optional): Initial sort column
+        descending (bool): Initial sort direction
+        where (list, optional): SQL filter conditions applied to the source
+        params (dict, optional): Named parameters used by source and where
+        page_size (int): Initial number of rows per page
+        filter_columns (list, optional): Columns offered for text filtering
+        column_config (dict, optional): Streamlit column configuration
+
+    Returns:
+        DataFrame: Rows of the displayed page
+    """
+    # Imported here so the paging functions above work without Streamlit
+    import streamlit as st
+
+    state_key = f"grid_{grid_id}"
+    sortable = columns or [key_column]
+
+    col1, col2, col3, col4 = st.columns([2, 1, 2, 1])
+    with col1:
+        sort_column = st.selectbox(
+            "Sort by", sortable,
+            index=sortable.index(default_sort) if default_sort in sortable else 0,
+            key=f"{state_key}_sort"
+        )
+    with col2:
+        descending = st.checkbox("Descending", value=descending, key=f"{state_key}_desc")
+    with col3:
+        filter_text = ""
+        filter_column = None
+        if filter_columns:
+            filter_column = st.selectbox("Filter column", filter_columns, key=f"{state_key}_filter_column")
+            filter_text = st.text_input("Contains", key=f"{state_key}_filter")
+    with col4:
+        page_size = st.selectbox(
+            "Rows per page", PAGE_SIZES,
+            index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 1,
+            key=f"{state_key}_page_size"
+        )
+
+    conditions = list(where or [])
+    query_params = dict(params or {})
+    if filter_text and filter_column:
+        conditions.append(f"CAST({filter_column} AS VARCHAR) ILIKE $grid_filter ESCAPE '\\'")
+        # The text is matched literally; % and _ are not wildcards
+        escaped = filter_text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query_params['grid_filter'] = f"%{escaped}%"
+
+    # Reset paging when the query or the database version changes; cached
+    # pages and keyset bookmarks are only valid for one version
+    signature = (db.get_fingerprint(), source, tuple(conditions), tuple(sorted(query_params.items())),
+                 sort_column, descending, page_size)
+    state = st.session_state.get(state_key)
+    if state is None or state['signature'] != signature:
+        state = {'signature': signature, 'page': 0, 'pages': {}, 'bookmarks': {0: None}}
+        st.session_state[state_key] = state
+
+    total = count_rows(db, source, conditions, query_params)
+    page_count = max(1, math.ceil(total / page_size))
+
+    nav1, nav2, nav3, nav4 = st.columns([1, 1, 2, 1])
+    with nav1:
+        if st.button("◀ Previous", key=f"{state_key}_prev", disabled=state['page'] == 0):
+            state['page'] -= 1
+    with nav2:
+        if st.button("Next ▶", key=f"{state_key}_next", disabled=state['page'] >= page_count - 1):
+            state['page'] += 1
+    with nav4:
+        jump = st.number_input("Page", min_value=1, max_value=page_count, value=state['page'] + 1,
+                               key=f"{state_key}_jump_{state['page']}")
+        if jump - 1 != state['page']:
+            state['page'] = int(jump) - 1
+
+    state['page'] = max(0, min(state['page'], page_count - 1))
+    rows = load_page(
+        db, state, source, key_column, sort_column, descending,
+        conditions, query_params, state['page'], page_size
+    )
+    with nav3:
+        first = state['page'] * page_size
+        st.markdown(f"Rows {first + 1 if len(rows) else 0:,}–{first + len(rows):,} of {total:,} "
+                    f"(page {state['page'] + 1:,} of {page_count:,})")
+
+    st.dataframe(rows[columns] if columns else rows, use_container_width=True,
+                 hide_index=True, column_config=column_config)
+    return rows
@@ -1,41 +1,288 @@
+import os
+import contextvars
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import duckdb
 import pandas as pd
-from datetime import datetime
+
+from modules.cache import QueryCache, note_query_failure
+from modules.catalog import get_catalog
+from modules.memory import LOAD_BATCH_SIZE, MemoryBudgetExceeded, current_budget, load_frame
+from modules.query_plan import exists_sql, scan_estimate
+from modules.snapshot import create_snapshot_views, read_manifest
+from modules.timestamps import valid_epoch_ms_sql
+
+
+# Name under which precomputed (derived) tables are attached
+DERIVED_SCHEMA = "derived"
+
+# Table recording the database fingerprint each derived table was built from
+DERIVED_BUILDS_TABLE = "derivedBuilds"
+
+# Threads running independent queries concurrently (see submit)
+QUERY_WORKERS = 6
+
+# Set in tasks on the query pool: failed queries raise instead of returning an empty frame
+_raise_query_errors = contextvars.ContextVar('raise_query_errors', default=False)
+
+
+def _run_task(task):
+    """Run a query pool task, with query errors raised to its future."""
+    _raise_query_errors.set(True)
+    return task()
 
 
 class DatabaseManager:
     """Class to manage database connections and queries."""
     
-    def __init__(self, db_path):
+    def __init__(self, db_path, derived_path=None, cache_dir=None, cache_ttl=None, snapshot_dir=None,
+                 read_only=False, query_workers=QUERY_WORKERS):
         """Initialize database connection.
         
         Args:
             db_path (str): Path to DuckDB database file
+            derived_path (str, optional): Path to a DuckDB file holding precomputed
+                tables. If None, precomputed tables are kept in memory.
+            cache_dir (str, optional): Directory for cached results, shared by
+                the processes reading the same database; each database (or
+                snapshot directory) gets its own subdirectory. If None,
+                results are only cached in memory.
+            cache_ttl (int, optional): Time to live of cached results in seconds
+            snapshot_dir (str, optional): Directory of a Parquet snapshot. If
+                set, tables are read from the snapshot and db_path is not opened.
+            read_only (bool): Open the database and the derived database
+                read-only, so several processes can share them. Derived
+                tables and views must have been built by a read-write
+                connection before.
+            query_workers (int): Threads of the query pool (see submit)
         """
         self.db_path = db_path
-        self.conn = None
+        self.derived_path = derived_path
+        self.snapshot_dir = snapshot_dir
+        self.read_only = read_only
+        self.snapshot = None
+        self.projection_stats = {}
+        if cache_dir:
+            # The cache prunes entries of other fingerprints, so processes on
+            # other databases must not share its directory
+            source = os.path.abspath(snapshot_dir or db_path)
+            cache_dir = os.path.join(cache_dir, hashlib.md5(source.encode()).hexdigest()[:12])
+        self.cache = QueryCache(cache_dir, cache_ttl)
+        self._conn = None
+        self._owner = None
+        self._local = threading.local()
+        self.query_workers = query_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # Serializes derived table builds; see is_derived_current
+        self.build_lock = threading.RLock()
         self.connect()
     
+    @property
+    def conn(self):
+        """Get the DuckDB connection for the calling thread.
+        
+        A DuckDB connection must not be used by several threads at once, so
+        every thread other than the one that connected gets its own cursor on
+        the same database. Cursors share the attached derived database, views
+        and DuckDB's buffer pool, and are closed when their thread exits.
+        """
+        if self._conn is None or threading.get_ident() == self._owner:
+            return self._conn
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None or self._local.base is not self._conn:
+            cursor = self._conn.cursor()
+            self._local.cursor, self._local.base = cursor, self._conn
+        return cursor
+    
+    @conn.setter
+    def conn(self, connection):
+        """Replace the connection; cursors of other threads are recreated on next use."""
+        self._conn = connection
+        self._owner = threading.get_ident()
+    
     def connect(self):
         """Connect to the DuckDB database."""
         try:
-            self.conn = duckdb.connect(self.db_path)
+            if self.snapshot_dir:
+                # Views over the Parquet snapshot; the collector's file stays unlocked
+                self.conn = duckdb.connect(":memory:")
+                self.snapshot = create_snapshot_views(self.conn, self.snapshot_dir)
+            else:
+                self.conn = duckdb.connect(self.db_path, read_only=self.read_only)
+            self.attach_derived()
             return True
         except Exception as e:
             print(f"Error connecting to database: {e}")
             return False
     
+    def attach_derived(self):
+        """Attach the database that holds precomputed tables.
+        
+        Precomputed tables (closures, rollups, indexes) are kept out of the
+        Aparavi database so the collector's schema is never modified.
+        """
+        options = ""
+        if self.derived_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.derived_path)), exist_ok=True)
+            target = self.derived_path.replace("'", "''")
+            if self.read_only:
+                # The views in the derived database were created by the read-write connection
+                options = " (READ_ONLY)"
+        else:
+            target = ":memory:"
+            if self.read_only:
+                # An in-memory database is writable even next to a read-only one
+                options = " (READ_WRITE)"
+        self.conn.execute(f"ATTACH IF NOT EXISTS '{target}' AS {DERIVED_SCHEMA}{options}")
+    
+    def derived_table(self, name):
+        """Get the qualified name of a precomputed table.
+        
+        Args:
+            name (str): Unqualified table name
+            
+        Returns:
+            str: Qualified table name
+        """
+        return f"{DERIVED_SCHEMA}.{name}"
+    
+    def derived_table_exists(self, name):
+        """Check whether a precomputed table exists.
+        
+        Args:
+            name (str): Unqualified table name
+            
+        Returns:
+            bool: True if the table exists
+        """
+        count = self.conn.execute(
+            "SELECT COUNT(*) FROM duckdb_tables() WHERE database_name = ? AND table_name = ?",
+            [DERIVED_SCHEMA, name]
+        ).fetchone()[0]
+        return count > 0
+    
+    def refresh_snapshot(self):
+        """Point the snapshot views at the newest snapshot version.
+        
+        Returns:
+            bool: True if the views were moved to a newer snapshot
+        """
+        manifest = read_manifest(self.snapshot_dir)
+        if manifest is None or manifest['version'] == self.snapshot['version']:
+            return False
+        with self.build_lock:
+            # Another thread may have moved the views while this one waited
+            if manifest['version'] == self.snapshot['version']:
+                return False
+            self.snapshot = create_snapshot_views(self.conn, self.snapshot_dir)
+        return True
+    
+    def get_fingerprint(self):
+        """Get a fingerprint identifying the current version of the database.
+        
+        The fingerprint changes whenever the database file (or its write-ahead
+        log) is modified, and is used to decide when derived tables and cached
+        results must be rebuilt. In snapshot mode it is the snapshot version,
+        and the views are moved to a newer snapshot when one has been written.
+        
+        Returns:
+            str: Database fingerprint
+        """
+        if self.snapshot:
+            self.refresh_snapshot()
+            return hashlib.md5(f"snapshot-{self.snapshot['version']}".encode()).hexdigest()
+        
+        parts = []
+        for path in (self.db_path, f"{self.db_path}.wal"):
+            try:
+                stat = os.stat(path)
+                parts.append(f"{stat.st_size}-{stat.st_mtime_ns}")
+            except OSError:
+                continue
+        
+        if not parts:
+            # In-memory database: fall back to the estimated size of each table
+            sizes = self.conn.execute("""
+                SELECT string_agg(table_name || ':' || estimated_size, ',' ORDER BY table_name)
+                FROM duckdb_tables()
+                WHERE database_name = current_database()
+            """).fetchone()[0]
+            parts.append(str(sizes))
+        
+        return hashlib.md5("|".join(parts).encode()).hexdigest()
+    
+    def _build_fingerprint(self, inputs=None):
+        """Combine the database fingerprint with a hash of other build inputs."""
+        fingerprint = self.get_fingerprint()
+        if inputs is None:
+            return fingerprint
+        return hashlib.md5(f"{fingerprint}|{inputs}".encode()).hexdigest()
+    
+    def is_derived_current(self, name, inputs=None):
+        """Check whether a derived table was built from the current database version.
+        
+        Every thread has its own cursor and transaction, so two threads
+        building the same derived table would conflict. Builders check
+        currency, then take build_lock and check again before building and
+        calling mark_derived_built:
+        
+            if not db.is_derived_current(name):
+                with db.build_lock:
+                    if not db.is_derived_current(name):
+                        ...  # CREATE OR REPLACE TABLE
+                        db.mark_derived_built(name)
+        
+        Args:
+            name (str): Unqualified derived table name
+            inputs (str, optional): Hash of other inputs the table was built
+                from (e.g. configuration), as passed to mark_derived_built
+            
+        Returns:
+            bool: True if the table exists and matches the current fingerprint
+                and inputs
+        """
+        if not self.derived_table_exists(name) or not self.derived_table_exists(DERIVED_BUILDS_TABLE):
+            return False
+        
+        row = self.conn.execute(
+            f"SELECT fingerprint FROM {self.derived_table(DERIVED_BUILDS_TABLE)} WHERE name = ?",
+            [name]
+        ).fetchone()
+        return row is not None and row[0] == self._build_fingerprint(inputs)
+    
+    def mark_derived_built(self, name, inputs=None):
+        """Record that a derived table was built from the current database version.
+        
+        Args:
+            name (str): Unqualified derived table name
+            inputs (str, optional): Hash of other inputs the table was built from
+        """
+        builds_table = self.derived_table(DERIVED_BUILDS_TABLE)
+        with self.build_lock:
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {builds_table} (
+                    name VARCHAR PRIMARY KEY,
+                    fingerprint VARCHAR,
+                    builtAt TIMESTAMP
+                )
+            """)
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {builds_table} VALUES (?, ?, current_timestamp)",
+                [name, self._build_fingerprint(inputs)]
+            )
+    
     def list_tables(self):
         """List all tables in the database.
         
         Returns:
-            list: List of table names
+            list: List of table names (from the catalog)
         """
         if not self.conn:
             return []
             
-        tables = self.conn.execute("SHOW TABLES").fetchall()
-        return [table[0] for table in tables]
+        return get_catalog(self).table_names()
     
     def get_table_schema(self, table_name):
         """Get schema for a specific table.
@@ -44,10 +291,19 @@ class DatabaseManager:
             table_name (str): Name of the table
             
         Returns:
-            DataFrame: Table schema
+            DataFrame: Table schema, with the columns of PRAGMA table_info
+                (from the catalog)
         """
-        schema = self.conn.execute(f"PRAGMA table_info('{table_name}')").fetchdf()
-        return schema
+        info = get_catalog(self).table(table_name)
+        columns = info.columns if info else []
+        return pd.DataFrame(
+            [
+                {'cid': i, 'name': column.name, 'type': column.type, 'notnull': not column.nullable,
+                 'dflt_value': None, 'pk': column.primary_key}
+                for i, column in enumerate(columns)
+            ],
+            columns=['cid', 'name', 'type', 'notnull', 'dflt_value', 'pk']
+        )
     
     def query(self, query_str, params=None):
         """Execute query and return pandas DataFrame.
@@ -56,19 +312,118 @@ class DatabaseManager:
             query_str (str): SQL query string
             params (dict, optional): Parameters for query
             
+        In memory-budget mode, the result is loaded within the budget of the
+        current session (see modules.memory.load_frame).
+        
         Returns:
-            pandas.DataFrame: Result of query
+            pandas.DataFrame: Result of query, or an empty frame if the query
+                failed (outside query pool tasks, see submit); results computed
+                from a failed query are not cached (see QueryCache.get_or_compute)
+            
+        Raises:
+            MemoryBudgetExceeded: If the result does not fit the session's budget
         """
         try:
-            if params:
-                result = self.conn.execute(query_str, params).fetchdf()
-            else:
-                result = self.conn.execute(query_str).fetchdf()
-            return result
+            cursor = self.conn.execute(query_str, params) if params else self.conn.execute(query_str)
+            budget = current_budget()
+            if budget is not None:
+                return load_frame(cursor.fetch_record_batch(LOAD_BATCH_SIZE), budget)
+            return cursor.fetchdf()
+        except MemoryBudgetExceeded:
+            raise
         except Exception as e:
+            if _raise_query_errors.get():
+                raise
+            note_query_failure(e)
             print(f"Error executing query: {e}")
             return pd.DataFrame()
     
+    def submit(self, task):
+        """Start a query on the query thread pool.
+        
+        The task runs on a pool thread with its own cursor, so DuckDB executes
+        it in parallel with the calling thread and other submitted queries.
+        Tasks must only read: derived tables they depend on should be built
+        before. They run in a copy of the caller's context, so their queries
+        are charged to the caller's memory budget. A query failing in a task
+        raises instead of returning an empty frame, so the failure reaches
+        the future (and run_parallel's errors or PageScheduler's warning).
+        
+        Args:
+            task (callable): Function without arguments
+            
+        Returns:
+            Future: Result of the task
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.query_workers, thread_name_prefix="duckdb-query")
+            return self._executor.submit(contextvars.copy_context().run, _run_task, task)
+    
+    def run_parallel(self, tasks):
+        """Run independent queries concurrently and wait for all of them.
+        
+        The total time approaches that of the slowest query (see submit).
+        
+        Args:
+            tasks (dict): Name -> function without arguments
+            
+        Returns:
+            tuple: (name -> result, name -> error message) with failed tasks
+                only in the errors
+        """
+        futures = {name: self.submit(task) for name, task in tasks.items()}
+        results, errors = {}, {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = str(e)
+        return results, errors
+    
+    def has_rows(self, table, where=None):
+        """Check whether a table has rows matching a filter without fetching them.
+        
+        Args:
+            table (str): Table or view name
+            where (str, optional): SQL filter
+            
+        Returns:
+            bool: True if at least one row matches
+        """
+        try:
+            return bool(self.conn.execute(exists_sql(table, where)).fetchone()[0])
+        except Exception as e:
+            if _raise_query_errors.get():
+                raise
+            note_query_failure(e)
+            print(f"Error executing query: {e}")
+            return False
+    
+    def select(self, spec, report=None):
+        """Run a query spec as a minimal projection.
+        
+        The estimated bytes read and avoided by the query's table scans are
+        recorded in projection_stats under the report name.
+        
+        Args:
+            spec (QuerySpec): Columns, aggregates and filters to fetch
+            report (str, optional): Name the scan statistics are recorded under
+            
+        Returns:
+            pandas.DataFrame: Result of query
+        """
+        sql = spec.to_sql()
+        try:
+            estimate = scan_estimate(self, sql)
+            self.projection_stats[report or spec.table] = {
+                'bytes_read': int(estimate['bytes_read'].sum()),
+                'bytes_avoided': int(estimate['bytes_avoided'].sum())
+            }
+        except Exception as e:
+            print(f"Error estimating scan size: {e}")
+        return self.query(sql)
+    
     def safe_query(self, query_str, fallback_query=None, params=None):
         """Execute query with a fallback option if the primary query fails.
         
@@ -82,13 +437,22 @@ class DatabaseManager:
         """
         try:
             return self.query(query_str, params)
+        except MemoryBudgetExceeded:
+            raise
         except Exception as e:
             print(f"Primary query failed: {e}")
-            if fallback_query:
-                try:
-                    return self.query(fallback_query, params)
-                except Exception as e:
-                    print(f"Fallback query also failed: {e}")
+            if not fallback_query:
+                if _raise_query_errors.get():
+                    raise
+                return pd.DataFrame()
+        try:
+            return self.query(fallback_query, params)
+        except MemoryBudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"Fallback query also failed: {e}")
+            if _raise_query_errors.get():
+                raise
             return pd.DataFrame()
     
     def get_version(self):
@@ -98,23 +462,26 @@ class DatabaseManager:
             str: DuckDB version
         """
         try:
-            version_info = self.conn.execute("SELECT version()").fetchone()[0]
-            return version_info
+            return get_catalog(self).duckdb_version
         except Exception as e:
             print(f"Error getting version: {e}")
             return "Unknown"
     
-    def get_row_count(self, table_name):
-        """Get row count for a table.
+    def get_row_count(self, table_name, where=None):
+        """Get row count for a table, counted once per database version.
         
         Args:
             table_name (str): Name of the table
+            where (str, optional): SQL filter (see modules.predicates)
             
         Returns:
             int: Number of rows in the table
         """
-        count = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-        return count
+        query = f"SELECT COUNT(*) FROM {table_name}" + (f" WHERE {where}" if where else "")
+        return self.cache.get_or_compute(
+            'row_count', (table_name, where), self.get_fingerprint(),
+            lambda: self.conn.execute(query).fetchone()[0]
+        )
     
     def get_object_stats(self):
         """Get statistics about objects in the database.
@@ -139,28 +506,31 @@ class DatabaseManager:
         """
         stats['extensions'] = self.query(ext_query)
         
-        # Creation time range
-        time_query = """
+        # Creation time range, converted once in SQL after aggregating
+        time_query = f"""
             SELECT 
-                MIN(createdAt) as min_time,
-                MAX(createdAt) as max_time
+                epoch_ms(MIN(createdAt)) as min_time,
+                epoch_ms(MAX(createdAt)) as max_time
             FROM objects
-            WHERE createdAt IS NOT NULL
+            WHERE {valid_epoch_ms_sql('createdAt')}
         """
         times = self.query(time_query)
-        if not times.empty:
-            stats['min_time'] = datetime.fromtimestamp(times['min_time'][0]/1000)
-            stats['max_time'] = datetime.fromtimestamp(times['max_time'][0]/1000)
+        if not times.empty and pd.notna(times['min_time'][0]):
+            stats['min_time'] = times['min_time'][0].to_pydatetime()
+            stats['max_time'] = times['max_time'][0].to_pydatetime()
         
         return stats
     
-    def get_storage_stats(self):
+    def get_storage_stats(self, where=None):
         """Get storage statistics.
         
+        Args:
+            where (str, optional): SQL filter on instances (see modules.predicates)
+        
         Returns:
             dict: Dictionary containing storage statistics
         """
-        size_query = """
+        size_query = f"""
             SELECT 
                 MIN(size) as min_size,
                 MAX(size) as max_size,
@@ -168,11 +538,13 @@ class DatabaseManager:
                 MEDIAN(size) as median_size,
                 SUM(size) as total_size
             FROM instances
-            WHERE size IS NOT NULL
+            WHERE size IS NOT NULL{f" AND ({where})" if where else ""}
         """
-        sizes = self.query(size_query)
+        sizes = self.cache.get_or_compute(
+            'storage_stats', where, self.get_fingerprint(), lambda: self.query(size_query)
+        )
         
-        if sizes.empty:
+        if sizes.empty or sizes['total_size'].isna().all():
             return {}
             
         stats = {
@@ -187,5 +559,8 @@ class DatabaseManager:
         
     def close(self):
         """Close the database connection."""
-        if self.conn:
-            self.conn.close()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._conn:
+            self._conn.close()
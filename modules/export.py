@@ -4,13 +4,15 @@ Module for exporting data in various formats.
 
 import pandas as pd
 import streamlit as st
-import json
 import base64
 from io import BytesIO
 import tempfile
 import os
 from datetime import datetime
 
+from modules.render_pool import RENDER_FORMATS, chart_spec, render_chart
+from modules.report_bundle import StaticReport, report_page_html
+
 def get_timestamp():
     """Get a formatted timestamp for filenames.
     
@@ -97,54 +99,62 @@ def export_dataframe(df, format_type='csv', filename=None):
     else:
         raise ValueError(f"Unsupported format: {format_type}")
         
-def export_chart(fig, filename=None, format_type='png'):
-    """Export a matplotlib figure.
+def export_chart(fig, filename=None, format_type='png', figsize=(10, 6), dpi=300):
+    """Export a chart as a static image.
+    
+    The figure is drawn by the render pool (see modules.render_pool), off the
+    script thread and without pyplot; identical charts are served from its
+    image cache.
     
     Args:
-        fig: Matplotlib figure to export
+        fig: Plotly figure from modules.visualizations, or a chart spec
         filename (str, optional): Filename to use. If None, generates one.
         format_type (str): Format type (png, pdf, svg)
+        figsize (tuple): Image size (width, height) in inches
+        dpi (int): Resolution
         
     Returns:
         str: HTML link for download
     """
     if filename is None:
         filename = f"chart_{get_timestamp()}.{format_type}"
-        
-    buf = BytesIO()
-    fig.savefig(buf, format=format_type, dpi=300, bbox_inches='tight')
-    buf.seek(0)
     
-    data = buf.getvalue()
+    spec = fig if isinstance(fig, dict) else chart_spec(fig, figsize)
+    data = render_chart(spec, format_type, dpi)
     b64 = base64.b64encode(data).decode()
     
-    mime_types = {
-        'png': 'image/png',
-        'pdf': 'application/pdf',
-        'svg': 'image/svg+xml'
-    }
-    
-    mime = mime_types.get(format_type, 'application/octet-stream')
+    mime = RENDER_FORMATS.get(format_type, 'application/octet-stream')
     href = f'<a href="data:{mime};base64,{b64}" download="{filename}">Download {filename}</a>'
     return href
 
-def export_report(report_data, format_type='pdf'):
-    """Export a complete report.
+def export_report(report_data, format_type='html'):
+    """Export a complete report as a standalone HTML page.
+    
+    The page embeds its charts as Plotly specs and plotly.js itself, so it
+    opens without the dashboard (see modules.report_bundle).
     
     Args:
-        report_data (dict): Report data including charts and tables
-        format_type (str): Format type (pdf, html)
+        report_data (dict): Report with 'title', optional 'description',
+            'metrics' (label -> value), 'charts' (Plotly figures) and
+            'tables' (name -> DataFrame)
+        format_type (str): Format type (html)
         
     Returns:
         str: HTML link for download
     """
-    # This is a placeholder for a more complex report generation feature
-    # Would typically use a library like ReportLab, WeasyPrint, or nbconvert
+    if format_type != 'html':
+        raise ValueError(f"Unsupported format: {format_type}")
     
-    filename = f"report_{get_timestamp()}.{format_type}"
+    filename = f"report_{get_timestamp()}.html"
+    report = StaticReport(
+        report_id='export',
+        title=report_data.get('title', 'Report'),
+        description=report_data.get('description', ''),
+        metrics={label: str(value) for label, value in report_data.get('metrics', {}).items()},
+        charts=list(report_data.get('charts', [])),
+        datasets=dict(report_data.get('tables', {}))
+    )
     
-    # For now, we'll just create a JSON export of the report data
-    json_data = json.dumps(report_data, default=str)
-    b64 = base64.b64encode(json_data.encode()).decode()
-    href = f'<a href="data:file/json;base64,{b64}" download="{filename}">Download Report Data</a>'
+    b64 = base64.b64encode(report_page_html(report).encode()).decode()
+    href = f'<a href="data:text/html;base64,{b64}" download="{filename}">Download {filename}</a>'
     return href
@@ -0,0 +1,68 @@
+"""
+Module for building denormalized fact tables used by the reports.
+
+Reports that slice instances by classification, folder, service or extension
+would otherwise join instances, objects, classifications and services on every
+rerun. The fact table resolves those joins once per database version and keeps
+only the columns the reports read, sorted so DuckDB's zone maps can skip row
+groups when a report filters on the leading sort columns. Time columns are
+stored as TIMESTAMP, with invalid epoch values nulled.
+"""
+
+from modules.categories import category_mapping_hash, category_sql
+from modules.timestamps import epoch_ms_sql
+
+# Derived table holding one row per instance
+INSTANCE_FACTS_TABLE = "instanceFacts"
+
+
+def build_instance_facts(db, force=False):
+    """Build the instance fact table if the database changed since the last build.
+
+    Args:
+        db (DatabaseManager): Database manager
+        force (bool): If True, rebuild even if the table is current
+
+    Returns:
+        str: Qualified name of the fact table
+    """
+    facts_table = db.derived_table(INSTANCE_FACTS_TABLE)
+
+    # The category column also depends on the category configuration
+    categories = category_mapping_hash()
+    if not force and db.is_derived_current(INSTANCE_FACTS_TABLE, categories):
+        return facts_table
+
+    with db.build_lock:
+        # Another thread may have built it while this one waited
+        if not force and db.is_derived_current(INSTANCE_FACTS_TABLE, categories):
+            return facts_table
+
+        category_join, category_expr = category_sql(db, 'o.extension')
+        db.conn.execute(f"""
+            CREATE OR REPLACE TABLE {facts_table} AS
+            SELECT
+                i.instanceId,
+                i.objectId,
+                COALESCE(c.classificationKey, 'Unclassified') AS classificationKey,
+                COALESCE(o.extension, 'No Extension') AS extension,
+                {category_expr} AS category,
+                i.serviceId,
+                s.name AS serviceName,
+                o.parentId,
+                i.size,
+                i.storeSize,
+                {epoch_ms_sql('i.createTime')} AS createTime,
+                {epoch_ms_sql('i.modifyTime')} AS modifyTime,
+                {epoch_ms_sql('i.accessTime')} AS accessTime,
+                {epoch_ms_sql('i.processTime')} AS processTime
+            FROM instances i
+            LEFT JOIN objects o ON o.objectId = i.objectId
+            LEFT JOIN classifications c ON c.classificationId = i.classificationId
+            LEFT JOIN services s ON s.serviceId = i.serviceId
+            {category_join}
+            ORDER BY classificationKey, o.parentId, i.serviceId
+        """)
+        db.mark_derived_built(INSTANCE_FACTS_TABLE, categories)
+        return facts_table
+
@@ -0,0 +1,74 @@
+"""
+Module for the dashboard's filter sidebar.
+
+The sidebar collects the service, extension category, folder subtree, time
+range, classification and tag filters into a FilterContext; the SQL predicates
+reports build from it are in modules.predicates.
+"""
+
+import streamlit as st
+
+import config
+from modules.predicates import FilterContext
+from modules.tag_analysis import tag_counts
+
+# Most used tags offered by the tag filter
+MAX_TAG_OPTIONS = 500
+
+
+def render_filter_sidebar(db):
+    """Render the global filter controls in the sidebar.
+
+    Args:
+        db (DatabaseManager): Database manager
+
+    Returns:
+        FilterContext: Selected filters
+    """
+    st.sidebar.markdown("## Filters")
+
+    services = db.query("SELECT serviceId, name FROM services ORDER BY name")
+    service_names = dict(zip(services['serviceId'], services['name'])) if not services.empty else {}
+    service_ids = st.sidebar.multiselect(
+        "Services", list(service_names),
+        format_func=lambda service_id: service_names.get(service_id, str(service_id))
+    )
+
+    categories = st.sidebar.multiselect(
+        "File categories", list(config.FILE_CATEGORIES) + [config.DEFAULT_FILE_CATEGORY]
+    )
+
+    classifications = db.query("SELECT DISTINCT classificationKey FROM classifications ORDER BY 1")
+    classification_keys = st.sidebar.multiselect(
+        "Classifications",
+        classifications['classificationKey'].tolist() if not classifications.empty else []
+    )
+
+    try:
+        tags = tag_counts(db, limit=MAX_TAG_OPTIONS)
+    except Exception as e:
+        # Databases without tag sets still get the other filters
+        print(f"Error loading tags: {e}")
+        tags = None
+    tag_filter = st.sidebar.multiselect(
+        "Tags", tags['tag'].tolist() if tags is not None and not tags.empty else []
+    )
+
+    path_prefix = st.sidebar.text_input("Folder (includes subfolders)", placeholder="/path/to/folder")
+
+    use_dates = st.sidebar.checkbox("Filter by creation date")
+    start = end = None
+    if use_dates:
+        date_range = st.sidebar.date_input("Created between", value=[])
+        if len(date_range) == 2:
+            start, end = date_range
+
+    return FilterContext(
+        service_ids=tuple(int(service_id) for service_id in service_ids),
+        categories=tuple(categories),
+        classification_keys=tuple(classification_keys),
+        tags=tuple(tag_filter),
+        path_prefix=path_prefix.strip() or None,
+        start=start,
+        end=end
+    )
@@ -6,38 +6,54 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import streamlit as st
 from datetime import datetime
 
-def process_folder_paths(df, path_column='parentPath'):
+from modules.predicates import build_folder_index
+
+def max_folder_depth(paths):
+    """Get the number of levels of the deepest folder path.
+    
+    Args:
+        paths (Series): Folder paths
+        
+    Returns:
+        int: Maximum path depth (0 if there are no paths)
+    """
+    if paths.empty:
+        return 0
+    return int(paths.str.strip('/').str.count('/').max()) + 1
+
+def process_folder_paths(df, path_column='parentPath', max_depth=None):
     """Process folder paths to extract hierarchy information.
     
+    Each path level is a categorical column: folder names repeat on many
+    rows, so a level stores a small code per row instead of a string, and no
+    per-row list of path parts is kept.
+    
     Args:
         df (DataFrame): DataFrame containing path data
         path_column (str): Column name containing path information
+        max_depth (int, optional): Only create the first max_depth level columns
         
     Returns:
-        DataFrame: Processed DataFrame with path hierarchy columns
+        tuple: (DataFrame with level_1..level_n hierarchy columns, maximum path depth)
     """
-    # Copy the dataframe to avoid modifying the original
-    result_df = df.copy()
-    
     # Clean up paths (remove leading/trailing slashes)
-    result_df['cleaned_path'] = result_df[path_column].str.strip('/')
-    
-    # Split paths into parts
-    result_df['path_parts'] = result_df['cleaned_path'].str.split('/')
+    cleaned_paths = df[path_column].str.strip('/')
     
     # Get maximum path depth
-    max_depth = result_df['path_parts'].apply(len).max()
+    detected_max_depth = max_folder_depth(df[path_column])
+    levels = detected_max_depth if max_depth is None else min(max_depth, detected_max_depth)
     
-    # Create columns for each path level
-    for i in range(max_depth):
-        result_df[f'level_{i+1}'] = result_df['path_parts'].apply(
-            lambda x: x[i] if i < len(x) else None
-        )
+    # Split only the levels needed; the rest of a path stays in one extra column
+    parts = cleaned_paths.str.split('/', n=levels, expand=True) if levels else None
     
-    return result_df, max_depth
+    # Copy the dataframe to avoid modifying the original
+    result_df = df.copy()
+    for i in range(levels):
+        result_df[f'level_{i+1}'] = parts[i].astype('category')
+    
+    return result_df, detected_max_depth
 
 def aggregate_by_folder(df, size_column='size', count_column=None, path_column='parentPath', max_depth=None):
     """Aggregate data by folder path to get size and count metrics.
@@ -53,7 +69,7 @@ def aggregate_by_folder(df, size_column='size', count_column=None, path_column='
         DataFrame: Aggregated data by folder
     """
     # Process paths
-    processed_df, detected_max_depth = process_folder_paths(df, path_column)
+    processed_df, detected_max_depth = process_folder_paths(df, path_column, max_depth)
     
     if max_depth is None or max_depth > detected_max_depth:
         max_depth = detected_max_depth
@@ -68,24 +84,24 @@ def aggregate_by_folder(df, size_column='size', count_column=None, path_column='
         if not all(col in processed_df.columns for col in group_cols):
             continue
             
-        # Group by the path levels
+        # Group by the path levels (only combinations of folders that exist)
         if count_column:
-            level_data = processed_df.groupby(group_cols).agg({
+            level_data = processed_df.groupby(group_cols, observed=True).agg({
                 size_column: 'sum',
                 count_column: 'sum'
             }).reset_index()
         else:
-            level_data = processed_df.groupby(group_cols).agg({
+            level_data = processed_df.groupby(group_cols, observed=True).agg({
                 size_column: 'sum',
                 path_column: 'count'  # Count rows as a proxy for file count
             }).reset_index()
             level_data.rename(columns={path_column: 'count'}, inplace=True)
         
-        # Create full path
-        level_data['full_path'] = level_data.apply(
-            lambda row: '/'.join([str(row[col]) for col in group_cols if pd.notna(row[col])]), 
-            axis=1
-        )
+        # Create full path (groups never have missing levels)
+        full_path = level_data[group_cols[0]].astype(str)
+        for col in group_cols[1:]:
+            full_path = full_path + '/' + level_data[col].astype(str)
+        level_data['full_path'] = full_path
         
         # Add depth level
         level_data['depth'] = depth
@@ -178,6 +194,41 @@ def find_top_folders(df, metric_column, n=10):
     """
     return df.sort_values(by=metric_column, ascending=False).head(n)
 
+def folder_rollup(db, depth=2, limit=50, where=None):
+    """Aggregate file counts and sizes per folder subtree in the database.
+    
+    Folder paths are cut to their first depth levels, so each row totals a
+    folder and everything below it.
+    
+    Args:
+        db (DatabaseManager): Database manager
+        depth (int): Number of path levels to group by
+        limit (int): Maximum number of folders, largest first
+        where (str, optional): SQL filter on the objects table (alias o)
+        
+    Returns:
+        DataFrame: folder, files and size per folder subtree
+    """
+    index_table = build_folder_index(db)
+    where_clause = f"WHERE {where}" if where else ""
+    
+    def compute():
+        return db.query(f"""
+            SELECT
+                rtrim(array_to_string(string_split(f.path, '/')[1:{int(depth) + 1}], '/'), '/') || '/' AS folder,
+                COUNT(*) AS files,
+                COALESCE(SUM(i.size), 0)::BIGINT AS size
+            FROM objects o
+            JOIN {index_table} f ON o.parentId = f.parentId
+            LEFT JOIN instances i ON o.objectId = i.objectId
+            {where_clause}
+            GROUP BY folder
+            ORDER BY size DESC, folder
+            LIMIT {int(limit)}
+        """)
+    
+    return db.cache.get_or_compute('folder_rollup', (depth, limit, where), db.get_fingerprint(), compute)
+
 def format_size(size_bytes):
     """Format size in bytes to human-readable format.
     
@@ -0,0 +1,238 @@
+"""
+Module for the folder browser.
+
+Opening a folder must not scan every object. Two derived tables, rebuilt once
+per database version, turn each click into a few range reads:
+
+- folderTree: one row per folder path, including intermediate folders without
+  files of their own, with the files and bytes directly in the folder and in
+  its whole subtree. Rows are sorted by parent path, so the children of a
+  folder are contiguous and DuckDB's zone maps skip the rest.
+- folderFiles: a projection of objects sorted by (parentId, size DESC), so the
+  largest files of a folder are the first rows of its block. Pages are read
+  with keyset pagination through modules.data_grid.
+
+Folder totals are precomputed over all objects; the sidebar filters apply to
+the file listing.
+"""
+
+from modules.predicates import build_folder_index, normalize_folder_path
+from modules.timestamps import epoch_ms_sql
+
+# Derived table of folders with direct and subtree totals, sorted by parent path
+FOLDER_TREE_TABLE = "folderTree"
+
+# Derived projection of objects sorted by (parentId, size DESC)
+FOLDER_FILES_TABLE = "folderFiles"
+
+# Columns of a folderTree row
+FOLDER_COLUMNS = ['path', 'parent', 'name', 'depth', 'parentIds', 'files', 'size',
+                  'subfolders', 'subtree_files', 'subtree_size']
+
+
+def build_folder_tree(db, force=False):
+    """Build the folder tree if the database changed since the last build.
+
+    Folder totals are summed per parentId in one pass over objects; subtree
+    totals then add each folder's totals to all its ancestor paths.
+
+    Args:
+        db (DatabaseManager): Database manager
+        force (bool): If True, rebuild even if the table is current
+
+    Returns:
+        str: Qualified name of the folder tree
+    """
+    tree_table = db.derived_table(FOLDER_TREE_TABLE)
+    if not force and db.is_derived_current(FOLDER_TREE_TABLE):
+        return tree_table
+
+    with db.build_lock:
+        # Another thread may have built it while this one waited
+        if not force and db.is_derived_current(FOLDER_TREE_TABLE):
+            return tree_table
+
+        index_table = build_folder_index(db)
+        db.conn.execute(f"""
+            CREATE OR REPLACE TABLE {tree_table} AS
+            WITH
+                object_totals AS (
+                    SELECT parentId, COUNT(*) AS files, COALESCE(SUM(primarySize), 0) AS size
+                    FROM objects
+                    GROUP BY parentId
+                ),
+                direct AS (
+                    SELECT
+                        f.path,
+                        list(f.parentId ORDER BY f.parentId) AS parentIds,
+                        COALESCE(SUM(t.files), 0)::BIGINT AS files,
+                        COALESCE(SUM(t.size), 0)::BIGINT AS size
+                    FROM {index_table} f
+                    LEFT JOIN object_totals t ON t.parentId = f.parentId
+                    GROUP BY f.path
+                ),
+                levels AS (
+                    SELECT string_split(path, '/') AS parts, unnest(range(1, len(string_split(path, '/')))) AS level,
+                           files, size
+                    FROM direct
+                ),
+                subtrees AS (
+                    SELECT
+                        array_to_string(parts[1:level], '/') || '/' AS path,
+                        SUM(files)::BIGINT AS subtree_files,
+                        SUM(size)::BIGINT AS subtree_size
+                    FROM levels
+                    GROUP BY ALL
+                ),
+                folders AS (
+                    SELECT
+                        s.path,
+                        NULLIF(regexp_replace(s.path, '[^/]*/$', ''), '') AS parent,
+                        COALESCE(NULLIF(regexp_extract(s.path, '([^/]*)/$', 1), ''), s.path) AS name,
+                        len(string_split(s.path, '/')) - 2 AS depth,
+                        COALESCE(d.parentIds, []) AS parentIds,
+                        COALESCE(d.files, 0) AS files,
+                        COALESCE(d.size, 0) AS size,
+                        s.subtree_files,
+                        s.subtree_size
+                    FROM subtrees s
+                    LEFT JOIN direct d ON d.path = s.path
+                ),
+                subfolders AS (
+                    SELECT parent AS path, COUNT(*) AS subfolders
+                    FROM folders
+                    WHERE parent IS NOT NULL
+                    GROUP BY parent
+                )
+            SELECT
+                f.path, f.parent, f.name, f.depth, f.parentIds, f.files, f.size,
+                COALESCE(c.subfolders, 0) AS subfolders,
+                f.subtree_files, f.subtree_size
+            FROM folders f
+            LEFT JOIN subfolders c ON c.path = f.path
+            ORDER BY f.parent NULLS FIRST, f.subtree_size DESC, f.path
+        """)
+        db.mark_derived_built(FOLDER_TREE_TABLE)
+        return tree_table
+
+
+def build_folder_files(db, force=False):
+    """Build the (parentId, size DESC) projection of objects if the database changed.
+
+    Args:
+        db (DatabaseManager): Database manager
+        force (bool): If True, rebuild even if the table is current
+
+    Returns:
+        str: Qualified name of the projection
+    """
+    files_table = db.derived_table(FOLDER_FILES_TABLE)
+    if not force and db.is_derived_current(FOLDER_FILES_TABLE):
+        return files_table
+
+    with db.build_lock:
+        # Another thread may have built it while this one waited
+        if not force and db.is_derived_current(FOLDER_FILES_TABLE):
+            return files_table
+
+        db.conn.execute(f"""
+            CREATE OR REPLACE TABLE {files_table} AS
+            SELECT objectId, parentId, name, extension, primarySize AS size, createdAt
+            FROM objects
+            WHERE parentId IS NOT NULL
+            ORDER BY parentId, size DESC NULLS LAST, objectId
+        """)
+        db.mark_derived_built(FOLDER_FILES_TABLE)
+        return files_table
+
+
+def breadcrumbs(path):
+    """Split a folder path into its ancestors.
+
+    Args:
+        path (str): Folder path, e.g. '/root/projects/'
+
+    Returns:
+        list: (name, path) from the root folder to the folder itself
+    """
+    if not path:
+        return []
+    parts = normalize_folder_path(path).split('/')[:-1]
+    crumbs = []
+    for level in range(1, len(parts) + 1):
+        prefix = '/'.join(parts[:level]) + '/'
+        crumbs.append((parts[level - 1] or prefix, prefix))
+    return crumbs
+
+
+def get_folder(db, path):
+    """Get a folder's row of the folder tree.
+
+    Args:
+        db (DatabaseManager): Database manager
+        path (str): Folder path
+
+    Returns:
+        dict: Folder row (see FOLDER_COLUMNS), or None if the folder does not exist
+    """
+    tree_table = build_folder_tree(db)
+    path = normalize_folder_path(path)
+
+    def compute():
+        row = db.conn.execute(
+            f"SELECT {', '.join(FOLDER_COLUMNS)} FROM {tree_table} WHERE path = $path",
+            {'path': path}
+        ).fetchone()
+        return dict(zip(FOLDER_COLUMNS, row)) if row else None
+
+    return db.cache.get_or_compute('folder', path, db.get_fingerprint(), compute)
+
+
+def children_source(db, path=None):
+    """Build the data grid source listing the subfolders of a folder.
+
+    Args:
+        db (DatabaseManager): Database manager
+        path (str, optional): Folder path; root folders if None
+
+    Returns:
+        tuple: (source, where conditions, params) for render_data_grid
+    """
+    tree_table = build_folder_tree(db)
+    source = f"""(
+        SELECT path, parent, name, subfolders, subtree_files, subtree_size, files, size
+        FROM {tree_table}
+    ) AS folder_children"""
+    if path is None:
+        return source, ["parent IS NULL"], {}
+    return source, ["parent = $folder_path"], {'folder_path': normalize_folder_path(path)}
+
+
+def files_source(db, folder, where=None):
+    """Build the data grid source listing the files directly in a folder.
+
+    The folder's parentIds are passed as constants, so the scan of the
+    projection only reads the row groups holding that folder.
+
+    Args:
+        db (DatabaseManager): Database manager
+        folder (dict): Folder row from get_folder
+        where (str, optional): SQL filter on object columns (see modules.predicates.object_where)
+
+    Returns:
+        tuple: (source, params) for render_data_grid
+    """
+    files_table = build_folder_files(db)
+    params = {f"parent_id_{i}": parent_id for i, parent_id in enumerate(folder['parentIds'])}
+    ids = ", ".join(f"${name}" for name in params) or "NULL"
+    source = f"""(
+        SELECT
+            objectId,
+            name,
+            extension,
+            size,
+            {epoch_ms_sql('createdAt')} AS created
+        FROM {files_table}
+        WHERE parentId IN ({ids}){f" AND ({where})" if where else ""}
+    ) AS folder_files"""
+    return source, params
@@ -0,0 +1,132 @@
+"""
+Module for computing size histograms in the database.
+
+Buckets are assigned inside DuckDB and only one row per bucket is returned,
+so histograms over millions of instances never pull raw sizes into pandas.
+Logarithmic buckets follow the same convention as sketches.LogHistogram:
+bucket 0 holds sizes below 1 byte and bucket k >= 1 holds [base**(k-1), base**k).
+Results are cached per database version and filter set.
+"""
+
+import pandas as pd
+
+from modules.visualizations import format_size_bytes
+
+# Size ranges shown on the overview and storage pages, as (label, lower bound)
+SIZE_RANGES = [
+    ('Under 1KB', 0),
+    ('1KB-1MB', 1024),
+    ('1MB-10MB', 1024*1024),
+    ('10MB-100MB', 1024*1024*10),
+    ('Over 100MB', 1024*1024*100)
+]
+
+# Supported bucket scales
+SCALES = ('log2', 'log10', 'custom')
+
+
+def _bucket_sql(column, scale, edges):
+    """Build the SQL expression assigning a bucket index to each size."""
+    if scale == 'log2':
+        return f"CASE WHEN {column} < 1 THEN 0 ELSE CAST(floor(log2({column})) AS INTEGER) + 1 END"
+    if scale == 'log10':
+        # The digit count of the integer size is exact, unlike floor(log10())
+        return f"CASE WHEN {column} < 1 THEN 0 ELSE length(CAST(CAST(floor({column}) AS BIGINT) AS VARCHAR)) END"
+
+    # Custom edges: bucket i holds [edges[i], edges[i + 1])
+    cases = " ".join(
+        f"WHEN {column} < {edge} THEN {i - 1}" for i, edge in enumerate(edges) if i > 0
+    )
+    return f"CASE {cases} ELSE {len(edges) - 1} END"
+
+
+def _bucket_bounds(scale, bucket, edges):
+    """Get the lower and upper bound of a bucket."""
+    if scale == 'custom':
+        lower = edges[bucket]
+        upper = edges[bucket + 1] if bucket + 1 < len(edges) else float('inf')
+        return lower, upper
+
+    base = 2 if scale == 'log2' else 10
+    if bucket == 0:
+        return 0, 1
+    return base ** (bucket - 1), base ** bucket
+
+
+def size_histogram(db, scale='log2', edges=None, labels=None, table='instances', column='size', where=None):
+    """Compute a size histogram in the database.
+
+    Args:
+        db (DatabaseManager): Database manager
+        scale (str): 'log2', 'log10' or 'custom'
+        edges (list, optional): Ascending lower bounds of the buckets, required
+            for the 'custom' scale; the last bucket is open-ended
+        labels (list, optional): Bucket labels for the 'custom' scale; by
+            default labels are built from the bounds
+        table (str): Table holding the sizes
+        column (str): Size column
+        where (str, optional): SQL filter applied to the table
+
+    Returns:
+        DataFrame: One row per non-empty bucket with bucket index, lower and
+            upper bound, size_range label, count and total_size, in bucket order
+    """
+    if scale not in SCALES:
+        raise ValueError(f"Unsupported histogram scale: {scale}")
+    if scale == 'custom' and not edges:
+        raise ValueError("Custom histograms require bucket edges")
+
+    edges = list(edges) if edges else None
+    labels = list(labels) if labels else None
+    key = (table, column, where, scale, tuple(edges or ()), tuple(labels or ()))
+
+    def compute():
+        conditions = [f"{column} IS NOT NULL"] + ([f"({where})"] if where else [])
+        counts = db.query(f"""
+            SELECT
+                {_bucket_sql(column, scale, edges)} AS bucket,
+                COUNT(*) AS count,
+                SUM({column})::BIGINT AS total_size
+            FROM {table}
+            WHERE {' AND '.join(conditions)}
+            GROUP BY bucket
+            ORDER BY bucket
+        """)
+        if counts.empty:
+            return pd.DataFrame(columns=['bucket', 'lower', 'upper', 'size_range', 'count', 'total_size'])
+
+        bounds = [_bucket_bounds(scale, bucket, edges) for bucket in counts['bucket']]
+        counts['lower'] = [lower for lower, _ in bounds]
+        counts['upper'] = [upper for _, upper in bounds]
+        if labels:
+            counts['size_range'] = [labels[bucket] for bucket in counts['bucket']]
+        else:
+            counts['size_range'] = [
+                f"{format_size_bytes(lower)} - {format_size_bytes(upper)}" if upper != float('inf')
+                else f"Over {format_size_bytes(lower)}"
+                for lower, upper in bounds
+            ]
+        return counts[['bucket', 'lower', 'upper', 'size_range', 'count', 'total_size']]
+
+    return db.cache.get_or_compute('size_histogram', key, db.get_fingerprint(), compute)
+
+
+def size_range_distribution(db, table='instances', column='size', where=None):
+    """Get counts for the standard size ranges (Under 1KB ... Over 100MB).
+
+    Args:
+        db (DatabaseManager): Database manager
+        table (str): Table holding the sizes
+        column (str): Size column
+        where (str, optional): SQL filter applied to the table
+
+    Returns:
+        DataFrame: size_range and count, in range order
+    """
+    histogram = size_histogram(
+        db, scale='custom',
+        edges=[lower for _, lower in SIZE_RANGES],
+        labels=[label for label, _ in SIZE_RANGES],
+        table=table, column=column, where=where
+    )
+    return histogram[['size_range', 'count']].reset_index(drop=True)
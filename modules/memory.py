@@ -0,0 +1,219 @@
+"""
+Module for the memory budget of dashboard sessions.
+
+All Streamlit sessions share one process, so a single session loading a huge
+result can get the whole dashboard OOM-killed. In memory-budget mode
+(config.MEMORY_BUDGET_MB), each script run of a session gets a MemoryBudget
+and DatabaseManager.query loads its results through load_frame:
+
+- results are streamed as Arrow record batches, so a result larger than the
+  remaining budget is never materialized in full
+- when the budget would be exceeded, the rows are either sampled uniformly
+  until they fit (the frame's attrs record the sample) or the query is
+  refused with MemoryBudgetExceeded, depending on config.MEMORY_BUDGET_ACTION
+- frames are compacted before conversion to pandas: exact floats are narrowed
+  to float32 and low-cardinality strings are dictionary-encoded, which pandas
+  turns into categoricals; integers keep int64, since element-wise arithmetic
+  on narrower integers (e.g. sizes times counts) wraps around silently
+
+The budget of the current run is kept in a context variable, so queries run
+on the query thread pool (DatabaseManager.submit) are charged to the session
+that started them.
+"""
+
+import contextvars
+import threading
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Rows per Arrow batch when loading a result within a budget
+LOAD_BATCH_SIZE = 100_000
+
+# Strings are dictionary-encoded when at most this fraction of the rows are distinct
+DICTIONARY_MAX_RATIO = 0.5
+
+# Results with fewer rows are not compacted; small frames gain nothing
+COMPACT_MIN_ROWS = 1000
+
+# Actions when a result does not fit the remaining budget
+BUDGET_ACTIONS = ('sample', 'refuse')
+
+# Budget of the current script run (None outside memory-budget mode)
+_current_budget = contextvars.ContextVar('memory_budget', default=None)
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """A result does not fit the remaining memory budget of the session."""
+
+
+class MemoryBudget:
+    """Memory allowed to the DataFrames of one session's script run."""
+
+    def __init__(self, limit_bytes, action='sample'):
+        """Initialize the budget.
+
+        Args:
+            limit_bytes (int): Bytes the session's frames may use
+            action (str): 'sample' to keep a uniform sample of results that do
+                not fit, 'refuse' to raise MemoryBudgetExceeded instead
+        """
+        if action not in BUDGET_ACTIONS:
+            raise ValueError(f"Unknown memory budget action: {action}")
+        self.limit_bytes = int(limit_bytes)
+        self.action = action
+        self.used_bytes = 0
+        self.loads = []
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        """Bytes left in the budget."""
+        return max(self.limit_bytes - self.used_bytes, 0)
+
+    def charge(self, nbytes, rows, total_rows):
+        """Record a loaded frame.
+
+        Args:
+            nbytes (int): Memory used by the frame
+            rows (int): Rows kept
+            total_rows (int): Rows of the result
+        """
+        with self._lock:
+            self.used_bytes += nbytes
+            self.loads.append({'bytes': nbytes, 'rows': rows, 'total_rows': total_rows})
+
+    @property
+    def sampled_loads(self):
+        """Number of results that were sampled to fit the budget."""
+        return sum(1 for load in self.loads if load['rows'] < load['total_rows'])
+
+
+def start_budget(limit_mb, action='sample'):
+    """Start a new budget for the current script run.
+
+    Args:
+        limit_mb (float): Budget in megabytes, or None to disable budget mode
+        action (str): See MemoryBudget
+
+    Returns:
+        MemoryBudget: The budget, or None if budget mode is disabled
+    """
+    budget = MemoryBudget(limit_mb * 1024 * 1024, action) if limit_mb else None
+    _current_budget.set(budget)
+    return budget
+
+
+def current_budget():
+    """Get the budget of the current script run, or None."""
+    return _current_budget.get()
+
+
+def _megabytes(nbytes):
+    """Format a size in megabytes for messages."""
+    return f"{nbytes / 1024 / 1024:.1f} MB"
+
+
+def frame_bytes(df):
+    """Memory used by a DataFrame, including the strings of object columns."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def is_sample(value):
+    """Check whether a value is a frame sampled to fit a memory budget."""
+    return 'sample' in getattr(value, 'attrs', {})
+
+
+def _compact_column(column):
+    """Narrow one Arrow column to a smaller type that keeps its values."""
+    column_type = column.type
+    if pa.types.is_decimal(column_type):
+        # DuckDB exports SUM(BIGINT) as HUGEINT decimals; fetchdf returns floats
+        return column.cast(pa.float64())
+    if pa.types.is_float64(column_type):
+        narrowed = column.cast(pa.float32())
+        if pc.all(pc.equal(narrowed.cast(pa.float64()), column)).as_py() is not False:
+            return narrowed
+        return column
+    if pa.types.is_string(column_type) or pa.types.is_large_string(column_type):
+        if pc.count_distinct(column).as_py() <= len(column) * DICTIONARY_MAX_RATIO:
+            return column.dictionary_encode()
+    return column
+
+
+def compact_table(table):
+    """Narrow the columns of an Arrow table to smaller types.
+
+    Args:
+        table (pyarrow.Table): Query result
+
+    Returns:
+        pyarrow.Table: Table with the same values in smaller types
+    """
+    if table.num_rows < COMPACT_MIN_ROWS:
+        # Keep the types fetchdf would return (see _compact_column)
+        columns = [column.cast(pa.float64()) if pa.types.is_decimal(column.type) else column
+                   for column in table.columns]
+    else:
+        columns = [_compact_column(column.combine_chunks()) for column in table.columns]
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+
+def _thin(batches, fraction, rng):
+    """Keep each row of the batches with a probability."""
+    return [batch.filter(rng.random(batch.num_rows) < fraction) for batch in batches]
+
+
+def load_frame(reader, budget, rng=None):
+    """Load a query result within a memory budget.
+
+    Batches are read until the result would exceed the remaining budget. With
+    the 'sample' action, the rows read so far are then halved at random and
+    later batches are read at the same sampling rate, as often as needed, so
+    every row ends up in the frame with the same probability. The sizes
+    checked while reading are Arrow sizes; the frame is charged what it uses
+    once converted to pandas.
+
+    Args:
+        reader (pyarrow.RecordBatchReader): Result of a DuckDB query
+        budget (MemoryBudget): Budget of the session
+        rng (numpy.random.Generator, optional): Random generator for sampling
+
+    Returns:
+        pandas.DataFrame: Compacted result; attrs['sample'] holds the rows
+            kept and the rows of the result if it was sampled
+
+    Raises:
+        MemoryBudgetExceeded: If the budget is used up, or the result does
+            not fit and the action is 'refuse'
+    """
+    remaining = budget.remaining()
+    if remaining == 0:
+        raise MemoryBudgetExceeded(
+            f"The session's memory budget of {_megabytes(budget.limit_bytes)} is used up"
+        )
+
+    rng = rng or np.random.default_rng()
+    batches, nbytes, total_rows, fraction = [], 0, 0, 1.0
+    for batch in reader:
+        total_rows += batch.num_rows
+        if fraction < 1.0:
+            batch = _thin([batch], fraction, rng)[0]
+        batches.append(batch)
+        nbytes += batch.nbytes
+        while nbytes > remaining and any(batch.num_rows for batch in batches):
+            if budget.action == 'refuse':
+                raise MemoryBudgetExceeded(
+                    f"The result needs more than {_megabytes(remaining)}, "
+                    f"the memory left of the session's {_megabytes(budget.limit_bytes)} budget"
+                )
+            batches = _thin(batches, 0.5, rng)
+            fraction /= 2
+            nbytes = sum(batch.nbytes for batch in batches)
+
+    table = compact_table(pa.Table.from_batches(batches, schema=reader.schema))
+    df = table.to_pandas()
+    if table.num_rows < total_rows:
+        df.attrs['sample'] = {'rows': table.num_rows, 'total_rows': total_rows}
+    budget.charge(frame_bytes(df), table.num_rows, total_rows)
+    return df
@@ -0,0 +1,391 @@
+"""
+Module for analyzing system messages.
+
+messages.message can hold millions of log lines, and instances/objects refer to
+them through messageIds strings. This module precomputes three derived tables:
+
+- an inverted index of (term, messageId) pairs, sorted by term so a search only
+  touches the row groups holding the searched terms
+- the message -> object/instance linkage, exploded from messageIds once
+- daily message counts, from which coarser time histograms are rolled up
+"""
+
+import re
+
+import pandas as pd
+
+from modules.timestamps import epoch_ms_sql, valid_epoch_ms_sql
+
+# Derived tables maintained by this module
+MESSAGE_TERMS_TABLE = "messageTerms"
+MESSAGE_LINKS_TABLE = "messageLinks"
+MESSAGE_DAILY_TABLE = "messageDailyCounts"
+MESSAGE_INDEX_STATE_TABLE = "messageTermsState"
+
+# Checksum of the indexed messages, checked before the index is extended
+_INDEX_CHECKSUM = "COALESCE(SUM(hash(messageId, message)), 0)::HUGEINT"
+
+# Messages are tokenized on anything that is not a letter or digit
+TOKEN_PATTERN = r'[^a-z0-9]+'
+
+# Shortest and longest terms kept in the index
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+
+# Number of messageIds probed by the first search round (doubles each round)
+SEARCH_WINDOW = 1_000_000
+
+
+def tokenize(text):
+    """Split text into index terms the same way the index is built.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list: Unique terms in order of appearance
+    """
+    terms = []
+    for term in re.split(TOKEN_PATTERN, (text or '').lower()):
+        if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def build_message_index(db, force=False):
+    """Build or extend the inverted index over message text.
+
+    Messages are append-only, so only messages newer than the indexed
+    messageId watermark are tokenized on refresh. The index state records the
+    number of indexed messages and a checksum of their ids and text; if the
+    messages up to the watermark no longer match it, the index is rebuilt
+    from scratch.
+
+    Args:
+        db (DatabaseManager): Database manager
+        force (bool): If True, rebuild the index from scratch
+
+    Returns:
+        int: Number of messages indexed by this call
+    """
+    if not force and db.is_derived_current(MESSAGE_TERMS_TABLE) and db.derived_table_exists(MESSAGE_INDEX_STATE_TABLE):
+        return 0
+
+    terms_table = db.derived_table(MESSAGE_TERMS_TABLE)
+    state_table = db.derived_table(MESSAGE_INDEX_STATE_TABLE)
+
+    # The index is extended in place; one thread at a time
+    with db.build_lock:
+        conn = db.conn
+        watermark, indexed, checksum = None, 0, 0
+        if not force and db.derived_table_exists(MESSAGE_TERMS_TABLE) and db.derived_table_exists(MESSAGE_INDEX_STATE_TABLE):
+            # Another thread may have refreshed it while this one waited
+            if db.is_derived_current(MESSAGE_TERMS_TABLE):
+                return 0
+            watermark, indexed, checksum = conn.execute(
+                f"SELECT watermark, message_count, checksum FROM {state_table}"
+            ).fetchone()
+            current = conn.execute(f"""
+                SELECT COUNT(*), {_INDEX_CHECKSUM}
+                FROM messages
+                WHERE messageId <= $watermark
+            """, {'watermark': watermark}).fetchone()
+            if current != (indexed, checksum):
+                # Messages below the watermark changed: rebuild
+                watermark, indexed, checksum = None, 0, 0
+
+        if watermark is None:
+            where_clause, params = "", {}
+        else:
+            where_clause, params = "WHERE messageId > $watermark", {'watermark': watermark}
+
+        new_messages, new_watermark, new_checksum = conn.execute(
+            f"SELECT COUNT(*), MAX(messageId), {_INDEX_CHECKSUM} FROM messages {where_clause}", params
+        ).fetchone()
+
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            if watermark is None:
+                conn.execute(f"""
+                    CREATE OR REPLACE TABLE {terms_table} (
+                        term VARCHAR,
+                        messageId BIGINT
+                    )
+                """)
+            if new_messages > 0:
+                conn.execute(f"""
+                    INSERT INTO {terms_table}
+                    SELECT DISTINCT term, messageId
+                    FROM (
+                        SELECT
+                            messageId,
+                            UNNEST(string_split_regex(lower(message), '{TOKEN_PATTERN}')) AS term
+                        FROM messages
+                        {where_clause}
+                    )
+                    WHERE length(term) BETWEEN {MIN_TERM_LENGTH} AND {MAX_TERM_LENGTH}
+                    ORDER BY term, messageId
+                """, params)
+                watermark = new_watermark
+
+            conn.execute(f"""
+                CREATE OR REPLACE TABLE {state_table} AS
+                SELECT
+                    $watermark::BIGINT AS watermark,
+                    $count::BIGINT AS message_count,
+                    $checksum::HUGEINT AS checksum
+            """, {
+                'watermark': watermark if watermark is not None else -1,
+                'count': indexed + new_messages,
+                'checksum': checksum + new_checksum,
+            })
+            db.mark_derived_built(MESSAGE_TERMS_TABLE)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return new_messages
+
+
+def build_message_links(db, force=False):
+    """Explode instances/objects messageIds into a message linkage table.
+
+    Args:
+        db (DatabaseManager): Database manager
+        force (bool): If True, rebuild even if the table is current
+
+    Returns:
+        str: Qualified name of the linkage table
+    """
+    links_table = db.derived_table(MESSAGE_LINKS_TABLE)
+    if not force and db.is_derived_current(MESSAGE_LINKS_TABLE):
+        return links_table
+
+    with db.build_lock:
+        # Another thread may have built it while this one waited
+        if not force and db.is_derived_current(MESSAGE_LINKS_TABLE):
+            return links_table
+
+        db.conn.execute(f"""
+            CREATE OR REPLACE TABLE {links_table} AS
+            SELECT
+                CAST(message_id AS BIGINT) AS messageId,
+                objectId,
+                instanceId
+            FROM (
+                SELECT
+                    objectId,
+                    instanceId,
+                    UNNEST(regexp_extract_all(messageIds, '[0-9]+')) AS message_id
+                FROM instances
+                WHERE messageIds IS NOT NULL AND messageIds NOT IN ('', '[]')
+                UNION ALL
+                SELECT
+                    objectId,
+                    NULL::BIGINT AS instanceId,
+                    UNNEST(regexp_extract_all(messageIds, '[0-9]+')) AS message_id
+                FROM objects
+                WHERE messageIds IS NOT NULL AND messageIds NOT IN ('', '[]')
+            )
+            ORDER BY messageId
+        """)
+        db.mark_derived_built(MESSAGE_LINKS_TABLE)
+        return links_table
+
+
+def build_message_daily_counts(db, force=False):
+    """Roll messages up into per-day counts.
+
+    Args:
+        db (DatabaseManager): Database manager
+        force (bool): If True, rebuild even if the table is current
+
+    Returns:
+        str: Qualified name of the daily counts table
+    """
+    daily_table = db.derived_table(MESSAGE_DAILY_TABLE)
+    if not force and db.is_derived_current(MESSAGE_DAILY_TABLE):
+        return daily_table
+
+    with db.build_lock:
+        # Another thread may have built it while this one waited
+        if not force and db.is_derived_current(MESSAGE_DAILY_TABLE):
+            return daily_table
+
+        db.conn.execute(f"""
+            CREATE OR REPLACE TABLE {daily_table} AS
+            SELECT
+                CAST(epoch_ms(messageTime) AS DATE) AS day,
+                COUNT(*) AS message_count
+            FROM messages
+            WHERE {valid_epoch_ms_sql('messageTime')}
+            GROUP BY day
+            ORDER BY day
+        """)
+        db.mark_derived_built(MESSAGE_DAILY_TABLE)
+        return daily_table
+
+
+def refresh_message_tables(db, force=False):
+    """Refresh all derived message tables.
+
+    Args:
+        db (DatabaseManager): Database manager
+        force (bool): If True, rebuild everything from scratch
+    """
+    build_message_index(db, force)
+    build_message_links(db, force)
+    build_message_daily_counts(db, force)
+
+
+def message_time_histogram(db, granularity='day'):
+    """Get message counts per period from the daily rollup.
+
+    Args:
+        db (DatabaseManager): Database manager
+        granularity (str): 'day', 'week' or 'month'
+
+    Returns:
+        DataFrame: Period start and message count
+    """
+    if granularity not in ('day', 'week', 'month'):
+        raise ValueError(f"Unsupported granularity: {granularity}")
+
+    daily_table = build_message_daily_counts(db)
+    return db.query(f"""
+        SELECT
+            DATE_TRUNC('{granularity}', day) AS period,
+            SUM(message_count) AS message_count
+        FROM {daily_table}
+        GROUP BY period
+        ORDER BY period
+    """)
+
+
+def search_messages(db, text, phrase=True, limit=100):
+    """Search messages for all terms of a query using the inverted index.
+
+    The index is probed in messageId windows, newest first, doubling the window
+    each round until enough matches are found. Because the index is sorted by
+    (term, messageId) and messages by messageId, each round only reads the row
+    groups of the searched terms within the window.
+
+    Args:
+        db (DatabaseManager): Database manager
+        text (str): Search text
+        phrase (bool): If True, only return messages containing the exact text
+        limit (int): Maximum number of messages to return
+
+    Returns:
+        DataFrame: Matching messages, newest first, with time, text and number
+            of linked objects
+    """
+    columns = ['messageId', 'messageTime', 'message', 'linked_objects']
+    terms = tokenize(text)
+    if not terms:
+        return pd.DataFrame(columns=columns)
+
+    build_message_index(db)
+    links_table = build_message_links(db)
+    terms_table = db.derived_table(MESSAGE_TERMS_TABLE)
+
+    params = {f"term_{i}": term for i, term in enumerate(terms)}
+    term_list = ", ".join(f"${name}" for name in params)
+
+    phrase_clause = ""
+    if phrase:
+        phrase_clause = "AND contains(lower(m.message), $phrase)"
+        params['phrase'] = text.strip().lower()
+
+    id_range = db.conn.execute(f"SELECT MIN(messageId), MAX(messageId) FROM {terms_table}").fetchone()
+    if id_range[0] is None:
+        return pd.DataFrame(columns=columns)
+
+    min_id, high = id_range
+    window = SEARCH_WINDOW
+    chunks = []
+    found = 0
+
+    while high >= min_id and found < limit:
+        low = max(min_id, high - window + 1)
+        chunk = db.query(f"""
+            WITH matches AS (
+                SELECT messageId
+                FROM {terms_table}
+                WHERE term IN ({term_list})
+                  AND messageId BETWEEN $low AND $high
+                GROUP BY messageId
+                HAVING COUNT(*) = {len(terms)}
+            )
+            SELECT
+                m.messageId,
+                m.messageTime,
+                m.message
+            FROM messages m
+            JOIN matches USING (messageId)
+            WHERE m.messageId BETWEEN $low AND $high
+              {phrase_clause}
+            ORDER BY m.messageId DESC
+            LIMIT {int(limit - found)}
+        """, {**params, 'low': low, 'high': high})
+
+        if not chunk.empty:
+            chunks.append(chunk)
+            found += len(chunk)
+
+        high = low - 1
+        window *= 2
+
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+
+    matched = pd.concat(chunks, ignore_index=True)
+    db.conn.register('matched_messages_df', matched)
+    try:
+        return db.query(f"""
+            SELECT
+                mm.messageId,
+                {epoch_ms_sql('mm.messageTime')} AS messageTime,
+                mm.message,
+                COUNT(DISTINCT l.objectId) AS linked_objects
+            FROM matched_messages_df mm
+            LEFT JOIN {links_table} l ON l.messageId = mm.messageId
+            GROUP BY mm.messageId, mm.messageTime, mm.message
+            ORDER BY mm.messageId DESC
+        """)
+    finally:
+        db.conn.unregister('matched_messages_df')
+
+
+def most_linked_messages(db, limit=20):
+    """Get the messages linked to the most objects.
+
+    Args:
+        db (DatabaseManager): Database manager
+        limit (int): Maximum number of messages to return
+
+    Returns:
+        DataFrame: Message id, text, linked object and instance counts
+    """
+    links_table = build_message_links(db)
+    return db.query(f"""
+        WITH top_links AS (
+            SELECT
+                messageId,
+                COUNT(DISTINCT objectId) AS linked_objects,
+                COUNT(instanceId) AS linked_instances
+            FROM {links_table}
+            GROUP BY messageId
+            ORDER BY linked_objects DESC
+            LIMIT {int(limit)}
+        )
+        SELECT
+            t.messageId,
+            m.message,
+            t.linked_objects,
+            t.linked_instances
+        FROM top_links t
+        LEFT JOIN messages m ON m.messageId = t.messageId
+        ORDER BY t.linked_objects DESC
+    """)
@@ -7,25 +7,23 @@ visualization capabilities for comparing metadata structures.
 """
 
 import pandas as pd
-import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import json
 import numpy as np
 from collections import defaultdict
 from modules.database import DatabaseManager
+from modules.snapshot import metadata_source
+from modules.visualizations import show_chart
 
-# Database connection placeholder
-_db = None
-
-def get_file_type_counts():
-    """Get counts of different file types with metadata"""
-    query = """
+def get_file_type_counts(db):
+    """Get counts of different file types with metadata (cached per database version)"""
+    query = f"""
     SELECT 
         o.extension, 
         COUNT(*) as count
     FROM 
-        instances i
+        {metadata_source(db)} i
     JOIN 
         objects o ON i.objectId = o.objectId
     WHERE 
@@ -38,10 +36,11 @@ def get_file_type_counts():
         count DESC
     """
     
-    return _db.query(query)
+    return db.cache.get_or_compute('metadata_file_types', None, db.get_fingerprint(), lambda: db.query(query))
 
-def get_metadata_samples(extension=None, limit=100):
+def get_metadata_samples(db, extension=None, limit=100):
     """Get sample metadata for a specific file extension"""
+    source = metadata_source(db)
     if extension:
         query = f"""
         SELECT 
@@ -49,15 +48,16 @@ def get_metadata_samples(extension=None, limit=100):
             o.extension, 
             i.metadata
         FROM 
-            instances i
+            {source} i
         JOIN 
             objects o ON i.objectId = o.objectId
         WHERE 
             i.metadata IS NOT NULL 
             AND i.metadata != ''
-            AND o.extension = '{extension}'
-        LIMIT {limit}
+            AND o.extension = $extension
+        LIMIT {int(limit)}
         """
+        return db.query(query, {'extension': extension})
     else:
         query = f"""
         SELECT 
@@ -65,7 +65,7 @@ def get_metadata_samples(extension=None, limit=100):
             o.extension, 
             i.metadata
         FROM 
-            instances i
+            {source} i
         JOIN 
             objects o ON i.objectId = o.objectId
         WHERE 
@@ -73,10 +73,10 @@ def get_metadata_samples(extension=None, limit=100):
             AND i.metadata != ''
             AND o.extension IS NOT NULL
         ORDER BY RANDOM()
-        LIMIT {limit}
+        LIMIT {int(limit)}
         """
     
-    return _db.query(query)
+    return db.query(query)
 
 def extract_metadata_keys(metadata_json):
     """Extract flattened keys from metadata JSON"""
@@ -110,10 +110,10 @@ def extract_metadata_keys(metadata_json):
     
     return keys
 
-def analyze_metadata(extension=None, max_samples=100):
+def analyze_metadata(db, extension=None, max_samples=100):
     """Analyze metadata for a specific file extension or all extensions"""
     # Get samples
-    samples_df = get_metadata_samples(extension, max_samples)
+    samples_df = get_metadata_samples(db, extension, max_samples)
     
     if len(samples_df) == 0:
         return None
@@ -148,16 +148,19 @@ def analyze_metadata(extension=None, max_samples=100):
     
     return result
 
-def compare_file_types(file_types, max_samples_per_type=50):
-    """Compare metadata keys across different file types"""
-    results = {}
+def compare_file_types(db, file_types, max_samples_per_type=50):
+    """Compare metadata keys across different file types
     
-    for file_type in file_types:
-        analysis = analyze_metadata(file_type, max_samples_per_type)
-        if analysis:
-            results[file_type] = analysis
+    The file types are sampled and analyzed concurrently, each on its own
+    database cursor.
+    """
+    analyses, _ = db.run_parallel({
+        file_type: (lambda file_type=file_type: analyze_metadata(db, file_type, max_samples_per_type))
+        for file_type in file_types
+    })
     
-    return results
+    # Keep the order of the requested file types
+    return {file_type: analyses[file_type] for file_type in file_types if analyses.get(file_type)}
 
 def get_top_metadata_keys(analysis_result, top_n=10):
     """Get the top N metadata keys for a file type"""
@@ -174,9 +177,9 @@ def get_top_metadata_keys(analysis_result, top_n=10):
     # Return top N
     return sorted_keys[:top_n]
 
-def get_metadata_value_examples(extension, key_path, limit=5):
+def get_metadata_value_examples(db, extension, key_path, limit=5):
     """Get example values for a specific metadata field"""
-    samples = get_metadata_samples(extension, 100)
+    samples = get_metadata_samples(db, extension, 100)
     
     examples = []
     key_parts = key_path.split('.')
@@ -203,13 +206,16 @@ def get_metadata_value_examples(extension, key_path, limit=5):
     
     return examples
 
-def render_file_type_comparison(file_types=None, max_file_types=10):
+def render_file_type_comparison(db, file_types=None, max_file_types=10):
     """Render a comparison of metadata across file types"""
+    # Imported here so the data functions above work without Streamlit
+    import streamlit as st
+
     st.header("File Metadata Analysis")
     
     # Get file type counts if not provided
     if not file_types:
-        file_type_counts = get_file_type_counts()
+        file_type_counts = get_file_type_counts(db)
         
         if len(file_type_counts) == 0:
             st.warning("No file types with metadata found in the database.")
@@ -252,7 +258,7 @@ def render_file_type_comparison(file_types=None, max_file_types=10):
     
     # Run comparison
     with st.spinner("Analyzing metadata across file types..."):
-        comparison = compare_file_types(selected_types, samples_per_type)
+        comparison = compare_file_types(db, selected_types, samples_per_type)
     
     # Display results
     if not comparison:
@@ -330,7 +336,7 @@ def render_file_type_comparison(file_types=None, max_file_types=10):
         coloraxis_colorbar=dict(title="Frequency (%)")
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Field details for selected file type
     st.subheader("Field Details by File Type")
@@ -351,7 +357,7 @@ def render_file_type_comparison(file_types=None, max_file_types=10):
         field_details = []
         
         for key, stats in top_fields_for_type:
-            examples = get_metadata_value_examples(selected_type_for_details, key)
+            examples = get_metadata_value_examples(db, selected_type_for_details, key)
             example_str = ", ".join(examples) if examples else "No examples available"
             
             field_details.append({
@@ -387,7 +393,7 @@ def render_file_type_comparison(file_types=None, max_file_types=10):
         color_continuous_scale="Viridis"
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Raw metadata viewer
     st.subheader("Raw Metadata Viewer")
@@ -409,7 +415,7 @@ def render_file_type_comparison(file_types=None, max_file_types=10):
             value=1
         )
     
-    samples = get_metadata_samples(viewer_file_type, num_samples)
+    samples = get_metadata_samples(db, viewer_file_type, num_samples)
     
     for i, (_, sample) in enumerate(samples.iterrows()):
         st.write(f"**Sample {i+1} - {sample['objectId']}**")
@@ -420,12 +426,16 @@ def render_file_type_comparison(file_types=None, max_file_types=10):
         except json.JSONDecodeError:
             st.code(sample['metadata'])
 
-def render_metadata_analysis_dashboard(db=None):
-    """Main function to render the metadata analysis dashboard"""
-    global _db
-    if db is not None:
-        _db = db
+def render_metadata_analysis_dashboard(db, file_type_counts=None):
+    """Main function to render the metadata analysis dashboard
     
+    Args:
+        db (DatabaseManager): Database manager
+        file_type_counts (DataFrame, optional): File types with metadata, as
+            returned by get_file_type_counts; fetched if None
+    """
+    import streamlit as st
+
     st.title("Document Metadata Analysis")
     
     st.write("""
@@ -434,7 +444,8 @@ def render_metadata_analysis_dashboard(db=None):
     """)
     
     # Get top file types with metadata
-    file_type_counts = get_file_type_counts()
+    if file_type_counts is None:
+        file_type_counts = get_file_type_counts(db)
     
     if len(file_type_counts) == 0:
         st.warning("No file metadata found in the database.")
@@ -452,15 +463,16 @@ def render_metadata_analysis_dashboard(db=None):
         hole=0.4
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Show top file types in a table
     st.dataframe(file_type_counts.head(10))
     
     # Render the comparison
     top_types = file_type_counts.head(8)['extension'].tolist()
-    render_file_type_comparison(top_types)
+    render_file_type_comparison(db, top_types)
 
 if __name__ == "__main__":
-    # This will be used when importing this module directly in Streamlit
-    render_metadata_analysis_dashboard()
+    # This will be used when running this module directly in Streamlit
+    import config
+    render_metadata_analysis_dashboard(DatabaseManager(config.DEFAULT_DB_PATH, derived_path=config.DERIVED_DB_PATH))
@@ -0,0 +1,310 @@
+"""
+Module for the filter context and the SQL predicates it turns into.
+
+The sidebar filters (service, extension category, folder subtree, time range
+and classification) are collected in a FilterContext and turned into SQL
+predicates that reports pass to their queries, so scoping the dashboard only
+changes the WHERE clauses DuckDB evaluates. Cached report functions include
+the predicate in their cache keys, so every filter combination is cached
+separately.
+
+Folder subtrees are matched through a derived folder index sorted by path:
+a prefix becomes a range predicate (path >= prefix AND path < upper bound)
+that DuckDB answers from the index's zone maps instead of a LIKE scan over
+every parentPath.
+
+This module has no Streamlit dependency, so the API, the static report
+generator and the providers use it directly; the sidebar that fills the
+context lives in modules.filters.
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+
+import config
+from modules.categories import ensure_category_table, normalize_extension_sql
+from modules.tag_analysis import tag_filter_clause
+from modules.timestamps import epoch_ms_range_sql
+
+# Derived table of (parentId, path) sorted by path
+FOLDER_INDEX_TABLE = "folderIndex"
+
+
+@dataclass(frozen=True)
+class FilterContext:
+    """Filters applied to every report.
+
+    Attributes:
+        service_ids (tuple): Services to include (all if empty)
+        categories (tuple): Extension categories to include (all if empty)
+        classification_keys (tuple): Classifications to include (all if empty)
+        tags (tuple): Tags to include; objects and instances carrying any of
+            them are kept (all if empty)
+        path_prefix (str): Folder subtree to include, e.g. '/root/projects'
+        start (date): First creation date to include
+        end (date): Last creation date to include
+    """
+    service_ids: tuple = ()
+    categories: tuple = ()
+    classification_keys: tuple = ()
+    tags: tuple = ()
+    path_prefix: str = None
+    start: object = None
+    end: object = None
+
+    @property
+    def is_active(self):
+        """True if any filter is set."""
+        return bool(
+            self.service_ids or self.categories or self.classification_keys
+            or self.tags or self.path_prefix or self.start or self.end
+        )
+
+    @property
+    def filters_objects(self):
+        """True if any filter restricts objects by their own columns."""
+        return bool(self.categories or self.path_prefix)
+
+    @property
+    def filters_instances(self):
+        """True if any filter restricts instances by their own columns."""
+        return bool(self.service_ids or self.classification_keys)
+
+    def time_bounds(self):
+        """Get the (inclusive start, exclusive end) of the time range."""
+        end = self.end + timedelta(days=1) if self.end else None
+        return self.start, end
+
+
+def _sql_string(value):
+    """Quote a value as a SQL string literal."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _sql_list(values):
+    """Format values as a SQL IN list."""
+    return ", ".join(_sql_string(value) for value in values)
+
+
+def _column(alias, name):
+    """Qualify a column with an optional table alias."""
+    return f"{alias}.{name}" if alias else name
+
+
+def _combine(conditions):
+    """Combine conditions with AND, or return None if there are none."""
+    return " AND ".join(f"({condition})" for condition in conditions) if conditions else None
+
+
+def normalize_folder_path(path):
+    """Normalize a folder path for prefix matching: forward slashes, trailing slash."""
+    path = str(path).replace('\\', '/').strip()
+    return path.rstrip('/') + '/'
+
+
+def build_folder_index(db, force=False):
+    """Build the folder index if the database changed since the last build.
+
+    Args:
+        db (DatabaseManager): Database manager
+        force (bool): If True, rebuild even if the index is current
+
+    Returns:
+        str: Qualified name of the folder index
+    """
+    index_table = db.derived_table(FOLDER_INDEX_TABLE)
+    if not force and db.is_derived_current(FOLDER_INDEX_TABLE):
+        return index_table
+
+    with db.build_lock:
+        # Another thread may have built it while this one waited
+        if not force and db.is_derived_current(FOLDER_INDEX_TABLE):
+            return index_table
+
+        db.conn.execute(f"""
+            CREATE OR REPLACE TABLE {index_table} AS
+            SELECT
+                parentId,
+                rtrim(replace(parentPath, '\\', '/'), '/') || '/' AS path
+            FROM parentPaths
+            WHERE parentPath IS NOT NULL AND parentPath != ''
+            ORDER BY path
+        """)
+        db.mark_derived_built(FOLDER_INDEX_TABLE)
+        return index_table
+
+
+def path_prefix_sql(db, prefix, column='parentId'):
+    """SQL predicate restricting a parentId column to a folder subtree.
+
+    Args:
+        db (DatabaseManager): Database manager
+        prefix (str): Folder path; the folder and all its subfolders match
+        column (str): parentId column in the outer query
+
+    Returns:
+        str: SQL predicate
+    """
+    index_table = build_folder_index(db)
+    low = normalize_folder_path(prefix)
+    # Smallest string greater than every path starting with the prefix
+    high = low[:-1] + chr(ord(low[-1]) + 1)
+    return f"""{column} IN (
+        SELECT parentId FROM {index_table}
+        WHERE path >= {_sql_string(low)} AND path < {_sql_string(high)}
+    )"""
+
+
+def category_predicate_sql(db, categories, column):
+    """SQL predicate restricting an extension column to categories.
+
+    The lookup is written as uncorrelated IN subqueries, so an unqualified
+    column cannot be captured by the category table's own extension column.
+    """
+    table = ensure_category_table(db)[0]
+    extension = normalize_extension_sql(column)
+    conditions = [f"""{extension} IN (
+        SELECT extension FROM {table} WHERE category IN ({_sql_list(categories)})
+    )"""]
+    if config.DEFAULT_FILE_CATEGORY in categories:
+        # Unknown and missing extensions fall back to the default category
+        conditions.append(f"{column} IS NULL OR {extension} NOT IN (SELECT extension FROM {table})")
+    return " OR ".join(f"({condition})" for condition in conditions)
+
+
+def _instance_conditions(filters, alias=None):
+    """Conditions on instance columns (service, classification)."""
+    conditions = []
+    if filters.service_ids:
+        ids = ", ".join(str(int(service_id)) for service_id in filters.service_ids)
+        conditions.append(f"{_column(alias, 'serviceId')} IN ({ids})")
+    if filters.classification_keys:
+        conditions.append(f"""{_column(alias, 'classificationId')} IN (
+            SELECT classificationId FROM classifications
+            WHERE classificationKey IN ({_sql_list(filters.classification_keys)})
+        )""")
+    return conditions
+
+
+def _object_conditions(db, filters, alias=None):
+    """Conditions on object columns (category, folder subtree)."""
+    conditions = []
+    if filters.categories:
+        conditions.append(category_predicate_sql(db, filters.categories, _column(alias, 'extension')))
+    if filters.path_prefix:
+        conditions.append(path_prefix_sql(db, filters.path_prefix, _column(alias, 'parentId')))
+    return conditions
+
+
+def _instance_tag_condition(db, filters, alias=None):
+    """Condition keeping instances tagged through their tags or tagSetId."""
+    return tag_filter_clause(
+        db, filters.tags, _column(alias, 'tags'), tag_set_id_column=_column(alias, 'tagSetId')
+    )
+
+
+def object_where(db, filters, alias=None):
+    """Build the predicate restricting the objects table to the filter context.
+
+    The time range applies to objects.createdAt and tags to objects.tags;
+    service and classification keep objects with at least one matching
+    instance.
+
+    Args:
+        db (DatabaseManager): Database manager
+        filters (FilterContext): Filter context (None for no filtering)
+        alias (str, optional): Alias of the objects table in the query
+
+    Returns:
+        str: SQL predicate, or None if no filter applies
+    """
+    if filters is None or not filters.is_active:
+        return None
+
+    conditions = _object_conditions(db, filters, alias)
+    start, end = filters.time_bounds()
+    if start or end:
+        conditions.append(epoch_ms_range_sql(_column(alias, 'createdAt'), start, end))
+    if filters.tags:
+        conditions.append(tag_filter_clause(db, filters.tags, _column(alias, 'tags')))
+    if filters.filters_instances:
+        conditions.append(f"""{_column(alias, 'objectId')} IN (
+            SELECT objectId FROM instances WHERE {_combine(_instance_conditions(filters))}
+        )""")
+    return _combine(conditions)
+
+
+def instance_where(db, filters, alias=None):
+    """Build the predicate restricting the instances table to the filter context.
+
+    The time range applies to instances.createTime and tags to the
+    instance's tags or tagSetId; category and folder filters keep instances
+    whose object matches.
+
+    Args:
+        db (DatabaseManager): Database manager
+        filters (FilterContext): Filter context (None for no filtering)
+        alias (str, optional): Alias of the instances table in the query
+
+    Returns:
+        str: SQL predicate, or None if no filter applies
+    """
+    if filters is None or not filters.is_active:
+        return None
+
+    conditions = _instance_conditions(filters, alias)
+    start, end = filters.time_bounds()
+    if start or end:
+        conditions.append(epoch_ms_range_sql(_column(alias, 'createTime'), start, end))
+    if filters.tags:
+        conditions.append(_instance_tag_condition(db, filters, alias))
+    if filters.filters_objects:
+        conditions.append(f"""{_column(alias, 'objectId')} IN (
+            SELECT objectId FROM objects WHERE {_combine(_object_conditions(db, filters))}
+        )""")
+    return _combine(conditions)
+
+
+def facts_where(db, filters, alias=None):
+    """Build the predicate restricting the instance fact table to the filter context.
+
+    The fact table already carries the category, classification, service,
+    folder and TIMESTAMP creation time of each instance, so no joins are
+    needed; tags are matched on the instances the facts were built from.
+
+    Args:
+        db (DatabaseManager): Database manager
+        filters (FilterContext): Filter context (None for no filtering)
+        alias (str, optional): Alias of the fact table in the query
+
+    Returns:
+        str: SQL predicate, or None if no filter applies
+    """
+    if filters is None or not filters.is_active:
+        return None
+
+    conditions = []
+    if filters.service_ids:
+        ids = ", ".join(str(int(service_id)) for service_id in filters.service_ids)
+        conditions.append(f"{_column(alias, 'serviceId')} IN ({ids})")
+    if filters.classification_keys:
+        conditions.append(f"{_column(alias, 'classificationKey')} IN ({_sql_list(filters.classification_keys)})")
+    if filters.categories:
+        conditions.append(f"{_column(alias, 'category')} IN ({_sql_list(filters.categories)})")
+    if filters.path_prefix:
+        conditions.append(path_prefix_sql(db, filters.path_prefix, _column(alias, 'parentId')))
+    start, end = filters.time_bounds()
+    if start:
+        conditions.append(f"{_column(alias, 'createTime')} >= {_sql_string(start)}::TIMESTAMP")
+    if end:
+        conditions.append(f"{_column(alias, 'createTime')} < {_sql_string(end)}::TIMESTAMP")
+    if filters.tags:
+        conditions.append(f"""{_column(alias, 'instanceId')} IN (
+            SELECT instanceId FROM instances WHERE {_instance_tag_condition(db, filters)}
+        )""")
+    return _combine(conditions)
+
+
+def and_where(*conditions):
+    """Combine optional SQL predicates with AND, ignoring None."""
+    return _combine([condition for condition in conditions if condition])
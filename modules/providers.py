@@ -0,0 +1,357 @@
+"""
+Module for report data providers.
+
+Each report's data is fetched by a provider: a plain function of the database
+manager, the filter context and the report's options, which returns a
+dataclass of DataFrames and values and never calls Streamlit. The renderers in
+app.py only display these results, so the same providers serve the dashboard,
+the headless API and the static report generator.
+
+- The independent queries of a report run concurrently through
+  DatabaseManager.run_parallel, each on its own cursor; derived tables they
+  read are built first, on the calling thread, under the manager's build
+  lock so concurrent sessions do not build them twice; a build that fails is
+  left to fail the queries reading its table instead of the whole report
+- Reports rendered progressively expose their queries as task dicts
+  (e.g. overview_tasks) for modules.scheduler
+- The queries are the cached report functions, so a provider is as cacheable
+  as its parts and its result is picklable
+- A query that fails leaves an empty default in the result and its error in
+  the result's errors, so one failing chart does not blank the report
+  (queries raise their errors on the query pool, see DatabaseManager.submit)
+"""
+
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from modules.analytics import extension_counts
+from modules.classification_analysis import (
+    classification_by_extension, classification_by_service,
+    classification_summary, classification_top_folders
+)
+from modules.fact_tables import build_instance_facts
+from modules.predicates import facts_where, instance_where, object_where
+from modules.histograms import size_histogram, size_range_distribution
+from modules.message_analysis import most_linked_messages, message_time_histogram, refresh_message_tables
+from modules.metadata_analysis import get_file_type_counts
+from modules.service_analysis import (
+    refresh_service_rollup, service_compression, service_distribution,
+    service_pipe_breakdown, service_throughput
+)
+from modules.tag_analysis import build_tag_tables, tag_cooccurrence, tag_counts, tag_presence
+from modules.timeseries import time_series
+
+
+@dataclass
+class OverviewData:
+    """Data of the overview report."""
+    total_objects: int = 0
+    total_instances: int = 0
+    storage_stats: dict = field(default_factory=dict)
+    extension_counts: pd.DataFrame = field(default_factory=pd.DataFrame)
+    creation_over_time: pd.DataFrame = field(default_factory=pd.DataFrame)
+    size_distribution: pd.DataFrame = field(default_factory=pd.DataFrame)
+    service_distribution: pd.DataFrame = field(default_factory=pd.DataFrame)
+    errors: dict = field(default_factory=dict)
+
+
+@dataclass
+class ObjectsData:
+    """Data of the document objects report."""
+    total_objects: int = 0
+    extension_counts: pd.DataFrame = field(default_factory=pd.DataFrame)
+    creation_over_time: pd.DataFrame = field(default_factory=pd.DataFrame)
+    tag_presence: pd.DataFrame = field(default_factory=pd.DataFrame)
+    top_tags: pd.DataFrame = field(default_factory=pd.DataFrame)
+    tag_cooccurrence: pd.DataFrame = field(default_factory=pd.DataFrame)
+    errors: dict = field(default_factory=dict)
+
+
+@dataclass
+class InstancesData:
+    """Data of the file instances report."""
+    storage_stats: dict = field(default_factory=dict)
+    size_distribution: pd.DataFrame = field(default_factory=pd.DataFrame)
+    size_histogram: pd.DataFrame = field(default_factory=pd.DataFrame)
+    service_distribution: pd.DataFrame = field(default_factory=pd.DataFrame)
+    errors: dict = field(default_factory=dict)
+
+
+@dataclass
+class MetadataData:
+    """Data of the metadata analysis report."""
+    file_type_counts: pd.DataFrame = field(default_factory=pd.DataFrame)
+    errors: dict = field(default_factory=dict)
+
+
+@dataclass
+class ClassificationsData:
+    """Data of the classifications report."""
+    summary: pd.DataFrame = field(default_factory=pd.DataFrame)
+    by_service: pd.DataFrame = field(default_factory=pd.DataFrame)
+    errors: dict = field(default_factory=dict)
+
+
+@dataclass
+class ClassificationDetail:
+    """Drill-down data of a single classification."""
+    classification_key: str = None
+    top_extensions: pd.DataFrame = field(default_factory=pd.DataFrame)
+    top_folders: pd.DataFrame = field(default_factory=pd.DataFrame)
+    errors: dict = field(default_factory=dict)
+
+
+@dataclass
+class ServicesData:
+    """Data of the service interactions report."""
+    distribution: pd.DataFrame = field(default_factory=pd.DataFrame)
+    compression: pd.DataFrame = field(default_factory=pd.DataFrame)
+    throughput: pd.DataFrame = field(default_factory=pd.DataFrame)
+    pipes: pd.DataFrame = field(default_factory=pd.DataFrame)
+    errors: dict = field(default_factory=dict)
+
+
+@dataclass
+class MessagesData:
+    """Data of the system messages report."""
+    total_messages: int = 0
+    histogram: pd.DataFrame = field(default_factory=pd.DataFrame)
+    linked: pd.DataFrame = field(default_factory=pd.DataFrame)
+    errors: dict = field(default_factory=dict)
+
+
+def _build_tables(db, *builds):
+    """Build the derived tables a report's queries read, before they run.
+
+    A failing build does not raise: the queries reading its table build it
+    again on the query pool, fail in turn and keep their defaults, so the
+    rest of the report still renders.
+
+    Args:
+        db (DatabaseManager): Database manager
+        *builds: Functions of the database manager building derived tables
+    """
+    for build in builds:
+        try:
+            build(db)
+        except Exception as e:
+            print(f"Error building derived tables: {e}")
+
+
+def _fetch(db, result_class, tasks, **values):
+    """Run a report's queries in parallel and collect them in its result class.
+
+    Args:
+        db (DatabaseManager): Database manager
+        result_class (type): Result dataclass; task names are its field names
+        tasks (dict): Field name -> function without arguments
+        **values: Fields computed beforehand
+
+    Returns:
+        Result dataclass; failed fields keep their defaults
+    """
+    results, errors = db.run_parallel(tasks)
+    return result_class(**values, **results, errors=errors)
+
+
+def overview_tasks(db, filters=None):
+    """Build the queries of the overview report, named after OverviewData's fields.
+
+    Derived tables the queries read are built before returning.
+
+    Args:
+        db (DatabaseManager): Database manager
+        filters (FilterContext, optional): Sidebar filters
+
+    Returns:
+        dict: Field name -> function without arguments
+    """
+    objects_filter = object_where(db, filters)
+    instances_filter = instance_where(db, filters)
+    _build_tables(db, refresh_service_rollup)
+
+    return {
+        'total_objects': lambda: db.get_row_count('objects', objects_filter),
+        'total_instances': lambda: db.get_row_count('instances', instances_filter),
+        'storage_stats': lambda: db.get_storage_stats(instances_filter),
+        'extension_counts': lambda: extension_counts(db, objects_filter, limit=10),
+        'creation_over_time': lambda: time_series(db, 'objects', 'createdAt', freq='month', where=objects_filter),
+        'size_distribution': lambda: size_range_distribution(db, where=instances_filter),
+        'service_distribution': lambda: service_distribution(db, instances_filter)
+    }
+
+
+def overview_data(db, filters=None):
+    """Fetch the data of the overview report.
+
+    Args:
+        db (DatabaseManager): Database manager
+        filters (FilterContext, optional): Sidebar filters
+
+    Returns:
+        OverviewData: Report data
+    """
+    return _fetch(db, OverviewData, overview_tasks(db, filters))
+
+
+def objects_data(db, filters=None, granularity='month'):
+    """Fetch the data of the document objects report.
+
+    Tag statistics are precomputed over all documents and ignore the filters.
+
+    Args:
+        db (DatabaseManager): Database manager
+        filters (FilterContext, optional): Sidebar filters
+        granularity (str): Period of the creation timeline
+
+    Returns:
+        ObjectsData: Report data
+    """
+    objects_filter = object_where(db, filters)
+    _build_tables(db, build_tag_tables)
+
+    return _fetch(db, ObjectsData, {
+        'total_objects': lambda: db.get_row_count('objects', objects_filter),
+        'extension_counts': lambda: extension_counts(db, objects_filter, limit=15),
+        'creation_over_time': lambda: time_series(db, 'objects', 'createdAt', freq=granularity, where=objects_filter),
+        'tag_presence': lambda: tag_presence(db),
+        'top_tags': lambda: tag_counts(db, limit=20),
+        'tag_cooccurrence': lambda: tag_cooccurrence(db, top_n=10)
+    })
+
+
+def instances_tasks(db, filters=None, scale='log2'):
+    """Build the queries of the file instances report, named after InstancesData's fields.
+
+    Derived tables the queries read are built before returning.
+
+    Args:
+        db (DatabaseManager): Database manager
+        filters (FilterContext, optional): Sidebar filters
+        scale (str): Buckets of the size histogram ('log2' or 'log10')
+
+    Returns:
+        dict: Field name -> function without arguments
+    """
+    instances_filter = instance_where(db, filters)
+    _build_tables(db, refresh_service_rollup)
+
+    return {
+        'storage_stats': lambda: db.get_storage_stats(instances_filter),
+        'size_distribution': lambda: size_range_distribution(db, where=instances_filter),
+        'size_histogram': lambda: size_histogram(db, scale=scale, where=instances_filter),
+        'service_distribution': lambda: service_distribution(db, instances_filter)
+    }
+
+
+def instances_data(db, filters=None, scale='log2'):
+    """Fetch the data of the file instances report.
+
+    Args:
+        db (DatabaseManager): Database manager
+        filters (FilterContext, optional): Sidebar filters
+        scale (str): Buckets of the size histogram ('log2' or 'log10')
+
+    Returns:
+        InstancesData: Report data
+    """
+    return _fetch(db, InstancesData, instances_tasks(db, filters, scale))
+
+
+def metadata_data(db):
+    """Fetch the data of the metadata analysis report.
+
+    Args:
+        db (DatabaseManager): Database manager
+
+    Returns:
+        MetadataData: Report data
+    """
+    return _fetch(db, MetadataData, {
+        'file_type_counts': lambda: get_file_type_counts(db)
+    })
+
+
+def classifications_data(db, filters=None):
+    """Fetch the data of the classifications report.
+
+    Args:
+        db (DatabaseManager): Database manager
+        filters (FilterContext, optional): Sidebar filters
+
+    Returns:
+        ClassificationsData: Report data
+    """
+    _build_tables(db, build_instance_facts)
+    facts_filter = facts_where(db, filters)
+
+    return _fetch(db, ClassificationsData, {
+        'summary': lambda: classification_summary(db, facts_filter),
+        'by_service': lambda: classification_by_service(db, facts_filter)
+    })
+
+
+def classification_detail(db, classification_key, filters=None):
+    """Fetch the drill-down data of a single classification.
+
+    Args:
+        db (DatabaseManager): Database manager
+        classification_key (str): Classification to describe
+        filters (FilterContext, optional): Sidebar filters
+
+    Returns:
+        ClassificationDetail: Drill-down data
+    """
+    _build_tables(db, build_instance_facts)
+    facts_filter = facts_where(db, filters)
+
+    return _fetch(db, ClassificationDetail, {
+        'top_extensions': lambda: classification_by_extension(db, classification_key, where=facts_filter),
+        'top_folders': lambda: classification_top_folders(db, classification_key, where=facts_filter)
+    }, classification_key=classification_key)
+
+
+def services_data(db, filters=None, granularity='month'):
+    """Fetch the data of the service interactions report.
+
+    Args:
+        db (DatabaseManager): Database manager
+        filters (FilterContext, optional): Sidebar filters
+        granularity (str): Period of the throughput charts
+
+    Returns:
+        ServicesData: Report data
+    """
+    instances_filter = instance_where(db, filters)
+    _build_tables(db, refresh_service_rollup)
+
+    return _fetch(db, ServicesData, {
+        'distribution': lambda: service_distribution(db, instances_filter),
+        'compression': lambda: service_compression(db, instances_filter),
+        'throughput': lambda: service_throughput(db, granularity, instances_filter),
+        'pipes': lambda: service_pipe_breakdown(db, instances_filter)
+    })
+
+
+def messages_data(db, granularity='week'):
+    """Fetch the data of the system messages report.
+
+    Builds the derived message tables first if the database changed.
+
+    Args:
+        db (DatabaseManager): Database manager
+        granularity (str): Period of the message volume chart
+
+    Returns:
+        MessagesData: Report data
+    """
+    total_messages = db.get_row_count('messages')
+    if total_messages == 0:
+        return MessagesData()
+    _build_tables(db, refresh_message_tables)
+
+    return _fetch(db, MessagesData, {
+        'histogram': lambda: message_time_histogram(db, granularity),
+        'linked': lambda: most_linked_messages(db)
+    }, total_messages=total_messages)
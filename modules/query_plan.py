@@ -0,0 +1,197 @@
+"""
+Module for column-pruned report queries.
+
+Reports declare the columns and aggregates they need in a QuerySpec instead of
+writing SELECT * or fetching columns they never display. The spec is turned
+into a minimal projection, and the columns each table scan reads are taken
+from DuckDB's own query plan (EXPLAIN), so the bytes a query avoids compared
+to reading whole rows can be reported per query.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# Bytes per value of fixed-width types; variable-width types are sampled
+TYPE_WIDTHS = {
+    'BOOLEAN': 1,
+    'TINYINT': 1,
+    'UTINYINT': 1,
+    'SMALLINT': 2,
+    'USMALLINT': 2,
+    'INTEGER': 4,
+    'UINTEGER': 4,
+    'BIGINT': 8,
+    'UBIGINT': 8,
+    'HUGEINT': 16,
+    'UHUGEINT': 16,
+    'FLOAT': 4,
+    'DOUBLE': 8,
+    'DATE': 4,
+    'TIME': 8,
+    'TIMESTAMP': 8,
+    'TIMESTAMP WITH TIME ZONE': 8,
+    'INTERVAL': 16,
+    'UUID': 16
+}
+
+# Rows sampled to estimate the average width of variable-width columns
+WIDTH_SAMPLE_ROWS = 10000
+
+# Plan operators that scan a base table
+SCAN_OPERATORS = ('SEQ_SCAN', 'TABLE_SCAN')
+
+
+@dataclass
+class QuerySpec:
+    """Columns, aggregates and filters a report needs from the database.
+
+    Attributes:
+        table (str): Table to read, optionally with an alias (e.g. 'objects o')
+        columns (dict): Output name -> expression of the columns to return
+        aggregates (dict): Output name -> aggregate expression; if set, the
+            result is grouped by the columns
+        joins (list): JOIN clauses
+        where (list): Filter conditions, combined with AND
+        order_by (list): ORDER BY expressions
+        limit (int): Maximum number of rows
+    """
+    table: str
+    columns: dict = field(default_factory=dict)
+    aggregates: dict = field(default_factory=dict)
+    joins: list = field(default_factory=list)
+    where: list = field(default_factory=list)
+    order_by: list = field(default_factory=list)
+    limit: int = None
+
+    def to_sql(self):
+        """Build the query selecting only the declared columns and aggregates.
+
+        Returns:
+            str: SQL query
+        """
+        select = [f"{expression} AS {name}" for name, expression in {**self.columns, **self.aggregates}.items()]
+        if not select:
+            raise ValueError("A query spec needs at least one column or aggregate")
+
+        sql = f"SELECT {', '.join(select)} FROM {self.table}"
+        if self.joins:
+            sql += " " + " ".join(self.joins)
+        if self.where:
+            sql += " WHERE " + " AND ".join(f"({condition})" for condition in self.where)
+        if self.aggregates and self.columns:
+            sql += " GROUP BY " + ", ".join(self.columns.values())
+        if self.order_by:
+            sql += " ORDER BY " + ", ".join(self.order_by)
+        if self.limit is not None:
+            sql += f" LIMIT {int(self.limit)}"
+        return sql
+
+
+def exists_sql(table, where=None):
+    """SQL returning a single boolean telling whether a table has matching rows."""
+    condition = f" WHERE {where}" if where else ""
+    return f"SELECT EXISTS (SELECT 1 FROM {table}{condition})"
+
+
+def table_columns(conn, table, exclude=None):
+    """Get the column names of a table in order, without excluded columns.
+
+    Args:
+        conn: DuckDB connection
+        table (str): Table name
+        exclude (list, optional): Columns to leave out
+
+    Returns:
+        list: Column names
+    """
+    exclude = set(exclude or ())
+    rows = conn.execute(f"DESCRIBE {table}").fetchall()
+    return [row[0] for row in rows if row[0] not in exclude]
+
+
+def column_widths(conn, table):
+    """Estimate the average stored width of each column of a table in bytes.
+
+    Fixed-width types use their size; strings and blobs use the average
+    length over a sample of rows.
+
+    Args:
+        conn: DuckDB connection
+        table (str): Table name
+
+    Returns:
+        dict: Column -> average width in bytes
+    """
+    described = conn.execute(f"DESCRIBE {table}").fetchall()
+    widths = {}
+    sampled = []
+    for name, column_type, *_ in described:
+        if column_type in TYPE_WIDTHS:
+            widths[name] = TYPE_WIDTHS[column_type]
+        elif column_type.startswith('DECIMAL'):
+            widths[name] = 8
+        else:
+            sampled.append(name)
+
+    if sampled:
+        averages = ", ".join(f'AVG(octet_length(CAST("{name}" AS BLOB)))' for name in sampled)
+        row = conn.execute(f"""
+            SELECT {averages}
+            FROM (SELECT * FROM {table} LIMIT {WIDTH_SAMPLE_ROWS})
+        """).fetchone()
+        for name, average in zip(sampled, row):
+            widths[name] = float(average or 0)
+    return widths
+
+
+def _scans(plan):
+    """Yield the table scans of an EXPLAIN (FORMAT JSON) plan tree."""
+    for node in plan:
+        info = node.get('extra_info') or {}
+        if node.get('name') in SCAN_OPERATORS and 'Table' in info:
+            yield info
+        yield from _scans(node.get('children', []))
+
+
+def scan_estimate(db, sql):
+    """Estimate the bytes each table scan of a query reads and avoids.
+
+    The columns read per table come from the query plan; bytes are the
+    table's row count times the estimated width of the columns read, compared
+    to reading every column.
+
+    Args:
+        db (DatabaseManager): Database manager
+        sql (str): Query to analyze
+
+    Returns:
+        DataFrame: table, columns_read, columns_total, bytes_read and
+            bytes_avoided per scanned table
+    """
+    def compute():
+        plan = json.loads(db.conn.execute(f"EXPLAIN (FORMAT JSON) {sql}").fetchall()[0][1])
+        rows = []
+        for info in _scans(plan):
+            table = info['Table']
+            widths = column_widths(db.conn, table)
+            filters = info.get('Filters', '')
+            filters = " ".join(filters) if isinstance(filters, list) else filters
+            read = set(info.get('Projections', []))
+            # Columns used only in pushed-down filters are read but not projected
+            read |= {column for column in widths if re.search(rf'\b{re.escape(column)}\b', filters)}
+            row_count = db.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            bytes_read = row_count * sum(widths.get(column, 0) for column in read)
+            bytes_total = row_count * sum(widths.values())
+            rows.append({
+                'table': table.split('.')[-1],
+                'columns_read': len(read),
+                'columns_total': len(widths),
+                'bytes_read': int(bytes_read),
+                'bytes_avoided': int(bytes_total - bytes_read)
+            })
+        return pd.DataFrame(rows, columns=['table', 'columns_read', 'columns_total', 'bytes_read', 'bytes_avoided'])
+
+    return db.cache.get_or_compute('scan_estimate', sql, db.get_fingerprint(), compute)
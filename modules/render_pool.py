@@ -0,0 +1,309 @@
+"""
+Module for rendering static chart images.
+
+Report charts are Plotly figures rendered in the browser; static exports
+(PNG, PDF, SVG) are drawn with matplotlib. Rendering runs in a small pool of
+worker processes, so concurrent sessions neither wait on each other for the
+GIL nor share pyplot's global state:
+
+- Figures are converted to plain chart specs (trace data and labels), which
+  are picklable and hashable, and drawn in the workers with the
+  object-oriented Figure API; pyplot is never imported, so no figure is
+  registered globally and each one is freed after rendering
+- Rendered images are cached by a hash of the spec, format and resolution,
+  in an LRU bounded by total bytes
+- Workers run with an address space limit and are replaced after a number of
+  renders; specs with too many points or images with too many pixels are
+  rejected before they reach a worker
+"""
+
+import atexit
+import hashlib
+import multiprocessing
+import pickle
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+import numpy as np
+
+# Number of worker processes
+RENDER_WORKERS = 2
+
+# Renders per worker before it is replaced, releasing any memory it kept
+RENDER_TASKS_PER_WORKER = 50
+
+# Address space limit per worker in megabytes (None for no limit)
+RENDER_MEMORY_LIMIT_MB = 1024
+
+# Seconds to wait for a render
+RENDER_TIMEOUT = 60
+
+# Total size of the rendered image cache in megabytes
+RENDER_CACHE_MB = 64
+
+# Limits on the size of a render
+MAX_RENDER_POINTS = 200000
+MAX_RENDER_PIXELS = 40000000
+
+# Formats supported by export and their MIME types
+RENDER_FORMATS = {
+    'png': 'image/png',
+    'pdf': 'application/pdf',
+    'svg': 'image/svg+xml'
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def _values(values):
+    """Convert Plotly trace values to a list or array (empty if missing)."""
+    if values is None:
+        return []
+    return np.asarray(values).tolist() if not isinstance(values, np.ndarray) else values
+
+
+def chart_spec(fig, figsize=(10, 6)):
+    """Convert a Plotly figure to a chart spec the render workers can draw.
+
+    Supported traces are bars, lines (including filled step lines), pies and
+    heatmaps, which cover the charts built by modules.visualizations.
+
+    Args:
+        fig (Figure): Plotly figure
+        figsize (tuple): Image size (width, height) in inches
+
+    Returns:
+        dict: Chart spec with title, axis labels and traces
+    """
+    layout = fig.layout
+    traces = []
+    for trace in fig.data:
+        if trace.type == 'bar':
+            horizontal = trace.orientation == 'h'
+            traces.append({
+                'type': 'bar',
+                'horizontal': horizontal,
+                'labels': [str(label) for label in _values(trace.y if horizontal else trace.x)],
+                'values': _values(trace.x if horizontal else trace.y)
+            })
+        elif trace.type in ('scatter', 'scattergl'):
+            traces.append({
+                'type': 'line',
+                'x': _values(trace.x),
+                'y': _values(trace.y),
+                'step': trace.line.shape == 'hv',
+                'fill': trace.fill in ('tozeroy', 'tonexty'),
+                'markers': 'markers' in (trace.mode or '')
+            })
+        elif trace.type == 'pie':
+            traces.append({
+                'type': 'pie',
+                'labels': [str(label) for label in _values(trace.labels)],
+                'values': _values(trace.values)
+            })
+        elif trace.type == 'heatmap':
+            traces.append({
+                'type': 'heatmap',
+                'z': np.asarray(trace.z, dtype=float),
+                'x': [str(label) for label in _values(trace.x)],
+                'y': [str(label) for label in _values(trace.y)],
+                'colors': [color for _, color in trace.colorscale] if trace.colorscale else None
+            })
+        else:
+            raise ValueError(f"Unsupported trace type for export: {trace.type}")
+
+    return {
+        'title': layout.title.text,
+        'xlabel': layout.xaxis.title.text,
+        'ylabel': layout.yaxis.title.text,
+        'xlog': layout.xaxis.type == 'log',
+        'figsize': tuple(figsize),
+        'traces': traces
+    }
+
+
+def _spec_points(spec):
+    """Count the data points of a chart spec."""
+    points = 0
+    for trace in spec['traces']:
+        if trace['type'] == 'heatmap':
+            points += np.asarray(trace['z']).size
+        else:
+            points += len(trace.get('values', trace.get('y', [])))
+    return points
+
+
+def _mpl_color(color):
+    """Convert a Plotly color string to a matplotlib color."""
+    match = re.match(r'rgba?\(([^)]*)\)', str(color))
+    if match:
+        parts = [float(part) for part in match.group(1).split(',')]
+        return tuple(part / 255 for part in parts[:3]) + tuple(parts[3:4])
+    return color
+
+
+def _limit_memory(limit_mb):
+    """Limit the address space of a worker process (POSIX only)."""
+    if not limit_mb:
+        return
+    try:
+        import resource
+        limit = limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _render(spec, format_type, dpi):
+    """Draw a chart spec with matplotlib's object-oriented API (runs in a worker).
+
+    Args:
+        spec (dict): Chart spec from chart_spec
+        format_type (str): Image format (png, pdf, svg)
+        dpi (int): Resolution
+
+    Returns:
+        bytes: Rendered image
+    """
+    from matplotlib.colors import LinearSegmentedColormap
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=spec['figsize'], layout='tight')
+    ax = fig.subplots()
+
+    for trace in spec['traces']:
+        kind = trace['type']
+        if kind == 'bar':
+            if trace['horizontal']:
+                ax.barh(trace['labels'], trace['values'])
+                ax.invert_yaxis()
+            else:
+                ax.bar(trace['labels'], trace['values'])
+                ax.tick_params(axis='x', labelrotation=45)
+        elif kind == 'line':
+            step = 'post' if trace['step'] else None
+            ax.plot(trace['x'], trace['y'], drawstyle='steps-post' if step else 'default',
+                    marker='o' if trace['markers'] else None)
+            if trace['fill']:
+                ax.fill_between(trace['x'], trace['y'], step=step, alpha=0.4)
+        elif kind == 'pie':
+            ax.pie(trace['values'], labels=trace['labels'], autopct='%1.1f%%', startangle=90)
+            ax.axis('equal')
+        elif kind == 'heatmap':
+            colors = [_mpl_color(color) for color in trace['colors']] if trace['colors'] else None
+            cmap = LinearSegmentedColormap.from_list('plotly', colors) if colors else 'viridis'
+            image = ax.imshow(trace['z'], cmap=cmap, aspect='auto')
+            ax.set_xticks(range(len(trace['x'])), trace['x'], rotation=45, ha='right')
+            ax.set_yticks(range(len(trace['y'])), trace['y'])
+            for (row, column), value in np.ndenumerate(trace['z']):
+                ax.text(column, row, f"{value:g}", ha='center', va='center', fontsize=8)
+            fig.colorbar(image, ax=ax)
+
+    if spec['xlog']:
+        ax.set_xscale('log')
+    if spec['title']:
+        ax.set_title(spec['title'])
+    if spec['xlabel']:
+        ax.set_xlabel(spec['xlabel'])
+    if spec['ylabel']:
+        ax.set_ylabel(spec['ylabel'])
+
+    buf = BytesIO()
+    fig.savefig(buf, format=format_type, dpi=dpi)
+    return buf.getvalue()
+
+
+def _get_pool():
+    """Get the render pool, starting it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers do not inherit the Streamlit server's threads and locks
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_limit_memory,
+                initargs=(RENDER_MEMORY_LIMIT_MB,),
+                max_tasks_per_child=RENDER_TASKS_PER_WORKER
+            )
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the render workers."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _cache_get(key):
+    """Get a cached image, marking it as recently used."""
+    with _cache_lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+        return data
+
+
+def _cache_put(key, data):
+    """Cache an image, evicting the least recently used ones over the size limit."""
+    global _cache_bytes
+    limit = RENDER_CACHE_MB * 1024 * 1024
+    if len(data) > limit:
+        return
+    with _cache_lock:
+        if key in _cache:
+            return
+        _cache[key] = data
+        _cache_bytes += len(data)
+        while _cache_bytes > limit:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+
+
+def render_chart(spec, format_type='png', dpi=300):
+    """Render a chart spec to an image in the render pool.
+
+    Args:
+        spec (dict): Chart spec from chart_spec
+        format_type (str): Image format (png, pdf, svg)
+        dpi (int): Resolution
+
+    Returns:
+        bytes: Rendered image
+    """
+    if format_type not in RENDER_FORMATS:
+        raise ValueError(f"Unsupported format: {format_type}")
+    if _spec_points(spec) > MAX_RENDER_POINTS:
+        raise ValueError(f"Chart has more than {MAX_RENDER_POINTS:,} points; downsample it before exporting")
+    width, height = spec['figsize']
+    if width * height * dpi * dpi > MAX_RENDER_PIXELS:
+        raise ValueError(f"Image would exceed {MAX_RENDER_PIXELS:,} pixels; lower the size or dpi")
+
+    key = hashlib.md5(pickle.dumps((spec, format_type, dpi), protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+    data = _cache_get(key)
+    if data is not None:
+        return data
+
+    try:
+        data = _get_pool().submit(_render, spec, format_type, dpi).result(timeout=RENDER_TIMEOUT)
+    except BrokenProcessPool:
+        # A worker died (e.g. over its memory limit); start a new pool next time
+        shutdown_pool()
+        raise RuntimeError("Chart rendering failed: the render worker ran out of memory or crashed")
+
+    _cache_put(key, data)
+    return data
@@ -0,0 +1,478 @@
+"""
+Module for static report bundles.
+
+A bundle is a directory that opens without the dashboard: index.html links
+one page per report, each page embeds its charts as Plotly JSON specs and
+its datasets as Parquet attachments under data/, and plotly.js is written
+once to assets/ so the pages also work offline.
+
+Reports are built from the same providers as the dashboard
+(modules.providers), and charts with the same functions
+(modules.visualizations), so time series are downsampled with LTTB and bar
+and pie charts keep their top categories; the embedded specs stay small
+however large the database is.
+"""
+
+import html
+import json
+import os
+from dataclasses import dataclass, field
+
+import pandas as pd
+import plotly.express as px
+from plotly.offline import get_plotlyjs
+
+import config
+from modules.categories import category_sql
+from modules.folder_analysis import folder_rollup
+from modules.providers import (
+    classifications_data, instances_data, messages_data, metadata_data,
+    objects_data, overview_data, services_data
+)
+from modules.visualizations import (
+    DEFAULT_CHART_STYLE, MAX_TIME_SERIES_POINTS, chart_template, downsample_series,
+    format_size_bytes, plot_bar_chart, plot_binned_histogram, plot_heatmap,
+    plot_pie_chart, plot_time_series
+)
+
+# Bundle layout
+BUNDLE_ASSETS_DIR = "assets"
+BUNDLE_DATA_DIR = "data"
+PLOTLY_JS_FILE = "plotly.min.js"
+
+# Rows of each dataset previewed on a report page (all rows are in the Parquet file)
+PREVIEW_ROWS = 20
+
+# Folder levels of the folder reports
+FOLDER_DEPTH = 2
+FOLDER_LIMIT = 50
+
+PAGE_STYLE = f"""
+body {{ font-family: sans-serif; margin: 2em auto; max-width: 1200px; color: #333; }}
+h1, h2 {{ color: {config.APARAVI_COLORS['primary']}; }}
+.metrics {{ display: flex; gap: 2em; flex-wrap: wrap; }}
+.metric {{ border-left: 4px solid {config.APARAVI_COLORS['primary']}; padding: 0.5em 1em; }}
+.metric .value {{ font-size: 1.6em; font-weight: bold; }}
+.chart {{ margin: 1em 0; }}
+table {{ border-collapse: collapse; font-size: 0.9em; margin-bottom: 0.5em; }}
+th, td {{ border: 1px solid #ddd; padding: 0.3em 0.6em; text-align: left; }}
+.errors {{ color: #a00; }}
+"""
+
+
+@dataclass
+class StaticReport:
+    """A report rendered for a static bundle.
+
+    Attributes:
+        report_id (str): Report key in config.REPORTS
+        title (str): Report title
+        description (str): Report description
+        metrics (dict): Label -> formatted value
+        charts (list): Plotly figures
+        datasets (dict): Name -> DataFrame, attached as Parquet files
+        errors (dict): Name -> error message of failed queries
+    """
+    report_id: str
+    title: str
+    description: str = ""
+    metrics: dict = field(default_factory=dict)
+    charts: list = field(default_factory=list)
+    datasets: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+
+
+def _overview_report(db):
+    """Build the overview report."""
+    data = overview_data(db)
+    stats = data.storage_stats
+    metrics = {
+        'Total Documents': f"{data.total_objects:,}",
+        'Total Instances': f"{data.total_instances:,}"
+    }
+    if stats:
+        metrics['Total Storage'] = format_size_bytes(stats['total_size'])
+        metrics['Average Size'] = format_size_bytes(stats['avg_size'])
+
+    charts = []
+    if not data.extension_counts.empty:
+        charts.append(plot_bar_chart(data.extension_counts, 'count', 'ext', 'Top File Extensions',
+                                     'Count', 'Extension', horizontal=True))
+    if not data.creation_over_time.empty:
+        charts.append(plot_time_series(data.creation_over_time, 'period', 'value', 'Document Creation Over Time',
+                                       'Date', 'Number of Documents'))
+    if not data.size_distribution.empty:
+        charts.append(plot_pie_chart(data.size_distribution, 'count', 'size_range', 'Document Size Distribution'))
+    if not data.service_distribution.empty:
+        charts.append(plot_bar_chart(data.service_distribution, 'instance_count', 'service_name',
+                                     'Document Distribution by Service', 'Count', 'Service', horizontal=True))
+
+    datasets = {
+        'extensions': data.extension_counts,
+        'creation': data.creation_over_time,
+        'sizes': data.size_distribution,
+        'services': data.service_distribution
+    }
+    return metrics, charts, datasets, data.errors
+
+
+def _objects_report(db):
+    """Build the document objects report."""
+    data = objects_data(db)
+    charts = []
+    if not data.extension_counts.empty:
+        charts.append(plot_bar_chart(data.extension_counts, 'count', 'ext', 'Top File Extensions',
+                                     'Count', 'Extension', horizontal=True))
+    if not data.creation_over_time.empty:
+        charts.append(plot_time_series(data.creation_over_time, 'period', 'value', 'Document Creation Timeline',
+                                       'Date', 'Number of Documents'))
+    if not data.top_tags.empty:
+        charts.append(plot_bar_chart(data.top_tags, 'object_count', 'tag', 'Most Used Tags',
+                                     'Objects', 'Tag', horizontal=True))
+    if len(data.tag_cooccurrence) > 1:
+        charts.append(plot_heatmap(data.tag_cooccurrence, title='Tag Co-occurrence'))
+
+    datasets = {
+        'extensions': data.extension_counts,
+        'creation': data.creation_over_time,
+        'tag_presence': data.tag_presence,
+        'tags': data.top_tags,
+        'tag_cooccurrence': data.tag_cooccurrence
+    }
+    return {'Total Documents': f"{data.total_objects:,}"}, charts, datasets, data.errors
+
+
+def _instances_report(db):
+    """Build the file instances report."""
+    data = instances_data(db)
+    stats = data.storage_stats
+    metrics = {}
+    if stats:
+        metrics = {
+            'Total Storage': format_size_bytes(stats['total_size']),
+            'Average Size': format_size_bytes(stats['avg_size']),
+            'Min Size': format_size_bytes(stats['min_size']),
+            'Max Size': format_size_bytes(stats['max_size'])
+        }
+
+    charts = []
+    if not data.size_distribution.empty:
+        charts.append(plot_pie_chart(data.size_distribution, 'count', 'size_range', 'Document Size Distribution'))
+    buckets = data.size_histogram
+    if not buckets.empty:
+        charts.append(plot_binned_histogram(buckets['lower'], buckets['upper'], buckets['count'],
+                                            'Document Size Histogram', 'Size (bytes)', 'Documents', log_x=True))
+    if not data.service_distribution.empty:
+        charts.append(plot_bar_chart(data.service_distribution, 'instance_count', 'service_name',
+                                     'Document Distribution by Service', 'Count', 'Service', horizontal=True))
+
+    datasets = {
+        'sizes': data.size_distribution,
+        'size_histogram': data.size_histogram,
+        'services': data.service_distribution
+    }
+    return metrics, charts, datasets, data.errors
+
+
+def _folder_report(title, depth):
+    """Build a builder for a folder rollup report at a given depth."""
+    def build(db):
+        rollup = folder_rollup(db, depth, FOLDER_LIMIT)
+        charts = []
+        if not rollup.empty:
+            charts.append(plot_bar_chart(rollup, 'size', 'folder', f'{title} by Size',
+                                         'Size (bytes)', 'Folder', horizontal=True))
+            charts.append(plot_bar_chart(rollup, 'files', 'folder', f'{title} by File Count',
+                                         'Files', 'Folder', horizontal=True))
+        return {'Folders': f"{len(rollup):,}"}, charts, {'folders': rollup}, {}
+    return build
+
+
+def _file_distribution_report(db):
+    """Build the file distribution report."""
+    category_join, category_expr = category_sql(db, 'o.extension')
+    extensions = db.query(f"""
+        SELECT
+            COALESCE(o.extension, 'Unknown') AS extension,
+            {category_expr} AS category,
+            COUNT(*) AS count
+        FROM objects o
+        {category_join}
+        GROUP BY 1, 2
+        ORDER BY count DESC
+    """)
+
+    charts = []
+    categories = pd.DataFrame(columns=['category', 'count'])
+    if not extensions.empty:
+        categories = extensions.groupby('category', as_index=False)['count'].sum().sort_values('count', ascending=False)
+        charts.append(plot_pie_chart(categories, 'count', 'category', 'File Distribution by Category'))
+        charts.append(plot_bar_chart(extensions.head(10), 'extension', 'count', 'Top 10 File Extensions',
+                                     'Extension', 'Count'))
+    return {'Extensions': f"{len(extensions):,}"}, charts, {'categories': categories, 'extensions': extensions}, {}
+
+
+def _metadata_report(db):
+    """Build the metadata analysis report."""
+    data = metadata_data(db)
+    charts = []
+    if not data.file_type_counts.empty:
+        charts.append(plot_bar_chart(data.file_type_counts, 'extension', 'count', 'Files with Metadata by Type',
+                                     'Extension', 'Files'))
+    return {}, charts, {'file_types': data.file_type_counts}, data.errors
+
+
+def _classifications_report(db):
+    """Build the classifications report."""
+    data = classifications_data(db)
+    charts = []
+    if not data.summary.empty:
+        charts.append(plot_bar_chart(data.summary, 'instance_count', 'classificationKey', 'Instances by Classification',
+                                     'Count', 'Classification', horizontal=True))
+    if not data.by_service.empty:
+        charts.append(px.bar(data.by_service, x='classificationKey', y='instance_count', color='service_name',
+                             title='Classification Distribution by Service', barmode='stack'))
+    return {}, charts, {'summary': data.summary, 'by_service': data.by_service}, data.errors
+
+
+def _services_report(db):
+    """Build the service interactions report."""
+    data = services_data(db)
+    metrics = {}
+    if not data.distribution.empty:
+        metrics = {
+            'Services': f"{len(data.distribution):,}",
+            'Instances': f"{int(data.distribution['instance_count'].sum()):,}"
+        }
+
+    charts = []
+    if not data.throughput.empty:
+        # One LTTB-downsampled series per service
+        throughput = pd.concat([
+            downsample_series(series, 'period', 'instance_count', MAX_TIME_SERIES_POINTS)
+            for _, series in data.throughput.groupby('service_name')
+        ])
+        charts.append(px.line(throughput, x='period', y='instance_count', color='service_name',
+                              title='Instances Processed per Period'))
+    if not data.compression.empty:
+        sizes = data.compression.melt(id_vars='service_name', value_vars=['total_size', 'total_store_size'],
+                                      var_name='size', value_name='bytes')
+        charts.append(px.bar(sizes, x='service_name', y='bytes', color='size',
+                             title='Original vs Stored Size by Service', barmode='group'))
+    if not data.pipes.empty:
+        charts.append(px.bar(data.pipes, x='service_name', y='instance_count', color='process_pipe',
+                             title='Instances by Service and Processing Pipe', barmode='stack'))
+
+    datasets = {
+        'distribution': data.distribution,
+        'compression': data.compression,
+        'throughput': data.throughput,
+        'pipes': data.pipes
+    }
+    return metrics, charts, datasets, data.errors
+
+
+def _messages_report(db):
+    """Build the system messages report."""
+    data = messages_data(db)
+    charts = []
+    if not data.histogram.empty:
+        charts.append(px.bar(data.histogram, x='period', y='message_count', title='Messages per Week',
+                             color_discrete_sequence=[config.APARAVI_COLORS['primary']]))
+    return {'Total Messages': f"{data.total_messages:,}"}, charts, {
+        'volume': data.histogram, 'most_linked': data.linked
+    }, data.errors
+
+
+# Report key -> function(db) returning (metrics, charts, datasets, errors)
+REPORT_BUILDERS = {
+    'overview': _overview_report,
+    'objects': _objects_report,
+    'instances': _instances_report,
+    'folder_structure': _folder_report('Top Folders', FOLDER_DEPTH),
+    'storage_sunburst': _folder_report('Storage by Folder', FOLDER_DEPTH + 1),
+    'file_distribution': _file_distribution_report,
+    'metadata_analysis': _metadata_report,
+    'classifications': _classifications_report,
+    'services': _services_report,
+    'messages': _messages_report
+}
+
+
+def build_report(db, report_id):
+    """Build a report for a static bundle.
+
+    Args:
+        db (DatabaseManager): Database manager
+        report_id (str): Report key in config.REPORTS
+
+    Returns:
+        StaticReport: Report, or None if it has no static version
+    """
+    builder = REPORT_BUILDERS.get(report_id)
+    if builder is None:
+        return None
+    info = config.REPORTS[report_id]
+    metrics, charts, datasets, errors = builder(db)
+    for fig in charts:
+        fig.update_layout(template=chart_template(DEFAULT_CHART_STYLE))
+    return StaticReport(report_id, info['title'], info['description'], metrics, charts, datasets, errors)
+
+
+def _script_json(value):
+    """Serialize a value as JSON that is safe inside a <script> element."""
+    return value.replace("</", "<\\/")
+
+
+def _table_html(df):
+    """Render the first rows of a DataFrame as an HTML table."""
+    preview = df.head(PREVIEW_ROWS)
+    return preview.to_html(index=preview.index.name is not None, border=0, na_rep="")
+
+
+def report_page_html(report, plotly_js=None, attachments=None):
+    """Render a report as a standalone HTML page.
+
+    Args:
+        report (StaticReport): Report
+        plotly_js (str, optional): URL of plotly.js; if None, it is inlined
+        attachments (dict, optional): Dataset name -> URL of its data file
+
+    Returns:
+        str: HTML page
+    """
+    attachments = attachments or {}
+    if plotly_js is None:
+        script = f"<script>{get_plotlyjs()}</script>"
+    else:
+        script = f'<script src="{html.escape(plotly_js)}"></script>'
+
+    parts = [
+        "<!DOCTYPE html>",
+        f"<html><head><meta charset='utf-8'><title>{html.escape(report.title)}</title>",
+        f"<style>{PAGE_STYLE}</style>{script}</head><body>",
+        f"<h1>{html.escape(report.title)}</h1>",
+        f"<p>{html.escape(report.description)}</p>"
+    ]
+
+    if report.errors:
+        parts.append("<ul class='errors'>" + "".join(
+            f"<li>Could not load {html.escape(name)}: {html.escape(error)}</li>"
+            for name, error in report.errors.items()
+        ) + "</ul>")
+
+    if report.metrics:
+        parts.append("<div class='metrics'>" + "".join(
+            f"<div class='metric'><div>{html.escape(label)}</div><div class='value'>{html.escape(value)}</div></div>"
+            for label, value in report.metrics.items()
+        ) + "</div>")
+
+    for number, fig in enumerate(report.charts):
+        chart_id = f"chart-{number}"
+        parts.append(f"<div id='{chart_id}' class='chart'></div>")
+        parts.append(
+            f"<script>(function() {{ var spec = {_script_json(fig.to_json())}; "
+            f"Plotly.newPlot('{chart_id}', spec.data, spec.layout, {{responsive: true}}); }})();</script>"
+        )
+
+    for name, df in report.datasets.items():
+        if df is None or df.empty:
+            continue
+        parts.append(f"<h2>{html.escape(name.replace('_', ' ').capitalize())}</h2>")
+        parts.append(_table_html(df))
+        caption = f"{min(len(df), PREVIEW_ROWS):,} of {len(df):,} rows"
+        if name in attachments:
+            caption += f" &middot; <a href='{html.escape(attachments[name])}' download>all rows (Parquet)</a>"
+        parts.append(f"<p>{caption}</p>")
+
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def write_assets(output_dir):
+    """Write the shared plotly.js of a bundle.
+
+    Args:
+        output_dir (str): Bundle directory
+    """
+    assets_dir = os.path.join(output_dir, BUNDLE_ASSETS_DIR)
+    os.makedirs(assets_dir, exist_ok=True)
+    with open(os.path.join(assets_dir, PLOTLY_JS_FILE), "w", encoding="utf-8") as f:
+        f.write(get_plotlyjs())
+
+
+def _parquet_frame(df):
+    """Prepare a DataFrame for Parquet: named index as a column, string column names."""
+    if df.index.name is not None:
+        df = df.reset_index()
+    return df.rename(columns=str)
+
+
+def write_report(report, output_dir):
+    """Write a report page and its Parquet attachments into a bundle.
+
+    Args:
+        report (StaticReport): Report
+        output_dir (str): Bundle directory
+
+    Returns:
+        dict: Summary with the page file, number of charts and rows per dataset
+    """
+    data_dir = os.path.join(output_dir, BUNDLE_DATA_DIR, report.report_id)
+    os.makedirs(data_dir, exist_ok=True)
+
+    attachments, rows = {}, {}
+    for name, df in report.datasets.items():
+        if df is None or df.empty:
+            continue
+        _parquet_frame(df).to_parquet(os.path.join(data_dir, f"{name}.parquet"), index=False)
+        attachments[name] = f"{BUNDLE_DATA_DIR}/{report.report_id}/{name}.parquet"
+        rows[name] = len(df)
+
+    page = f"{report.report_id}.html"
+    with open(os.path.join(output_dir, page), "w", encoding="utf-8") as f:
+        f.write(report_page_html(report, f"{BUNDLE_ASSETS_DIR}/{PLOTLY_JS_FILE}", attachments))
+
+    return {
+        'report_id': report.report_id,
+        'title': report.title,
+        'page': page,
+        'charts': len(report.charts),
+        'rows': rows,
+        'errors': report.errors
+    }
+
+
+def write_index(output_dir, summaries, generated_at, fingerprint=None):
+    """Write the index page and manifest of a bundle.
+
+    Args:
+        output_dir (str): Bundle directory
+        summaries (list): Summaries returned by write_report
+        generated_at (str): Generation time
+        fingerprint (str, optional): Database fingerprint the bundle was built from
+    """
+    by_id = {summary['report_id']: summary for summary in summaries}
+    parts = [
+        "<!DOCTYPE html>",
+        f"<html><head><meta charset='utf-8'><title>{html.escape(config.APP_TITLE)}</title>",
+        f"<style>{PAGE_STYLE}</style></head><body>",
+        f"<h1>{html.escape(config.APP_TITLE)}</h1>",
+        f"<p>Generated {html.escape(generated_at)}</p>"
+    ]
+    for category in config.REPORT_CATEGORIES.values():
+        items = []
+        for report_id, report in category['reports'].items():
+            summary = by_id.get(report_id)
+            if summary:
+                items.append(f"<li><a href='{summary['page']}'>{html.escape(report['title'])}</a> "
+                             f"&ndash; {html.escape(report['description'])}</li>")
+            else:
+                items.append(f"<li>{html.escape(report['title'])} (not available)</li>")
+        parts.append(f"<h2>{html.escape(category['name'])}</h2><ul>{''.join(items)}</ul>")
+    parts.append("</body></html>")
+
+    with open(os.path.join(output_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({'generated_at': generated_at, 'fingerprint': fingerprint, 'reports': summaries}, f, indent=2)
@@ -0,0 +1,86 @@
+"""
+Module for progressive, concurrent page rendering.
+
+A report page declares its queries up front and then lays out its widgets.
+The PageScheduler starts all queries on the database manager's query pool as
+soon as it is created (each on its own cursor) and reserves a placeholder
+for every widget where it is declared. run() then fills the placeholders on
+the script thread, in the order the results arrive, so the page's latency
+approaches that of its slowest query instead of the sum of all of them, and
+fast widgets appear while slow ones are still loading.
+
+Streamlit calls are only made on the script thread; pool threads only run
+queries.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import streamlit as st
+
+# Shown in a widget's placeholder until its results arrive
+LOADING_TEXT = "Loading…"
+
+
+class PageScheduler:
+    """Runs a page's independent queries concurrently and renders widgets as they complete."""
+
+    def __init__(self, db, tasks):
+        """Start the queries of a page.
+
+        Args:
+            db (DatabaseManager): Database manager
+            tasks (dict): Name -> function without arguments. Tasks must only
+                read; derived tables they depend on should be built before.
+        """
+        self.db = db
+        self.futures = {name: db.submit(task) for name, task in tasks.items()}
+        self.widgets = []
+
+    def widget(self, render, *names):
+        """Reserve a placeholder at the current position for a widget.
+
+        Args:
+            render (callable): Function called with the results of the named
+                tasks, in order, once all of them are available; Streamlit
+                calls it makes are drawn into the placeholder
+            *names: Tasks whose results the widget needs
+        """
+        unknown = [name for name in names if name not in self.futures]
+        if unknown:
+            raise KeyError(f"Unknown tasks: {', '.join(unknown)}")
+
+        placeholder = st.empty()
+        placeholder.caption(LOADING_TEXT)
+        self.widgets.append((placeholder, render, names))
+
+    def _draw(self, placeholder, render, names):
+        """Render a widget whose tasks have all completed."""
+        errors = [
+            f"{name}: {self.futures[name].exception()}"
+            for name in names if self.futures[name].exception() is not None
+        ]
+        if errors:
+            placeholder.warning(f"Could not load data ({'; '.join(errors)})")
+            return
+
+        with placeholder.container():
+            render(*(self.futures[name].result() for name in names))
+
+    def run(self):
+        """Render the widgets as their results arrive.
+
+        Returns when every widget has been drawn.
+        """
+        pending = list(self.widgets)
+        while pending:
+            waiting = {future for future in self.futures.values() if not future.done()}
+            ready = [
+                widget for widget in pending
+                if all(self.futures[name].done() for name in widget[2])
+            ]
+            for widget in ready:
+                self._draw(*widget)
+                pending.remove(widget)
+            if pending and waiting:
+                wait(waiting, return_when=FIRST_COMPLETED)
+
@@ -0,0 +1,375 @@
+"""
+Module for resolving nested group membership from the osSecurity table.
+
+osSecurity stores membership as strings: each principal lists the groups it
+belongs to (`groups`) and each group lists its members (`members`). Groups can
+contain other groups, so answering "what can this principal access" needs the
+transitive closure of that graph. This module precomputes the closure once into
+a derived table and refreshes it incrementally when osSecurity changes.
+"""
+
+import json
+import re
+from collections import deque
+
+import pandas as pd
+
+# Derived tables maintained by this module
+CLOSURE_TABLE = "groupClosure"
+CLOSURE_STATE_TABLE = "groupClosureState"
+PERMISSION_GRANTS_TABLE = "permissionGrants"
+
+# Permission sets hold tokens such as "*p12:4*" (principal 12, access level 4)
+PERMISSION_TOKEN_PATTERN = r'p([0-9]+):([0-9]+)'
+
+
+def parse_principal_list(value):
+    """Parse a members/groups string into a list of principal identifiers.
+
+    Args:
+        value (str): JSON array or delimited list of osIds
+
+    Returns:
+        list: Principal identifiers (osIds)
+    """
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+
+    value = str(value).strip()
+    if not value or value in ('[]', '{}'):
+        return []
+
+    try:
+        parsed = json.loads(value)
+        if isinstance(parsed, str):
+            parsed = [parsed]
+        if isinstance(parsed, list):
+            principals = []
+            for item in parsed:
+                if isinstance(item, dict):
+                    item = item.get('osId') or item.get('id')
+                if item is not None and str(item).strip():
+                    principals.append(str(item).strip())
+            return principals
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    # Fall back to a delimited list, tolerating stray brackets and quotes
+    parts = re.split(r'[,;\s]+', value.strip('[]{}'))
+    return [part.strip('"\'') for part in parts if part.strip('"\'')]
+
+
+def load_membership_graph(db):
+    """Load osSecurity and build the principal -> group edge list.
+
+    Args:
+        db (DatabaseManager): Database manager
+
+    Returns:
+        tuple: (edges, row_hashes) where edges maps securityId to the set of
+            securityIds of its direct groups, and row_hashes maps securityId
+            to a hash of the row's membership columns
+    """
+    # Read in full: a sample fitting a session's memory budget would corrupt the closure
+    security_df = db.conn.execute("""
+        SELECT
+            securityId,
+            osId,
+            members,
+            "groups",
+            (hash(osId, members, "groups") >> 1)::BIGINT AS rowHash
+        FROM osSecurity
+    """).fetchdf()
+
+    edges = {}
+    row_hashes = {}
+    if security_df.empty:
+        return edges, row_hashes
+
+    id_by_os_id = dict(zip(security_df['osId'], security_df['securityId']))
+
+    for row in security_df.itertuples(index=False):
+        security_id = int(row.securityId)
+        row_hashes[security_id] = int(row.rowHash)
+        edges.setdefault(security_id, set())
+
+        # A principal's own group list: principal -> group
+        for os_id in parse_principal_list(row.groups):
+            group_id = id_by_os_id.get(os_id)
+            if group_id is not None and int(group_id) != security_id:
+                edges[security_id].add(int(group_id))
+
+        # A group's member list: member -> group
+        for os_id in parse_principal_list(row.members):
+            member_id = id_by_os_id.get(os_id)
+            if member_id is not None and int(member_id) != security_id:
+                edges.setdefault(int(member_id), set()).add(security_id)
+
+    return edges, row_hashes
+
+
+def compute_group_closure(edges, principals=None):
+    """Compute all effective groups for each principal.
+
+    Uses a breadth-first search per principal. The visited set makes the search
+    terminate on cyclic memberships, and a principal that reaches itself is
+    reported as part of a cycle.
+
+    Args:
+        edges (dict): Mapping of securityId to the set of direct group securityIds
+        principals (iterable, optional): Principals to resolve. If None, resolves all.
+
+    Returns:
+        tuple: (rows, cyclic) where rows is a list of (securityId, groupId, depth)
+            tuples including a depth-0 row for the principal itself, and cyclic
+            is the set of principals that are members of themselves
+    """
+    if principals is None:
+        principals = edges.keys()
+
+    rows = []
+    cyclic = set()
+
+    for principal in principals:
+        rows.append((principal, principal, 0))
+        visited = {principal}
+        queue = deque([(principal, 0)])
+
+        while queue:
+            node, depth = queue.popleft()
+            for group in edges.get(node, ()):
+                if group == principal:
+                    cyclic.add(principal)
+                if group in visited:
+                    continue
+                visited.add(group)
+                rows.append((principal, group, depth + 1))
+                queue.append((group, depth + 1))
+
+    return rows, cyclic
+
+
+def _write_closure_rows(db, rows):
+    """Append closure rows to the derived closure table."""
+    if not rows:
+        return
+    closure_df = pd.DataFrame(rows, columns=['securityId', 'groupId', 'depth'])
+    db.conn.register('closure_rows_df', closure_df)
+    try:
+        db.conn.execute(f"""
+            INSERT INTO {db.derived_table(CLOSURE_TABLE)}
+            SELECT securityId, groupId, depth FROM closure_rows_df
+        """)
+    finally:
+        db.conn.unregister('closure_rows_df')
+
+
+def _write_state(db, row_hashes):
+    """Replace the stored osSecurity row hashes."""
+    state_df = pd.DataFrame(list(row_hashes.items()), columns=['securityId', 'rowHash'])
+    db.conn.register('closure_state_df', state_df)
+    try:
+        db.conn.execute(f"""
+            CREATE OR REPLACE TABLE {db.derived_table(CLOSURE_STATE_TABLE)} AS
+            SELECT securityId::BIGINT AS securityId, rowHash::BIGINT AS rowHash
+            FROM closure_state_df
+        """)
+    finally:
+        db.conn.unregister('closure_state_df')
+
+
+def refresh_group_closure(db, full=False):
+    """Build or incrementally refresh the group membership closure table.
+
+    Only principals whose effective groups can have changed are recomputed:
+    changed or removed osSecurity rows, their new members, and every principal
+    that previously reached one of them.
+
+    Args:
+        db (DatabaseManager): Database manager
+        full (bool): If True, rebuild the closure from scratch
+
+    Returns:
+        dict: Summary with the refresh mode, number of changed rows,
+            recomputed principals, written rows and principals in cycles
+    """
+    edges, row_hashes = load_membership_graph(db)
+    closure_table = db.derived_table(CLOSURE_TABLE)
+
+    with db.build_lock:
+        has_state = (db.derived_table_exists(CLOSURE_TABLE)
+                     and db.derived_table_exists(CLOSURE_STATE_TABLE))
+
+        if full or not has_state:
+            db.conn.execute(f"""
+                CREATE OR REPLACE TABLE {closure_table} (
+                    securityId BIGINT,
+                    groupId BIGINT,
+                    depth INTEGER
+                )
+            """)
+            rows, cyclic = compute_group_closure(edges, sorted(row_hashes))
+            _write_closure_rows(db, rows)
+            _write_state(db, row_hashes)
+            db.mark_derived_built(CLOSURE_TABLE)
+            return {
+                'mode': 'full',
+                'changed': len(row_hashes),
+                'recomputed': len(row_hashes),
+                'rows': len(rows),
+                'cycles': sorted(cyclic)
+            }
+
+        previous = db.conn.execute(
+            f"SELECT securityId, rowHash FROM {db.derived_table(CLOSURE_STATE_TABLE)}"
+        ).fetchdf()
+        previous_hashes = dict(zip(previous['securityId'].astype(int), previous['rowHash'].astype(int)))
+
+        changed = {sid for sid, h in row_hashes.items() if previous_hashes.get(sid) != h}
+        removed = set(previous_hashes) - set(row_hashes)
+
+        if not changed and not removed:
+            db.mark_derived_built(CLOSURE_TABLE)
+            return {'mode': 'unchanged', 'changed': 0, 'recomputed': 0, 'rows': 0, 'cycles': []}
+
+        # New members of changed groups gain edges into those groups
+        touched = changed | removed
+        touched |= {member for member, groups in edges.items() if groups & changed}
+
+        touched_df = pd.DataFrame({'securityId': sorted(touched)})
+        db.conn.register('closure_touched_df', touched_df)
+        try:
+            reaching = db.conn.execute(f"""
+                SELECT DISTINCT c.securityId
+                FROM {closure_table} c
+                JOIN closure_touched_df t ON c.groupId = t.securityId
+            """).fetchdf()
+        finally:
+            db.conn.unregister('closure_touched_df')
+
+        affected = touched | set(reaching['securityId'].astype(int))
+
+        affected_df = pd.DataFrame({'securityId': sorted(affected)})
+        db.conn.register('closure_affected_df', affected_df)
+        try:
+            db.conn.execute(f"""
+                DELETE FROM {closure_table}
+                WHERE securityId IN (SELECT securityId FROM closure_affected_df)
+            """)
+        finally:
+            db.conn.unregister('closure_affected_df')
+
+        recompute = sorted(sid for sid in affected if sid in row_hashes)
+        rows, cyclic = compute_group_closure(edges, recompute)
+        _write_closure_rows(db, rows)
+        _write_state(db, row_hashes)
+        db.mark_derived_built(CLOSURE_TABLE)
+
+        return {
+            'mode': 'incremental',
+            'changed': len(changed) + len(removed),
+            'recomputed': len(recompute),
+            'rows': len(rows),
+            'cycles': sorted(cyclic)
+        }
+
+
+def refresh_permission_grants(db):
+    """Explode osPermissions permission sets into (permissionId, securityId, level) rows.
+
+    Args:
+        db (DatabaseManager): Database manager
+
+    Returns:
+        int: Number of grant rows written
+    """
+    grants_table = db.derived_table(PERMISSION_GRANTS_TABLE)
+    with db.build_lock:
+        db.conn.execute(f"""
+            CREATE OR REPLACE TABLE {grants_table} AS
+            SELECT DISTINCT
+                permissionId,
+                CAST(regexp_extract(token, '{PERMISSION_TOKEN_PATTERN}', 1) AS BIGINT) AS securityId,
+                CAST(regexp_extract(token, '{PERMISSION_TOKEN_PATTERN}', 2) AS INTEGER) AS level
+            FROM (
+                SELECT
+                    permissionId,
+                    UNNEST(regexp_extract_all(permissionSet, '{PERMISSION_TOKEN_PATTERN}')) AS token
+                FROM osPermissions
+                WHERE permissionSet IS NOT NULL
+            )
+            ORDER BY securityId, permissionId
+        """)
+        db.mark_derived_built(PERMISSION_GRANTS_TABLE)
+        return db.conn.execute(f"SELECT COUNT(*) FROM {grants_table}").fetchone()[0]
+
+
+def ensure_security_tables(db, grants=True):
+    """Refresh the closure and grant tables if the database changed since they were built.
+
+    The closure refresh is incremental, so only principals that can reach a
+    changed osSecurity row are recomputed.
+
+    Args:
+        db (DatabaseManager): Database manager
+        grants (bool): Also refresh the permission grants
+    """
+    if not db.is_derived_current(CLOSURE_TABLE):
+        refresh_group_closure(db)
+    if grants and not db.is_derived_current(PERMISSION_GRANTS_TABLE):
+        refresh_permission_grants(db)
+
+
+def get_effective_groups(db, security_id):
+    """Get all effective groups of a principal from the closure table.
+
+    Args:
+        db (DatabaseManager): Database manager
+        security_id (int): Principal securityId
+
+    Returns:
+        DataFrame: Groups with their name, osId and nesting depth
+    """
+    ensure_security_tables(db, grants=False)
+    return db.query(f"""
+        SELECT
+            c.groupId,
+            s.osId,
+            s.name,
+            c.depth
+        FROM {db.derived_table(CLOSURE_TABLE)} c
+        JOIN osSecurity s ON s.securityId = c.groupId
+        WHERE c.securityId = $security_id
+        ORDER BY c.depth, s.name
+    """, {'security_id': security_id})
+
+
+def effective_access_summary(db, security_id):
+    """Count objects a principal can access, by highest effective access level.
+
+    Args:
+        db (DatabaseManager): Database manager
+        security_id (int): Principal securityId
+
+    Returns:
+        DataFrame: Access level and number of objects granted at that level
+    """
+    ensure_security_tables(db)
+    return db.query(f"""
+        WITH principal_grants AS (
+            SELECT
+                g.permissionId,
+                MAX(g.level) AS level
+            FROM {db.derived_table(CLOSURE_TABLE)} c
+            JOIN {db.derived_table(PERMISSION_GRANTS_TABLE)} g ON g.securityId = c.groupId
+            WHERE c.securityId = $security_id
+            GROUP BY g.permissionId
+        )
+        SELECT
+            pg.level,
+            COUNT(*) AS object_count
+        FROM objects o
+        JOIN principal_grants pg ON o.permissionId = pg.permissionId
+        GROUP BY pg.level
+        ORDER BY pg.level DESC
+    """, {'security_id': security_id})
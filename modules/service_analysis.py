@@ -0,0 +1,298 @@
+"""
+Module for analyzing the services that process and store documents.
+
+Service views are served from a per-service, per-day rollup of instances.
+The rollup is maintained incrementally by batchId: each refresh only
+aggregates instances from batches newer than the last one rolled up, and
+merges them into the existing rows. A checksum over the columns the rollup
+reads detects rows of rolled-up batches that were updated, deleted or
+replaced, in which case the rollup is rebuilt.
+"""
+
+from modules.timestamps import epoch_ms_sql
+
+# Derived tables maintained by this module
+SERVICE_ROLLUP_TABLE = "serviceDailyRollup"
+SERVICE_ROLLUP_STATE_TABLE = "serviceDailyRollupState"
+
+# Aggregates computed for each (serviceId, processPipe, day) group
+_ROLLUP_AGGREGATES = """
+    COUNT(*) AS instance_count,
+    COALESCE(SUM(size), 0) AS total_size,
+    COALESCE(SUM(storeSize), 0) AS total_store_size,
+    COUNT(storeTime) AS stored_count,
+    COALESCE(SUM(CASE WHEN storeTime >= processTime THEN storeTime - processTime END), 0) AS store_latency_ms,
+    COUNT(CASE WHEN storeTime >= processTime THEN 1 END) AS latency_samples
+"""
+
+
+# Checksum of the instance columns the rollup aggregates
+_ROLLUP_CHECKSUM = """
+    COALESCE(SUM(hash(serviceId, processPipe, processTime, size, storeSize, storeTime)), 0)::HUGEINT
+"""
+
+
+def _aggregate_instances_sql(where_clause):
+    """Build the rollup aggregation over instances matching a filter."""
+    return f"""
+        SELECT
+            serviceId,
+            COALESCE(processPipe, '') AS processPipe,
+            CAST({epoch_ms_sql('processTime')} AS DATE) AS day,
+            {_ROLLUP_AGGREGATES}
+        FROM instances
+        {where_clause}
+        GROUP BY ALL
+    """
+
+
+def refresh_service_rollup(db, force=False):
+    """Build or incrementally refresh the per-service daily rollup.
+
+    Batches newer than the watermark are aggregated and merged into the
+    rollup. If the count or checksum of the instances in already rolled-up
+    batches no longer matches the state recorded with the rollup (rows were
+    updated, deleted or replaced, or the database was replaced), the rollup
+    is rebuilt from scratch. The rollup and its state are written in one
+    transaction, so an interrupted refresh never counts a batch twice.
+
+    Args:
+        db (DatabaseManager): Database manager
+        force (bool): If True, rebuild the rollup from scratch
+
+    Returns:
+        dict: Summary with the refresh mode, the batchId watermark and the
+            number of instances aggregated by this call
+    """
+    rollup_table = db.derived_table(SERVICE_ROLLUP_TABLE)
+    state_table = db.derived_table(SERVICE_ROLLUP_STATE_TABLE)
+
+    if not force and db.is_derived_current(SERVICE_ROLLUP_TABLE) and db.derived_table_exists(SERVICE_ROLLUP_STATE_TABLE):
+        watermark = db.conn.execute(f"SELECT watermark FROM {state_table}").fetchone()[0]
+        return {'mode': 'unchanged', 'watermark': watermark, 'instances': 0}
+
+    # Checked again under the lock: another thread may have refreshed it meanwhile
+    with db.build_lock:
+        conn = db.conn
+        state = None
+        if not force and db.derived_table_exists(SERVICE_ROLLUP_TABLE) and db.derived_table_exists(SERVICE_ROLLUP_STATE_TABLE):
+            if db.is_derived_current(SERVICE_ROLLUP_TABLE):
+                watermark = conn.execute(f"SELECT watermark FROM {state_table}").fetchone()[0]
+                return {'mode': 'unchanged', 'watermark': watermark, 'instances': 0}
+            state = _read_rollup_state(db)
+
+        if state is not None:
+            watermark, rolled_up, checksum = state
+            current = conn.execute(f"""
+                SELECT COUNT(*), {_ROLLUP_CHECKSUM}
+                FROM instances
+                WHERE batchId <= $watermark OR batchId IS NULL
+            """, {'watermark': watermark}).fetchone()
+
+            if current == (rolled_up, checksum):
+                new_count, new_watermark, new_checksum = conn.execute(f"""
+                    SELECT COUNT(*), MAX(batchId), {_ROLLUP_CHECKSUM}
+                    FROM instances
+                    WHERE batchId > $watermark
+                """, {'watermark': watermark}).fetchone()
+
+                conn.execute("BEGIN TRANSACTION")
+                try:
+                    if new_count > 0:
+                        conn.execute(f"""
+                            CREATE OR REPLACE TABLE {rollup_table} AS
+                            SELECT
+                                serviceId,
+                                processPipe,
+                                day,
+                                SUM(instance_count)::BIGINT AS instance_count,
+                                SUM(total_size) AS total_size,
+                                SUM(total_store_size) AS total_store_size,
+                                SUM(stored_count)::BIGINT AS stored_count,
+                                SUM(store_latency_ms) AS store_latency_ms,
+                                SUM(latency_samples)::BIGINT AS latency_samples
+                            FROM (
+                                SELECT * FROM {rollup_table}
+                                UNION ALL BY NAME
+                                {_aggregate_instances_sql("WHERE batchId > $watermark")}
+                            )
+                            GROUP BY serviceId, processPipe, day
+                            ORDER BY serviceId, day
+                        """, {'watermark': watermark})
+                        watermark = new_watermark
+
+                    conn.execute(f"""
+                        UPDATE {state_table}
+                        SET watermark = $watermark, instance_count = $count, checksum = $checksum::HUGEINT
+                    """, {'watermark': watermark, 'count': rolled_up + new_count, 'checksum': checksum + new_checksum})
+                    db.mark_derived_built(SERVICE_ROLLUP_TABLE)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                return {'mode': 'incremental', 'watermark': watermark, 'instances': new_count}
+
+        # Full rebuild
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            watermark, instance_count, checksum = conn.execute(
+                f"SELECT MAX(batchId), COUNT(*), {_ROLLUP_CHECKSUM} FROM instances"
+            ).fetchone()
+
+            conn.execute(f"""
+                CREATE OR REPLACE TABLE {rollup_table} AS
+                {_aggregate_instances_sql("")}
+                ORDER BY serviceId, day
+            """)
+            conn.execute(f"""
+                CREATE OR REPLACE TABLE {state_table} AS
+                SELECT
+                    $watermark::BIGINT AS watermark,
+                    $count::BIGINT AS instance_count,
+                    $checksum::HUGEINT AS checksum
+            """, {'watermark': watermark if watermark is not None else -1, 'count': instance_count, 'checksum': checksum})
+            db.mark_derived_built(SERVICE_ROLLUP_TABLE)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {'mode': 'full', 'watermark': watermark, 'instances': instance_count}
+
+
+def _read_rollup_state(db):
+    """Read the watermark, instance count and checksum recorded with the rollup.
+
+    Returns:
+        tuple: (watermark, instance count, checksum), or None if the state
+            predates checksums and the rollup must be rebuilt
+    """
+    state_table = db.derived_table(SERVICE_ROLLUP_STATE_TABLE)
+    columns = {row[0] for row in db.conn.execute(f"DESCRIBE {state_table}").fetchall()}
+    if 'checksum' not in columns:
+        return None
+    return db.conn.execute(f"SELECT watermark, instance_count, checksum FROM {state_table}").fetchone()
+
+
+def _rollup_source(db, where=None):
+    """Get the relation holding per-service daily aggregates.
+
+    Unfiltered reports read the incremental rollup; filtered reports aggregate
+    the matching instances with the same query the rollup is built from.
+    """
+    if where:
+        return f"({_aggregate_instances_sql(f'WHERE {where}')})"
+    refresh_service_rollup(db)
+    return db.derived_table(SERVICE_ROLLUP_TABLE)
+
+
+def service_distribution(db, where=None):
+    """Get instance counts and storage per service.
+
+    Args:
+        db (DatabaseManager): Database manager
+        where (str, optional): SQL filter on instances (see modules.predicates)
+
+    Returns:
+        DataFrame: Service name, instance count and total size
+    """
+    def compute():
+        return db.query(f"""
+            SELECT
+                s.name AS service_name,
+                SUM(r.instance_count)::BIGINT AS instance_count,
+                SUM(r.total_size) AS total_size
+            FROM {_rollup_source(db, where)} r
+            JOIN services s ON r.serviceId = s.serviceId
+            GROUP BY s.name
+            ORDER BY instance_count DESC
+        """)
+
+    return db.cache.get_or_compute('service_distribution', where, db.get_fingerprint(), compute)
+
+
+def service_throughput(db, granularity='day', where=None):
+    """Get processed instances and bytes per service over time.
+
+    Args:
+        db (DatabaseManager): Database manager
+        granularity (str): 'day', 'week' or 'month'
+        where (str, optional): SQL filter on instances (see modules.predicates)
+
+    Returns:
+        DataFrame: Period, service name, processed instances, bytes and
+            average store latency in seconds
+    """
+    if granularity not in ('day', 'week', 'month'):
+        raise ValueError(f"Unsupported granularity: {granularity}")
+
+    key = (granularity, where)
+    def compute():
+        return db.query(f"""
+            SELECT
+                DATE_TRUNC('{granularity}', r.day) AS period,
+                s.name AS service_name,
+                SUM(r.instance_count)::BIGINT AS instance_count,
+                SUM(r.total_size) AS total_size,
+                SUM(r.store_latency_ms) / NULLIF(SUM(r.latency_samples), 0) / 1000 AS avg_store_latency_s
+            FROM {_rollup_source(db, where)} r
+            JOIN services s ON r.serviceId = s.serviceId
+            WHERE r.day IS NOT NULL
+            GROUP BY period, s.name
+            ORDER BY period, s.name
+        """)
+
+    return db.cache.get_or_compute('service_throughput', key, db.get_fingerprint(), compute)
+
+
+def service_compression(db, where=None):
+    """Get stored size versus original size per service.
+
+    Args:
+        db (DatabaseManager): Database manager
+        where (str, optional): SQL filter on instances (see modules.predicates)
+
+    Returns:
+        DataFrame: Service name, original and stored bytes, and compression
+            ratio (original / stored)
+    """
+    def compute():
+        return db.query(f"""
+            SELECT
+                s.name AS service_name,
+                SUM(r.total_size) AS total_size,
+                SUM(r.total_store_size) AS total_store_size,
+                SUM(r.stored_count)::BIGINT AS stored_count,
+                SUM(r.total_size) / NULLIF(SUM(r.total_store_size), 0) AS compression_ratio
+            FROM {_rollup_source(db, where)} r
+            JOIN services s ON r.serviceId = s.serviceId
+            GROUP BY s.name
+            ORDER BY total_size DESC
+        """)
+
+    return db.cache.get_or_compute('service_compression', where, db.get_fingerprint(), compute)
+
+
+def service_pipe_breakdown(db, where=None):
+    """Get instance counts per service and processing pipe.
+
+    Args:
+        db (DatabaseManager): Database manager
+        where (str, optional): SQL filter on instances (see modules.predicates)
+
+    Returns:
+        DataFrame: Service name, process pipe, instance count and total size
+    """
+    def compute():
+        return db.query(f"""
+            SELECT
+                s.name AS service_name,
+                CASE WHEN r.processPipe = '' THEN 'None' ELSE r.processPipe END AS process_pipe,
+                SUM(r.instance_count)::BIGINT AS instance_count,
+                SUM(r.total_size) AS total_size
+            FROM {_rollup_source(db, where)} r
+            JOIN services s ON r.serviceId = s.serviceId
+            GROUP BY s.name, process_pipe
+            ORDER BY s.name, instance_count DESC
+        """)
+
+    return db.cache.get_or_compute('service_pipe_breakdown', where, db.get_fingerprint(), compute)
@@ -0,0 +1,494 @@
+"""
+Module providing mergeable sketches for size distributions and distinct counts.
+
+Sketches summarize a stream of values in bounded memory and can be updated
+batch by batch (e.g. from Arrow record batches of a DuckDB cursor), merged
+across shards and serialized to plain dicts for caching:
+
+- TDigest: approximate quantiles with accuracy concentrated in the tails
+- LogHistogram: exact counts in fixed logarithmic buckets
+- SizeSketch: count/sum/min/max/mean/std, a t-digest, a log histogram and the
+  size category counts reported by size_distribution_analysis
+- HyperLogLog: approximate distinct counts of a column; its registers are
+  computed by DuckDB in the same pass as other aggregates (hll_registers_sql)
+"""
+
+import numpy as np
+import pyarrow.compute as pc
+
+# Size categories as (name, lower bound inclusive, upper bound exclusive)
+SIZE_CATEGORIES = [
+    ('tiny', 0, 1024),  # 0-1KB
+    ('small', 1024, 1024*1024),  # 1KB-1MB
+    ('medium', 1024*1024, 1024*1024*10),  # 1MB-10MB
+    ('large', 1024*1024*10, 1024*1024*100),  # 10MB-100MB
+    ('huge', 1024*1024*100, float('inf'))  # >100MB
+]
+
+# Percentiles reported in size summaries
+SUMMARY_PERCENTILES = [10, 25, 50, 75, 90, 95, 99]
+
+# Number of rows per Arrow batch when streaming from DuckDB
+STREAM_BATCH_SIZE = 1_000_000
+
+# Default HyperLogLog precision: 2**12 registers, about 1.6% standard error
+HLL_PRECISION = 12
+
+
+class TDigest:
+    """Merging t-digest for approximate quantiles."""
+
+    def __init__(self, compression=200):
+        """Initialize an empty digest.
+
+        Args:
+            compression (int): Controls accuracy; the digest keeps about
+                compression / 2 centroids
+        """
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        """Total weight of the digest."""
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """Add a batch of values.
+
+        Args:
+            values (array-like): Values to add; NaNs are ignored
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))])
+        )
+
+    def merge(self, other):
+        """Merge another digest into this one.
+
+        Args:
+            other (TDigest): Digest to merge
+        """
+        if len(other.means) == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights])
+        )
+
+    def _compress(self, means, weights):
+        """Merge sorted centroids whose midpoints share a unit of the k1 scale."""
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+
+        total = weights.sum()
+        q_mid = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        _, groups = np.unique(np.floor(k), return_inverse=True)
+
+        merged_weights = np.bincount(groups, weights=weights)
+        self.means = np.bincount(groups, weights=means * weights) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q):
+        """Estimate a quantile.
+
+        Args:
+            q (float or array-like): Quantile(s) between 0 and 1
+
+        Returns:
+            float or ndarray: Estimated value(s), NaN if the digest is empty
+        """
+        if len(self.means) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+
+        total = self.weights.sum()
+        midpoints = np.cumsum(self.weights) - self.weights / 2
+        return np.interp(
+            np.asarray(q) * total,
+            np.concatenate([[0], midpoints, [total]]),
+            np.concatenate([[self.min], self.means, [self.max]])
+        )
+
+    def to_dict(self):
+        """Serialize the digest to a JSON-compatible dict."""
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': float(self.min),
+            'max': float(self.max)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a digest serialized with to_dict."""
+        digest = cls(data['compression'])
+        digest.means = np.asarray(data['means'], dtype=float)
+        digest.weights = np.asarray(data['weights'], dtype=float)
+        digest.min = data['min']
+        digest.max = data['max']
+        return digest
+
+
+class LogHistogram:
+    """Histogram with fixed logarithmic buckets.
+
+    Bucket 0 holds values below 1 (including zero); bucket k >= 1 holds values
+    in [base**(k-1), base**k).
+    """
+
+    def __init__(self, base=2, max_value=2**63):
+        """Initialize an empty histogram.
+
+        Args:
+            base (int): Logarithm base of the bucket edges
+            max_value (float): Largest value the buckets need to cover
+        """
+        self.base = base
+        self.num_buckets = int(np.ceil(np.log(max_value) / np.log(base))) + 2
+        self.counts = np.zeros(self.num_buckets, dtype=np.int64)
+
+    def edges(self):
+        """Get the bucket edges (num_buckets + 1 values)."""
+        return np.concatenate([[0.0], float(self.base) ** np.arange(self.num_buckets)])
+
+    def bucket_index(self, values):
+        """Get the bucket index of each value."""
+        values = np.asarray(values, dtype=float)
+        index = np.zeros(len(values), dtype=np.int64)
+        positive = values >= 1
+        index[positive] = np.floor(np.log(values[positive]) / np.log(self.base)).astype(np.int64) + 1
+
+        # Correct floating point rounding at exact powers of the base
+        lower = float(self.base) ** (index - 1)
+        index[positive & (values < lower)] -= 1
+        index[positive & (values >= lower * self.base)] += 1
+        return np.clip(index, 0, self.num_buckets - 1)
+
+    def update(self, values):
+        """Add a batch of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.counts += np.bincount(self.bucket_index(values), minlength=self.num_buckets)
+
+    def merge(self, other):
+        """Merge another histogram with the same base into this one."""
+        if other.base != self.base or other.num_buckets != self.num_buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts += other.counts
+
+    def nonempty(self):
+        """Get edges and counts trimmed to the range of non-empty buckets.
+
+        Returns:
+            tuple: (edges, counts) lists with len(edges) == len(counts) + 1
+        """
+        filled = np.nonzero(self.counts)[0]
+        if len(filled) == 0:
+            return [], []
+        first, last = filled[0], filled[-1]
+        return self.edges()[first:last + 2].tolist(), self.counts[first:last + 1].tolist()
+
+    def to_dict(self):
+        """Serialize the histogram to a JSON-compatible dict."""
+        return {'base': self.base, 'counts': self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a histogram serialized with to_dict."""
+        histogram = cls(data['base'])
+        histogram.num_buckets = len(data['counts'])
+        histogram.counts = np.asarray(data['counts'], dtype=np.int64)
+        return histogram
+
+
+class SizeSketch:
+    """Mergeable summary of a size distribution."""
+
+    def __init__(self, compression=200, base=2):
+        """Initialize an empty sketch.
+
+        Args:
+            compression (int): t-digest compression
+            base (int): Logarithm base of the histogram buckets
+        """
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.digest = TDigest(compression)
+        self.histogram = LogHistogram(base)
+        self.category_edges = np.array([low for _, low, _ in SIZE_CATEGORIES], dtype=float)
+        self.category_counts = np.zeros(len(SIZE_CATEGORIES), dtype=np.int64)
+
+    def update(self, values):
+        """Add a batch of sizes.
+
+        Args:
+            values (array-like): Sizes in bytes; NaNs are ignored
+        """
+        raw = np.asarray(values)
+        values = raw.astype(float)
+        valid = ~np.isnan(values)
+        values = values[valid]
+        n = len(values)
+        if n == 0:
+            return
+
+        # Integer sizes are summed exactly; float sums are rounded
+        total = int(raw[valid].sum()) if np.issubdtype(raw.dtype, np.integer) else int(round(values.sum()))
+        mean = values.mean()
+        self._combine_moments(n, total, mean, ((values - mean) ** 2).sum())
+        self.digest.update(values)
+        self.histogram.update(values)
+
+        category = np.searchsorted(self.category_edges, values, side='right') - 1
+        self.category_counts += np.bincount(category[category >= 0], minlength=len(SIZE_CATEGORIES))
+
+    def update_arrow(self, array):
+        """Add sizes from an Arrow array or chunked array."""
+        array = pc.drop_null(array)
+        if len(array):
+            self.update(array.to_numpy(zero_copy_only=False))
+
+    def merge(self, other):
+        """Merge another sketch into this one.
+
+        Args:
+            other (SizeSketch): Sketch to merge
+        """
+        if other.count == 0:
+            return
+        self._combine_moments(other.count, other.total, other.mean, other.m2)
+        self.digest.merge(other.digest)
+        self.histogram.merge(other.histogram)
+        self.category_counts += other.category_counts
+
+    def _combine_moments(self, n, total, mean, m2):
+        """Combine count, sum, mean and sum of squared deviations (Chan et al.)."""
+        combined = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / combined
+        self.m2 += m2 + delta ** 2 * self.count * n / combined
+        self.count = combined
+        self.total += total
+
+    def summary(self):
+        """Summarize the sketch in the format of size_distribution_analysis.
+
+        Returns:
+            dict: Count, min, max, mean, median, std, total, percentiles,
+                size category counts and the non-empty log histogram
+        """
+        if self.count == 0:
+            return {}
+
+        stats = {
+            'count': self.count,
+            'min': self.digest.min,
+            'max': self.digest.max,
+            'mean': self.mean,
+            'median': float(self.digest.quantile(0.5)),
+            'std': float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float('nan'),
+            'total': self.total
+        }
+
+        for p, value in zip(SUMMARY_PERCENTILES, self.digest.quantile(np.array(SUMMARY_PERCENTILES) / 100)):
+            stats[f'p{p}'] = float(value)
+
+        stats['categories'] = {
+            name: int(count) for (name, _, _), count in zip(SIZE_CATEGORIES, self.category_counts)
+        }
+
+        bins, counts = self.histogram.nonempty()
+        stats['histogram'] = {
+            'counts': counts,
+            'bins': bins
+        }
+        return stats
+
+    def to_dict(self):
+        """Serialize the sketch to a JSON-compatible dict."""
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'm2': self.m2,
+            'digest': self.digest.to_dict(),
+            'histogram': self.histogram.to_dict(),
+            'category_counts': self.category_counts.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a sketch serialized with to_dict."""
+        sketch = cls(data['digest']['compression'], data['histogram']['base'])
+        sketch.count = data['count']
+        sketch.total = data['total']
+        sketch.mean = data['mean']
+        sketch.m2 = data['m2']
+        sketch.digest = TDigest.from_dict(data['digest'])
+        sketch.histogram = LogHistogram.from_dict(data['histogram'])
+        sketch.category_counts = np.asarray(data['category_counts'], dtype=np.int64)
+        return sketch
+
+
+class HyperLogLog:
+    """HyperLogLog sketch of the distinct 64-bit hashes of a column.
+
+    The top `precision` bits of a hash select a register; the register keeps
+    the maximum rank (position of the first set bit, counted from 1) of the
+    remaining bits.
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        """Initialize an empty sketch.
+
+        Args:
+            precision (int): Number of index bits (4-16); the sketch has
+                2**precision registers
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def from_registers(cls, indexes, ranks, precision=HLL_PRECISION):
+        """Build a sketch from (register, rank) pairs, e.g. from hll_registers_sql.
+
+        Args:
+            indexes (array-like): Register indexes
+            ranks (array-like): Ranks; the maximum per register is kept
+            precision (int): Precision the pairs were computed with
+        """
+        sketch = cls(precision)
+        np.maximum.at(sketch.registers, np.asarray(indexes, dtype=np.int64), np.asarray(ranks, dtype=np.uint8))
+        return sketch
+
+    def update(self, hashes):
+        """Add a batch of 64-bit hashes."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        q = 64 - self.precision
+        indexes = (hashes >> np.uint64(q)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << q) - 1)
+        ranks = np.full(len(hashes), q + 1, dtype=np.uint8)
+        nonzero = remainder > 0
+        # Exact for q <= 53 bits, where the remainder fits a double's mantissa
+        ranks[nonzero] = q - np.floor(np.log2(remainder[nonzero].astype(float))).astype(np.uint8)
+        np.maximum.at(self.registers, indexes, ranks)
+
+    def merge(self, other):
+        """Merge another sketch with the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precisions")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def union(self, other):
+        """Get a new sketch of the union of this sketch and another."""
+        sketch = HyperLogLog(self.precision)
+        sketch.registers = self.registers.copy()
+        sketch.merge(other)
+        return sketch
+
+    def count(self):
+        """Estimate the number of distinct values.
+
+        Uses linear counting while empty registers remain and the raw
+        estimate is small.
+
+        Returns:
+            float: Estimated distinct count
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty > 0:
+            return m * np.log(m / empty)
+        return estimate
+
+    def to_dict(self):
+        """Serialize the sketch to a JSON-compatible dict."""
+        return {'precision': self.precision, 'registers': self.registers.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a sketch serialized with to_dict."""
+        sketch = cls(data['precision'])
+        sketch.registers = np.asarray(data['registers'], dtype=np.uint8)
+        return sketch
+
+
+def hll_registers_sql(relation, columns, precision=HLL_PRECISION):
+    """Build a query computing the HyperLogLog registers of several columns in one pass.
+
+    NULLs are ignored. Values hash alike only if they have the same type, so
+    sketches of columns with different types do not overlap.
+
+    Args:
+        relation (str): Table name or subquery (quoted as needed)
+        columns (list): Column names
+        precision (int): Sketch precision
+
+    Returns:
+        str: Query returning (column_name, register, rank) rows, one per
+            non-empty register; feed them to HyperLogLog.from_registers
+    """
+    q = 64 - precision
+    hashed = ', '.join(
+        f'CASE WHEN "{column}" IS NOT NULL THEN hash("{column}") END AS "{column}"'
+        for column in columns
+    )
+    names = ', '.join(f'"{column}"' for column in columns)
+    remainder = f"(h & ((1::UBIGINT << {q}) - 1))"
+    return f"""
+        SELECT
+            column_name,
+            (h >> {q})::INTEGER AS register,
+            MAX(CASE WHEN {remainder} = 0 THEN {q + 1}
+                     ELSE {q} - FLOOR(LOG2({remainder}::DOUBLE))::INTEGER END) AS rank
+        FROM (UNPIVOT (SELECT {hashed} FROM {relation}) ON {names} INTO NAME column_name VALUE h)
+        GROUP BY ALL
+    """
+
+
+def sketch_query(db, sql, params=None, batch_size=STREAM_BATCH_SIZE, sketch=None):
+    """Stream the first column of a query into a size sketch.
+
+    The query runs on its own cursor and is consumed as Arrow record batches,
+    so memory use is bounded by the batch size regardless of the row count.
+
+    Args:
+        db (DatabaseManager): Database manager
+        sql (str): Query whose first column holds the sizes
+        params (dict, optional): Query parameters
+        batch_size (int): Rows per Arrow batch
+        sketch (SizeSketch, optional): Sketch to update; a new one by default
+
+    Returns:
+        SizeSketch: The updated sketch
+    """
+    sketch = sketch or SizeSketch()
+    cursor = db.conn.cursor()
+    try:
+        reader = cursor.execute(sql, params or {}).fetch_record_batch(batch_size)
+        for batch in reader:
+            sketch.update_arrow(batch.column(0))
+    finally:
+        cursor.close()
+    return sketch
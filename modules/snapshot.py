@@ -0,0 +1,244 @@
+"""
+Module for Parquet snapshots of the Aparavi database.
+
+The Aparavi collector writes to its DuckDB file continuously, so the dashboard
+should not hold it open. In snapshot mode the tables are exported periodically
+to ZSTD-compressed Parquet (utils/snapshot_database.py) and DatabaseManager
+connects to an in-memory database with one view per table over those files.
+
+- Heavy columns only a few reports need (instances.metadata) are left out of
+  the main dataset and written to a sidecar dataset (instanceMetadata)
+- Large tables are partitioned and sorted on the columns reports filter on,
+  so DuckDB skips whole files and row groups
+- Each export goes to a new version directory; the manifest is replaced
+  atomically once the export is complete, and older versions are pruned
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import duckdb
+
+# File naming the current snapshot version
+MANIFEST_FILE = "manifest.json"
+
+# Catalog name the source database is attached under while exporting
+SOURCE_CATALOG = "source_db"
+
+# Number of snapshot versions kept on disk (the current one included), so
+# dashboards still reading the previous version are not broken mid-query
+SNAPSHOT_KEEP = 2
+
+# Export options per table; tables not listed are exported with all columns
+SNAPSHOT_TABLES = {
+    'objects': {
+        'sort': ['parentId', 'extension']
+    },
+    'instances': {
+        'exclude': ['metadata'],
+        'partition_by': ['serviceId'],
+        'sort': ['createTime']
+    }
+}
+
+# Sidecar datasets holding excluded columns: name -> (table, columns, filter)
+SIDECAR_TABLES = {
+    'instanceMetadata': (
+        'instances',
+        ['instanceId', 'objectId', 'metadata'],
+        "metadata IS NOT NULL AND metadata != ''"
+    )
+}
+
+
+def _quote_path(path):
+    """Quote a file path as a SQL string literal."""
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def read_manifest(snapshot_dir):
+    """Read the manifest of the current snapshot.
+
+    Args:
+        snapshot_dir (str): Snapshot directory
+
+    Returns:
+        dict: Manifest, or None if no snapshot has been written yet
+    """
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _export_query(conn, query, target, partition_by=None):
+    """Write a query result to a Parquet dataset directory."""
+    os.makedirs(target, exist_ok=True)
+    options = "FORMAT PARQUET, COMPRESSION ZSTD"
+    if partition_by:
+        conn.execute(f"COPY ({query}) TO {_quote_path(target)} ({options}, PARTITION_BY ({', '.join(partition_by)}))")
+    else:
+        conn.execute(f"COPY ({query}) TO {_quote_path(os.path.join(target, 'data.parquet'))} ({options})")
+
+
+def write_snapshot(source_path, snapshot_dir, keep=SNAPSHOT_KEEP):
+    """Export the source database to a new Parquet snapshot version.
+
+    Args:
+        source_path (str): Source DuckDB database (attached read-only)
+        snapshot_dir (str): Snapshot directory
+        keep (int): Number of snapshot versions to keep on disk
+
+    Returns:
+        dict: Manifest of the new snapshot
+    """
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    version_dir = os.path.join(snapshot_dir, version)
+    os.makedirs(version_dir)
+
+    conn = duckdb.connect()
+    try:
+        conn.execute(f"ATTACH {_quote_path(source_path)} AS {SOURCE_CATALOG} (READ_ONLY)")
+        columns = {}
+        for table, column, data_type in conn.execute("""
+            SELECT table_name, column_name, data_type
+            FROM duckdb_columns()
+            WHERE database_name = ? AND schema_name = 'main'
+            ORDER BY table_name, column_index
+        """, [SOURCE_CATALOG]).fetchall():
+            columns.setdefault(table, []).append((column, data_type))
+
+        datasets = {}
+        for table, table_columns in columns.items():
+            options = SNAPSHOT_TABLES.get(table, {})
+            names = [name for name, _ in table_columns]
+            selected = [(name, data_type) for name, data_type in table_columns if name not in options.get('exclude', [])]
+            sort = [column for column in options.get('sort', []) if column in names]
+            source = f"{SOURCE_CATALOG}.main.{table}"
+
+            rows = conn.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0]
+            # Partitioned writes of an empty table produce no files to read back
+            partition_by = [column for column in options.get('partition_by', []) if column in names] if rows else []
+
+            query = f"SELECT {', '.join(name for name, _ in selected)} FROM {source}"
+            if sort:
+                query += f" ORDER BY {', '.join(sort)}"
+            _export_query(conn, query, os.path.join(version_dir, table), partition_by)
+
+            datasets[table] = {
+                'columns': selected,
+                'partition_by': partition_by,
+                'rows': rows
+            }
+
+        for name, (table, sidecar_columns, condition) in SIDECAR_TABLES.items():
+            available = dict(columns.get(table, []))
+            if not all(column in available for column in sidecar_columns):
+                continue
+            query = f"SELECT {', '.join(sidecar_columns)} FROM {SOURCE_CATALOG}.main.{table} WHERE {condition}"
+            rows = conn.execute(f"SELECT COUNT(*) FROM ({query})").fetchone()[0]
+            _export_query(conn, query, os.path.join(version_dir, name))
+            datasets[name] = {
+                'columns': [(column, available[column]) for column in sidecar_columns],
+                'partition_by': [],
+                'rows': rows
+            }
+    except Exception:
+        # Leave no partial version behind; the current manifest is untouched
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+    finally:
+        conn.close()
+
+    manifest = {
+        'version': version,
+        'source': os.path.abspath(source_path),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'datasets': datasets
+    }
+
+    # Replace the manifest atomically so readers never see a partial snapshot
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    prune_snapshots(snapshot_dir, keep)
+    return manifest
+
+
+def prune_snapshots(snapshot_dir, keep=SNAPSHOT_KEEP):
+    """Delete all but the newest snapshot versions.
+
+    Args:
+        snapshot_dir (str): Snapshot directory
+        keep (int): Number of versions to keep
+
+    Returns:
+        list: Deleted version names
+    """
+    manifest = read_manifest(snapshot_dir)
+    versions = sorted(
+        entry for entry in os.listdir(snapshot_dir)
+        if os.path.isdir(os.path.join(snapshot_dir, entry))
+    )
+    stale = [
+        version for version in versions[:-max(keep, 1)]
+        if manifest is None or version != manifest['version']
+    ]
+    for version in stale:
+        shutil.rmtree(os.path.join(snapshot_dir, version), ignore_errors=True)
+    return stale
+
+
+def create_snapshot_views(conn, snapshot_dir):
+    """Create one view per dataset of the current snapshot.
+
+    Views keep the source table's column names, order and types, so report
+    queries run unchanged against them.
+
+    Args:
+        conn: DuckDB connection
+        snapshot_dir (str): Snapshot directory
+
+    Returns:
+        dict: Manifest of the snapshot the views point to
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No snapshot found in {snapshot_dir}")
+
+    version_dir = os.path.join(os.path.abspath(snapshot_dir), manifest['version'])
+    for name, dataset in manifest['datasets'].items():
+        types = dict(dataset['columns'])
+        options = "hive_partitioning = true"
+        if dataset['partition_by']:
+            hive_types = ", ".join(f"'{column}': '{types[column]}'" for column in dataset['partition_by'])
+            options += f", hive_types = {{{hive_types}}}"
+        files = _quote_path(os.path.join(version_dir, name, "**", "*.parquet"))
+        conn.execute(f"""
+            CREATE OR REPLACE VIEW {name} AS
+            SELECT {', '.join(column for column, _ in dataset['columns'])}
+            FROM read_parquet({files}, {options})
+        """)
+    return manifest
+
+
+def metadata_source(db):
+    """Get the table holding instance metadata.
+
+    Snapshots keep instances.metadata in a sidecar dataset with the instanceId,
+    objectId and metadata columns; live databases read it from instances.
+
+    Args:
+        db (DatabaseManager): Database manager
+
+    Returns:
+        str: Table or view name
+    """
+    if db.snapshot and 'instanceMetadata' in db.snapshot['datasets']:
+        return 'instanceMetadata'
+    return 'instances'
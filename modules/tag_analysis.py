@@ -0,0 +1,310 @@
+"""
+Module for analyzing document tags.
+
+Tags are stored as JSON-ish strings in objects.tags, instances.tags and
+tagSets.tagSet. The same tag set string repeats across many rows, so each
+distinct string is parsed once and dictionary-encoded:
+
+- tagSetDictionary: one row per distinct tag set string with a tagSetKey
+- tagSetBridge: (tagSetKey, tag) rows, one per tag in the set
+- tagSetUsage: object/instance counts and sizes per tagSetKey
+
+Per-tag counts, co-occurrence and tag filters are then served from these
+small tables instead of string comparisons over every object.
+"""
+
+import json
+import re
+
+import pandas as pd
+
+# Derived tables maintained by this module
+TAG_DICTIONARY_TABLE = "tagSetDictionary"
+TAG_BRIDGE_TABLE = "tagSetBridge"
+TAG_USAGE_TABLE = "tagSetUsage"
+
+
+def parse_tag_set(value):
+    """Parse a tag set string into a list of tags.
+
+    Args:
+        value (str): JSON array/object or delimited list of tags
+
+    Returns:
+        list: Unique tags in order of appearance
+    """
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+
+    value = str(value).strip()
+    if not value or value in ('[]', '{}'):
+        return []
+
+    tags = []
+    try:
+        parsed = json.loads(value)
+        if isinstance(parsed, dict):
+            parsed = [{key: item} for key, item in parsed.items()]
+        if not isinstance(parsed, list):
+            parsed = [parsed]
+
+        for item in parsed:
+            if isinstance(item, dict):
+                # Key/value tags become "key=value"
+                if 'key' in item:
+                    tag = f"{item['key']}={item['value']}" if item.get('value') not in (None, '') else str(item['key'])
+                    tags.append(tag)
+                else:
+                    tags.extend(f"{key}={item_value}" for key, item_value in item.items())
+            elif item is not None and str(item).strip():
+                tags.append(str(item).strip())
+    except (json.JSONDecodeError, TypeError):
+        parts = re.split(r'[,;]+', value.strip('[]{}'))
+        tags = [part.strip().strip('"\'') for part in parts]
+
+    unique_tags = []
+    for tag in tags:
+        if tag and tag not in unique_tags:
+            unique_tags.append(tag)
+    return unique_tags
+
+
+def build_tag_tables(db, force=False):
+    """Build the tag set dictionary, bridge and usage tables.
+
+    Args:
+        db (DatabaseManager): Database manager
+        force (bool): If True, rebuild even if the tables are current
+
+    Returns:
+        str: Qualified name of the bridge table
+    """
+    dictionary_table = db.derived_table(TAG_DICTIONARY_TABLE)
+    bridge_table = db.derived_table(TAG_BRIDGE_TABLE)
+    usage_table = db.derived_table(TAG_USAGE_TABLE)
+
+    if not force and db.is_derived_current(TAG_USAGE_TABLE):
+        return bridge_table
+
+    with db.build_lock:
+        # Another thread may have built it while this one waited
+        if not force and db.is_derived_current(TAG_USAGE_TABLE):
+            return bridge_table
+
+        # Dictionary-encode every distinct tag set string
+        db.conn.execute(f"""
+            CREATE OR REPLACE TABLE {dictionary_table} AS
+            SELECT
+                row_number() OVER (ORDER BY tagSet) AS tagSetKey,
+                tagSet
+            FROM (
+                SELECT tagSet FROM tagSets WHERE tagSet IS NOT NULL
+                UNION
+                SELECT tags FROM objects WHERE tags IS NOT NULL
+                UNION
+                SELECT tags FROM instances WHERE tags IS NOT NULL
+            )
+        """)
+
+        # Parse each distinct string once, read in full outside any memory budget
+        dictionary_df = db.conn.execute(f"SELECT tagSetKey, tagSet FROM {dictionary_table}").fetchdf()
+        bridge_rows = [
+            (tag_set_key, tag)
+            for tag_set_key, tag_set in zip(dictionary_df['tagSetKey'], dictionary_df['tagSet'])
+            for tag in parse_tag_set(tag_set)
+        ]
+        bridge_df = pd.DataFrame(bridge_rows, columns=['tagSetKey', 'tag'])
+
+        db.conn.register('tag_bridge_df', bridge_df)
+        try:
+            db.conn.execute(f"""
+                CREATE OR REPLACE TABLE {bridge_table} AS
+                SELECT tagSetKey::BIGINT AS tagSetKey, tag::VARCHAR AS tag
+                FROM tag_bridge_df
+                ORDER BY tag, tagSetKey
+            """)
+        finally:
+            db.conn.unregister('tag_bridge_df')
+
+        # Objects and instances are grouped by their raw string, which DuckDB
+        # evaluates on the dictionary-compressed column
+        db.conn.execute(f"""
+            CREATE OR REPLACE TABLE {usage_table} AS
+            WITH object_usage AS (
+                SELECT
+                    tags AS tagSet,
+                    COUNT(*) AS object_count,
+                    COALESCE(SUM(primarySize), 0)::BIGINT AS object_size
+                FROM objects
+                WHERE tags IS NOT NULL
+                GROUP BY tags
+            ),
+            instance_usage AS (
+                SELECT
+                    COALESCE(ts.tagSet, i.tags) AS tagSet,
+                    COUNT(*) AS instance_count,
+                    COALESCE(SUM(i.size), 0)::BIGINT AS instance_size
+                FROM instances i
+                LEFT JOIN tagSets ts ON ts.tagSetId = i.tagSetId
+                WHERE COALESCE(ts.tagSet, i.tags) IS NOT NULL
+                GROUP BY ALL
+            )
+            SELECT
+                d.tagSetKey,
+                (SELECT COUNT(*) FROM {bridge_table} b WHERE b.tagSetKey = d.tagSetKey) AS tag_count,
+                COALESCE(o.object_count, 0) AS object_count,
+                COALESCE(o.object_size, 0) AS object_size,
+                COALESCE(i.instance_count, 0) AS instance_count,
+                COALESCE(i.instance_size, 0) AS instance_size
+            FROM {dictionary_table} d
+            LEFT JOIN object_usage o ON o.tagSet = d.tagSet
+            LEFT JOIN instance_usage i ON i.tagSet = d.tagSet
+            ORDER BY d.tagSetKey
+        """)
+        db.mark_derived_built(TAG_USAGE_TABLE)
+        return bridge_table
+
+
+def tag_presence(db):
+    """Count objects with and without tags.
+
+    Args:
+        db (DatabaseManager): Database manager
+
+    Returns:
+        DataFrame: 'Has Tags' / 'No Tags' and object count
+    """
+    build_tag_tables(db)
+    presence = db.query(f"""
+        WITH tagged AS (
+            SELECT
+                CASE WHEN tag_count > 0 THEN 'Has Tags' ELSE 'No Tags' END AS tag_key,
+                SUM(object_count) AS count
+            FROM {db.derived_table(TAG_USAGE_TABLE)}
+            GROUP BY tag_key
+        )
+        SELECT tag_key, count::BIGINT AS count FROM tagged
+        UNION ALL
+        -- Objects whose tags column is NULL never reach the dictionary
+        SELECT 'No Tags', COUNT(*) FROM objects WHERE tags IS NULL
+    """)
+    if presence.empty:
+        # The query failed; there is nothing to group
+        return presence
+    return presence.groupby('tag_key', as_index=False)['count'].sum()
+
+
+def tag_counts(db, limit=None):
+    """Get object/instance counts and sizes per tag.
+
+    Args:
+        db (DatabaseManager): Database manager
+        limit (int, optional): Maximum number of tags to return
+
+    Returns:
+        DataFrame: Tag, object count, instance count and sizes
+    """
+    build_tag_tables(db)
+    limit_clause = f"LIMIT {int(limit)}" if limit else ""
+    return db.query(f"""
+        SELECT
+            b.tag,
+            SUM(u.object_count)::BIGINT AS object_count,
+            SUM(u.object_size)::BIGINT AS object_size,
+            SUM(u.instance_count)::BIGINT AS instance_count,
+            SUM(u.instance_size)::BIGINT AS instance_size
+        FROM {db.derived_table(TAG_BRIDGE_TABLE)} b
+        JOIN {db.derived_table(TAG_USAGE_TABLE)} u ON u.tagSetKey = b.tagSetKey
+        GROUP BY b.tag
+        ORDER BY object_count DESC, instance_count DESC
+        {limit_clause}
+    """)
+
+
+def tag_cooccurrence(db, top_n=15):
+    """Get a co-occurrence matrix of the most used tags.
+
+    Args:
+        db (DatabaseManager): Database manager
+        top_n (int): Number of most used tags to include
+
+    Returns:
+        DataFrame: Square matrix of object counts, indexed and labelled by tag
+    """
+    top_tags = tag_counts(db, limit=top_n)
+    if top_tags.empty:
+        return pd.DataFrame()
+
+    tags = top_tags['tag'].tolist()
+    pairs = db.query(f"""
+        SELECT
+            a.tag AS tag_a,
+            b.tag AS tag_b,
+            SUM(u.object_count)::BIGINT AS count
+        FROM {db.derived_table(TAG_BRIDGE_TABLE)} a
+        JOIN {db.derived_table(TAG_BRIDGE_TABLE)} b ON a.tagSetKey = b.tagSetKey
+        JOIN {db.derived_table(TAG_USAGE_TABLE)} u ON u.tagSetKey = a.tagSetKey
+        WHERE a.tag IN ({_sql_list(tags)}) AND b.tag IN ({_sql_list(tags)})
+        GROUP BY a.tag, b.tag
+    """)
+    if pairs.empty:
+        return pd.DataFrame()
+
+    matrix = pairs.pivot(index='tag_a', columns='tag_b', values='count')
+    return matrix.reindex(index=tags, columns=tags).fillna(0).astype(int)
+
+
+def tagged_sets_sql(db, tags, match_all=False):
+    """Build a subquery of the tag set strings that contain the given tags.
+
+    Args:
+        db (DatabaseManager): Database manager
+        tags (list): Tags to look for
+        match_all (bool): If True, require every tag; otherwise any tag
+
+    Returns:
+        str: SQL subquery selecting tagSet strings
+    """
+    build_tag_tables(db)
+    having = f"HAVING COUNT(DISTINCT b.tag) = {len(set(tags))}" if match_all else ""
+    return f"""
+        SELECT d.tagSet
+        FROM {db.derived_table(TAG_DICTIONARY_TABLE)} d
+        JOIN {db.derived_table(TAG_BRIDGE_TABLE)} b ON b.tagSetKey = d.tagSetKey
+        WHERE b.tag IN ({_sql_list(tags)})
+        GROUP BY d.tagSet
+        {having}
+    """
+
+
+def tag_filter_clause(db, tags, column='o.tags', tag_set_id_column=None, match_all=False):
+    """Build a SQL predicate restricting rows to those carrying the given tags.
+
+    The predicate matches the raw tag string column, and optionally a tagSetId
+    column through tagSets, against the tag sets that contain the tags, so it
+    can be added to any query over objects or instances.
+
+    Args:
+        db (DatabaseManager): Database manager
+        tags (list): Tags to filter by
+        column (str): Qualified tag string column in the outer query
+        tag_set_id_column (str, optional): Qualified tagSetId column in the
+            outer query (instances.tagSetId)
+        match_all (bool): If True, require every tag; otherwise any tag
+
+    Returns:
+        str: SQL predicate, or 'TRUE' if no tags are given
+    """
+    if not tags:
+        return "TRUE"
+
+    tagged = tagged_sets_sql(db, tags, match_all)
+    conditions = [f"{column} IN ({tagged})"]
+    if tag_set_id_column:
+        conditions.append(f"{tag_set_id_column} IN (SELECT tagSetId FROM tagSets WHERE tagSet IN ({tagged}))")
+    return " OR ".join(f"({condition})" for condition in conditions)
+
+
+def _sql_list(values):
+    """Quote values as a SQL list of string literals."""
+    return ", ".join("'" + str(value).replace("'", "''") + "'" for value in values)
@@ -0,0 +1,207 @@
+"""
+Module for time series analysis computed in DuckDB.
+
+Rows are bucketed with DATE_TRUNC inside the query, missing periods are filled
+with zero, and moving averages, growth rates and outliers are computed with
+window functions, so only one row per period (and series) is returned. The
+same query runs against database tables (epoch-millisecond columns such as
+objects.createdAt or instances.createTime) and against in-memory DataFrames.
+"""
+
+import duckdb
+import pandas as pd
+
+from modules.timestamps import valid_epoch_ms_sql
+
+# Supported granularities and the interval between consecutive periods
+GRANULARITIES = {
+    'day': '1 day',
+    'week': '7 days',
+    'month': '1 month',
+    'quarter': '3 months',
+    'year': '1 year'
+}
+
+# pandas-style frequency codes accepted for compatibility
+FREQ_ALIASES = {
+    'D': 'day',
+    'W': 'week',
+    'M': 'month',
+    'ME': 'month',
+    'MS': 'month',
+    'Q': 'quarter',
+    'QE': 'quarter',
+    'Y': 'year',
+    'YE': 'year',
+    'A': 'year'
+}
+
+# Result columns of time_series
+TIME_SERIES_COLUMNS = ['series', 'period', 'value', 'moving_avg_3', 'moving_avg_6', 'growth_rate', 'is_outlier']
+
+
+def resolve_granularity(freq):
+    """Map a granularity name or pandas frequency code to a granularity.
+
+    Args:
+        freq (str): 'day', 'week', 'month', 'quarter', 'year' or a pandas
+            frequency code such as 'D', 'W' or 'M'
+
+    Returns:
+        str: Granularity name
+    """
+    granularity = FREQ_ALIASES.get(freq, freq)
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {freq}")
+    return granularity
+
+
+def time_series_sql(source, time_expr, value_expr, granularity, series_expr=None, where=None):
+    """Build the bucketing and window query.
+
+    Args:
+        source (str): Table or relation to read
+        time_expr (str): SQL expression yielding a TIMESTAMP
+        value_expr (str): Aggregate computing the value of a period (e.g. COUNT(*))
+        granularity (str): Granularity name
+        series_expr (str, optional): SQL expression splitting rows into series
+        where (str, optional): Additional SQL filter
+
+    Returns:
+        str: Query returning TIME_SERIES_COLUMNS, ordered by series and period
+    """
+    series_expr = series_expr or "'all'"
+    conditions = [f"{time_expr} IS NOT NULL"] + ([f"({where})"] if where else [])
+
+    return f"""
+        WITH buckets AS (
+            SELECT
+                CAST({series_expr} AS VARCHAR) AS series,
+                DATE_TRUNC('{granularity}', {time_expr}) AS period,
+                {value_expr} AS value
+            FROM {source}
+            WHERE {' AND '.join(conditions)}
+            GROUP BY ALL
+        ),
+        periods AS (
+            SELECT UNNEST(generate_series(MIN(period), MAX(period), INTERVAL '{GRANULARITIES[granularity]}')) AS period
+            FROM buckets
+        ),
+        filled AS (
+            SELECT s.series, p.period, COALESCE(b.value, 0) AS value
+            FROM (SELECT DISTINCT series FROM buckets) s
+            CROSS JOIN periods p
+            LEFT JOIN buckets b ON b.series = s.series AND b.period = p.period
+        ),
+        windowed AS (
+            SELECT
+                series,
+                period,
+                value,
+                CASE WHEN COUNT(*) OVER w3 = 3 THEN AVG(value) OVER w3 END AS moving_avg_3,
+                CASE WHEN COUNT(*) OVER w6 = 6 THEN AVG(value) OVER w6 END AS moving_avg_6,
+                value / NULLIF(LAG(value) OVER w, 0) - 1 AS growth_rate,
+                AVG(value) OVER s AS series_mean,
+                STDDEV_SAMP(value) OVER s AS series_std
+            FROM filled
+            WINDOW
+                w AS (PARTITION BY series ORDER BY period),
+                w3 AS (PARTITION BY series ORDER BY period ROWS BETWEEN 2 PRECEDING AND CURRENT ROW),
+                w6 AS (PARTITION BY series ORDER BY period ROWS BETWEEN 5 PRECEDING AND CURRENT ROW),
+                s AS (PARTITION BY series)
+        )
+        SELECT
+            series,
+            period,
+            value,
+            moving_avg_3,
+            moving_avg_6,
+            growth_rate,
+            COALESCE(ABS(value - series_mean) > 2 * series_std, FALSE) AS is_outlier
+        FROM windowed
+        ORDER BY series, period
+    """
+
+
+def time_series(db, table, time_column, freq='month', value_column=None, series=None, where=None, top_n=None):
+    """Compute a time series over an epoch-millisecond or TIMESTAMP column.
+
+    Args:
+        db (DatabaseManager): Database manager
+        table (str): Table to read (e.g. 'objects', 'instances' or a derived table)
+        time_column (str): Epoch-millisecond or TIMESTAMP column (createdAt,
+            createTime, modifyTime, accessTime, ...)
+        freq (str): Granularity name or pandas frequency code
+        value_column (str, optional): Column to sum per period; rows are
+            counted if None
+        series (str, optional): Column splitting the rows into series
+            (e.g. 'extension' or 'serviceName')
+        where (str, optional): Additional SQL filter
+        top_n (int, optional): Keep only the series with the largest totals
+
+    Returns:
+        DataFrame: TIME_SERIES_COLUMNS, one row per series and period
+    """
+    granularity = resolve_granularity(freq)
+    key = (table, time_column, granularity, value_column, series, where, top_n)
+
+    def compute():
+        # Typed TIMESTAMP columns (e.g. of the fact table) are used as is;
+        # raw epoch-ms columns are filtered on their BIGINT values
+        column_type = db.conn.execute(f"SELECT typeof({time_column}) FROM {table} LIMIT 1").fetchone()
+        if column_type and column_type[0].startswith('TIMESTAMP'):
+            time_expr, conditions = time_column, []
+        else:
+            time_expr, conditions = f"epoch_ms({time_column})", [valid_epoch_ms_sql(time_column)]
+        if where:
+            conditions.append(f"({where})")
+        if series and top_n:
+            # Rank the series on the same rows the time series covers
+            ranked_where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            conditions.append(f"""{series} IN (
+                SELECT {series} FROM {table}
+                {ranked_where}
+                GROUP BY {series}
+                ORDER BY {f'SUM({value_column})' if value_column else 'COUNT(*)'} DESC
+                LIMIT {int(top_n)}
+            )""")
+
+        result = db.query(time_series_sql(
+            table,
+            time_expr,
+            f"SUM({value_column})::DOUBLE" if value_column else "COUNT(*)::DOUBLE",
+            granularity,
+            series,
+            " AND ".join(conditions)
+        ))
+        return result if not result.empty else pd.DataFrame(columns=TIME_SERIES_COLUMNS)
+
+    return db.cache.get_or_compute('time_series', key, db.get_fingerprint(), compute)
+
+
+def time_series_from_frame(data, time_column, value_column, freq='month'):
+    """Compute a time series over an in-memory DataFrame.
+
+    Args:
+        data (DataFrame): Data with timestamps and values
+        time_column (str): Column containing timestamps
+        value_column (str): Column containing values to sum
+        freq (str): Granularity name or pandas frequency code
+
+    Returns:
+        DataFrame: TIME_SERIES_COLUMNS, one row per period
+    """
+    granularity = resolve_granularity(freq)
+    frame = pd.DataFrame({
+        'ts': pd.to_datetime(data[time_column]),
+        'value': pd.to_numeric(data[value_column])
+    })
+
+    conn = duckdb.connect()
+    try:
+        conn.register('series_frame', frame)
+        return conn.execute(time_series_sql(
+            'series_frame', 'CAST(ts AS TIMESTAMP)', 'SUM(value)::DOUBLE', granularity
+        )).df()
+    finally:
+        conn.close()
@@ -0,0 +1,89 @@
+"""
+Module for normalizing epoch-millisecond timestamps.
+
+The Aparavi schema stores times as BIGINT epoch milliseconds, and collectors
+write placeholders (0, tiny or far-future values) for unknown times. This
+module defines the validity bounds once and provides:
+
+- SQL expressions converting an epoch-ms column to a TIMESTAMP, with invalid
+  values nulled
+- range predicates that compare the raw BIGINT column against epoch-ms
+  bounds, so DuckDB can prune row groups with the column's min/max statistics
+
+Queries filter on the raw columns and convert only the values they return;
+tables that are read by time repeatedly store converted TIMESTAMP columns
+(e.g. the instance fact table).
+"""
+
+from datetime import timezone
+
+import pandas as pd
+
+# Valid epoch-ms range: after 1970-01-02 (one day after epoch), before 2100-01-01
+MIN_VALID_EPOCH_MS = 86400000
+MAX_VALID_EPOCH_MS = 4102444800000
+
+def valid_epoch_ms_sql(column):
+    """SQL predicate that is true for plausible epoch-ms values."""
+    return f"({column} > {MIN_VALID_EPOCH_MS} AND {column} < {MAX_VALID_EPOCH_MS})"
+
+
+def epoch_ms_sql(column):
+    """SQL expression converting an epoch-ms column to TIMESTAMP, NULL if invalid."""
+    return f"CASE WHEN {valid_epoch_ms_sql(column)} THEN epoch_ms({column}) END"
+
+
+def to_epoch_ms(value):
+    """Convert a datetime, date string or epoch-ms number to epoch milliseconds.
+
+    Naive datetimes are interpreted as UTC, matching epoch_ms() in DuckDB.
+
+    Args:
+        value: datetime, date, pandas Timestamp, string or number
+
+    Returns:
+        int: Epoch milliseconds
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(timezone.utc)
+    return int(timestamp.timestamp() * 1000)
+
+
+def epoch_ms_range_sql(column, start=None, end=None):
+    """SQL predicate restricting an epoch-ms column to a time range.
+
+    The bounds are converted to epoch milliseconds in Python, so the predicate
+    compares the raw column and benefits from min/max row group pruning.
+
+    Args:
+        column (str): Epoch-ms column
+        start (optional): Inclusive start (datetime, string or epoch ms)
+        end (optional): Exclusive end (datetime, string or epoch ms)
+
+    Returns:
+        str: SQL predicate, also excluding invalid values
+    """
+    low = max(MIN_VALID_EPOCH_MS + 1, to_epoch_ms(start)) if start is not None else MIN_VALID_EPOCH_MS + 1
+    high = min(MAX_VALID_EPOCH_MS, to_epoch_ms(end)) if end is not None else MAX_VALID_EPOCH_MS
+    return f"({column} >= {low} AND {column} < {high})"
+
+
+def normalize_epoch_ms(values):
+    """Convert a Series of epoch-ms values to datetimes, with invalid values as NaT.
+
+    Series that already hold datetimes are returned unchanged.
+
+    Args:
+        values (Series): Epoch-ms numbers or datetimes
+
+    Returns:
+        Series: datetime64 Series
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    numeric = pd.to_numeric(values, errors='coerce')
+    numeric = numeric.where((numeric > MIN_VALID_EPOCH_MS) & (numeric < MAX_VALID_EPOCH_MS))
+    return pd.to_datetime(numeric, unit='ms')
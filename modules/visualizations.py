@@ -1,51 +1,275 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
-import streamlit as st
+"""
+Module for building report charts.
+
+Charts are Plotly figures rendered in the browser, so the server never
+rasterizes images or keeps global plotting state per rerun. Data is reduced
+before it is sent: time series are downsampled with LTTB (largest triangle
+three buckets), which keeps the visual shape of the series, and bar and pie
+charts keep their top categories and fold the rest into "Other". Large
+series are drawn with WebGL (Scattergl).
+
+Figure specs are cached by a hash of the plotted data and the chart options,
+and every call returns a new Figure built from the cached spec, so figures
+are never shared between sessions or kept alive by the cache.
+"""
+
 import base64
-from io import BytesIO
-from datetime import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import config
+
+# Plotly template per sidebar chart style
+CHART_TEMPLATES = {
+    "ggplot": "ggplot2",
+    "seaborn-darkgrid": "seaborn",
+    "seaborn-deep": "plotly",
+    "fivethirtyeight": "simple_white",
+    "dark_background": "plotly_dark"
+}
+
+# Chart style used when none is selected
+DEFAULT_CHART_STYLE = "ggplot"
+
+# Session state key of the sidebar chart style
+CHART_STYLE_KEY = "chart_style"
+
+# Maximum points per time series sent to the browser
+MAX_TIME_SERIES_POINTS = 2000
+
+# Series with more points than this are drawn with WebGL
+WEBGL_THRESHOLD = 1000
+
+# Maximum bars per bar chart and slices per pie chart
+MAX_BAR_CATEGORIES = 30
+MAX_PIE_SLICES = 12
+
+# Pixels per inch used to convert figsize arguments to chart heights
+PIXELS_PER_INCH = 70
+
+# Number of figure specs kept in memory
+FIGURE_CACHE_SIZE = 128
+
+_figure_specs = OrderedDict()
+_figure_lock = threading.Lock()
+
+
+def chart_template(style=None):
+    """Get the Plotly template for a chart style.
+
+    Args:
+        style (str, optional): Chart style; defaults to the style selected in
+            the sidebar
+
+    Returns:
+        str: Plotly template name
+    """
+    if style is None:
+        # Streamlit is only needed by the dashboard; the API and static
+        # reports pass their style
+        import streamlit as st
+        style = st.session_state.get(CHART_STYLE_KEY, DEFAULT_CHART_STYLE)
+    return CHART_TEMPLATES.get(style, CHART_TEMPLATES[DEFAULT_CHART_STYLE])
+
+
+def show_chart(fig, style=None):
+    """Display a figure with the selected chart style.
+
+    Args:
+        fig (Figure): Plotly figure
+        style (str, optional): Chart style; defaults to the sidebar selection
+    """
+    import streamlit as st
+
+    fig.update_layout(template=chart_template(style))
+    # theme=None keeps Streamlit from overriding the template
+    st.plotly_chart(fig, use_container_width=True, theme=None)
+
+
+def _data_hash(*parts):
+    """Hash DataFrames, Series and plain values into a cache key."""
+    digest = hashlib.md5()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            columns = list(part.columns) if isinstance(part, pd.DataFrame) else [part.name]
+            digest.update(repr(columns).encode())
+            digest.update(pd.util.hash_pandas_object(part, index=False).values.tobytes())
+        else:
+            digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+def _cached_figure(key, build):
+    """Get a new figure from the cached spec for a key, building it if missing.
+
+    Args:
+        key (str): Hash of the chart function, data and options
+        build (callable): Function returning the figure
+
+    Returns:
+        Figure: New Plotly figure
+    """
+    with _figure_lock:
+        spec = _figure_specs.get(key)
+        if spec is not None:
+            _figure_specs.move_to_end(key)
+
+    if spec is None:
+        spec = build().to_plotly_json()
+        with _figure_lock:
+            _figure_specs[key] = spec
+            while len(_figure_specs) > FIGURE_CACHE_SIZE:
+                _figure_specs.popitem(last=False)
+
+    return go.Figure(spec)
+
+
+def _height(figsize):
+    """Convert a (width, height) figure size in inches to a height in pixels."""
+    return int(figsize[1] * PIXELS_PER_INCH) if figsize else config.DEFAULT_CHART_HEIGHT
+
+
+def _layout(fig, title, xlabel, ylabel, figsize):
+    """Apply the common layout options."""
+    fig.update_layout(
+        title=title,
+        xaxis_title=xlabel,
+        yaxis_title=ylabel,
+        height=_height(figsize),
+        margin=dict(l=20, r=20, t=60 if title else 20, b=20)
+    )
+    return fig
+
+
+def lttb_indices(x, y, threshold):
+    """Select the points of a series to keep with largest triangle three buckets.
+
+    The first and last points are always kept; the points in between are
+    split into equal buckets and from each bucket the point forming the
+    largest triangle with the previously kept point and the average of the
+    next bucket is kept.
+
+    Args:
+        x (array): X values (numbers or datetimes), sorted
+        y (array): Y values
+        threshold (int): Number of points to keep
+
+    Returns:
+        ndarray: Indices of the kept points, in order
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(pd.to_numeric(pd.Series(x)), dtype=float)
+    y = np.asarray(y, dtype=float)
+    buckets = np.array_split(np.arange(1, n - 1), threshold - 2)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for i, bucket in enumerate(buckets):
+        following = buckets[i + 1] if i + 1 < len(buckets) else np.array([n - 1])
+        average_x, average_y = x[following].mean(), y[following].mean()
+        area = np.abs(
+            (x[selected] - average_x) * (y[bucket] - y[selected])
+            - (x[selected] - x[bucket]) * (average_y - y[selected])
+        )
+        selected = bucket[np.argmax(area)]
+        indices[i + 1] = selected
+    return indices
+
+
+def downsample_series(data, x_col, y_col, max_points=MAX_TIME_SERIES_POINTS):
+    """Downsample a time series to at most max_points rows with LTTB.
+
+    Args:
+        data (DataFrame): Series data
+        x_col (str): Time column
+        y_col (str): Value column
+        max_points (int): Maximum number of rows to keep
+
+    Returns:
+        DataFrame: Rows kept, sorted by time
+    """
+    data = data.dropna(subset=[x_col, y_col]).sort_values(x_col)
+    if len(data) <= max_points:
+        return data
+    return data.iloc[lttb_indices(data[x_col], data[y_col], max_points)]
+
+
+def top_categories(data, label_col, value_col, limit, other_label="Other"):
+    """Keep the categories with the largest values and fold the rest into one.
 
-# Set matplotlib and seaborn styles
-plt.style.use('ggplot')
-sns.set_palette("Set2")
+    Args:
+        data (DataFrame): One row per category
+        label_col (str): Category column
+        value_col (str): Value column
+        limit (int): Maximum number of rows, the folded row included
+        other_label (str): Label of the folded row
+
+    Returns:
+        DataFrame: label_col and value_col, at most limit rows
+    """
+    data = data[[label_col, value_col]]
+    if len(data) <= limit:
+        return data
 
-def plot_bar_chart(data, x_col, y_col, title, xlabel=None, ylabel=None, figsize=(10, 6), horizontal=False):
+    ranked = data.sort_values(value_col, ascending=False)
+    top = ranked.iloc[:limit - 1]
+    rest = ranked.iloc[limit - 1:]
+    other = pd.DataFrame({
+        label_col: [f"{other_label} ({len(rest):,})"],
+        value_col: [rest[value_col].sum()]
+    })
+    return pd.concat([top, other], ignore_index=True)
+
+
+def plot_bar_chart(data, x_col, y_col, title, xlabel=None, ylabel=None, figsize=(10, 6), horizontal=False,
+                   max_bars=MAX_BAR_CATEGORIES):
     """Create a bar chart.
-    
+
     Args:
         data (DataFrame): Data to plot
-        x_col (str): Column for x-axis
-        y_col (str): Column for y-axis
+        x_col (str): Column for x-axis (the values if horizontal)
+        y_col (str): Column for y-axis (the categories if horizontal)
         title (str): Chart title
         xlabel (str, optional): Label for x-axis
         ylabel (str, optional): Label for y-axis
-        figsize (tuple, optional): Figure size (width, height)
+        figsize (tuple, optional): Figure size (width, height) in inches
         horizontal (bool, optional): If True, create a horizontal bar chart
-        
+        max_bars (int, optional): Maximum number of bars; smaller categories
+            are combined into "Other"
+
     Returns:
-        Figure: Matplotlib figure
+        Figure: Plotly figure
     """
-    fig, ax = plt.subplots(figsize=figsize)
-    
-    if horizontal:
-        sns.barplot(x=y_col, y=x_col, data=data, ax=ax)
-    else:
-        sns.barplot(x=x_col, y=y_col, data=data, ax=ax)
-    
-    ax.set_title(title)
-    
-    if xlabel:
-        ax.set_xlabel(xlabel)
-    if ylabel:
-        ax.set_ylabel(ylabel)
-        
-    plt.tight_layout()
-    return fig
+    label_col, value_col = (y_col, x_col) if horizontal else (x_col, y_col)
+
+    def build():
+        bars = top_categories(data, label_col, value_col, max_bars)
+        labels = bars[label_col].astype(str)
+        if horizontal:
+            fig = go.Figure(go.Bar(x=bars[value_col], y=labels, orientation='h'))
+            # Largest bar at the top
+            fig.update_yaxes(autorange='reversed')
+        else:
+            fig = go.Figure(go.Bar(x=labels, y=bars[value_col]))
+        return _layout(fig, title, xlabel, ylabel, figsize)
+
+    key = _data_hash('bar', data[[label_col, value_col]], title, xlabel, ylabel, figsize, horizontal, max_bars)
+    return _cached_figure(key, build)
 
-def plot_time_series(data, x_col, y_col, title, xlabel=None, ylabel=None, figsize=(12, 6)):
+
+def plot_time_series(data, x_col, y_col, title, xlabel=None, ylabel=None, figsize=(12, 6),
+                     max_points=MAX_TIME_SERIES_POINTS):
     """Create a time series line chart.
-    
+
     Args:
         data (DataFrame): Data to plot
         x_col (str): Column for x-axis (time)
@@ -53,50 +277,61 @@ def plot_time_series(data, x_col, y_col, title, xlabel=None, ylabel=None, figsiz
         title (str): Chart title
         xlabel (str, optional): Label for x-axis
         ylabel (str, optional): Label for y-axis
-        figsize (tuple, optional): Figure size (width, height)
-        
+        figsize (tuple, optional): Figure size (width, height) in inches
+        max_points (int, optional): Maximum number of points drawn; longer
+            series are downsampled with LTTB
+
     Returns:
-        Figure: Matplotlib figure
+        Figure: Plotly figure
     """
-    fig, ax = plt.subplots(figsize=figsize)
-    
-    ax.plot(data[x_col], data[y_col], marker='o', linestyle='-')
-    ax.set_title(title)
-    
-    if xlabel:
-        ax.set_xlabel(xlabel)
-    if ylabel:
-        ax.set_ylabel(ylabel)
-        
-    plt.tight_layout()
-    return fig
+    def build():
+        points = downsample_series(data, x_col, y_col, max_points)
+        if len(points) > WEBGL_THRESHOLD:
+            trace = go.Scattergl(x=points[x_col], y=points[y_col], mode='lines')
+        else:
+            trace = go.Scatter(x=points[x_col], y=points[y_col], mode='lines+markers')
+        return _layout(go.Figure(trace), title, xlabel, ylabel, figsize)
 
-def plot_pie_chart(data, values, names, title, figsize=(8, 8)):
+    key = _data_hash('time_series', data[[x_col, y_col]], title, xlabel, ylabel, figsize, max_points)
+    return _cached_figure(key, build)
+
+
+def plot_pie_chart(data, values, names, title, figsize=(8, 8), max_slices=MAX_PIE_SLICES):
     """Create a pie chart.
-    
+
     Args:
         data (DataFrame): Data to plot
         values (str): Column for values
         names (str): Column for slice names
         title (str): Chart title
-        figsize (tuple, optional): Figure size (width, height)
-        
+        figsize (tuple, optional): Figure size (width, height) in inches
+        max_slices (int, optional): Maximum number of slices; smaller slices
+            are combined into "Other"
+
     Returns:
-        Figure: Matplotlib figure
+        Figure: Plotly figure
     """
-    fig, ax = plt.subplots(figsize=figsize)
-    
-    ax.pie(data[values], labels=data[names], autopct='%1.1f%%', 
-           startangle=90, shadow=False)
-    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
-    ax.set_title(title)
-    
-    plt.tight_layout()
-    return fig
+    def build():
+        slices = top_categories(data, names, values, max_slices)
+        fig = go.Figure(go.Pie(
+            labels=slices[names].astype(str),
+            values=slices[values],
+            textinfo='percent',
+            sort=False
+        ))
+        return _layout(fig, title, None, None, figsize)
+
+    key = _data_hash('pie', data[[names, values]], title, figsize, max_slices)
+    return _cached_figure(key, build)
+
 
 def plot_histogram(data, column, bins=20, title=None, xlabel=None, ylabel='Frequency', figsize=(10, 6)):
     """Create a histogram.
-    
+
+    Values are binned with numpy and drawn with plot_binned_histogram. For
+    large tables, bin in the database (see modules.histograms) and call
+    plot_binned_histogram directly.
+
     Args:
         data (DataFrame): Data to plot
         column (str): Column to plot
@@ -104,80 +339,123 @@ def plot_histogram(data, column, bins=20, title=None, xlabel=None, ylabel='Frequ
         title (str, optional): Chart title
         xlabel (str, optional): Label for x-axis
         ylabel (str, optional): Label for y-axis
-        figsize (tuple, optional): Figure size (width, height)
-        
+        figsize (tuple, optional): Figure size (width, height) in inches
+
     Returns:
-        Figure: Matplotlib figure
+        Figure: Plotly figure
     """
-    fig, ax = plt.subplots(figsize=figsize)
-    
-    sns.histplot(data[column], bins=bins, kde=True, ax=ax)
-    
-    if title:
-        ax.set_title(title)
-    if xlabel:
-        ax.set_xlabel(xlabel)
-    ax.set_ylabel(ylabel)
-    
-    plt.tight_layout()
-    return fig
+    counts, edges = np.histogram(data[column].dropna(), bins=bins)
+    return plot_binned_histogram(edges[:-1], edges[1:], counts, title, xlabel, ylabel, figsize)
+
+
+def plot_binned_histogram(lower, upper, counts, title=None, xlabel=None, ylabel='Frequency', figsize=(10, 6), log_x=False):
+    """Create a histogram from pre-binned counts.
+
+    Bins are drawn as a filled step line, which keeps their widths correct
+    on linear and logarithmic axes.
+
+    Args:
+        lower (list): Lower bound of each bin
+        upper (list): Upper bound of each bin; an infinite bound is drawn as
+            wide as the bin's lower bound
+        counts (list): Count per bin
+        title (str, optional): Chart title
+        xlabel (str, optional): Label for x-axis
+        ylabel (str, optional): Label for y-axis
+        figsize (tuple, optional): Figure size (width, height) in inches
+        log_x (bool, optional): Use a logarithmic x-axis
+
+    Returns:
+        Figure: Plotly figure
+    """
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    counts = np.asarray(counts, dtype=float)
+
+    def build():
+        bin_upper = np.where(np.isinf(upper), lower * 2, upper)
+        bin_lower = lower
+        if log_x:
+            # A log axis cannot show 0; draw bins starting at 0 from 0.5
+            bin_lower = np.where(lower <= 0, 0.5, lower)
+
+        # Each bin starts a step at its lower bound; the last step ends at its upper bound
+        x = np.append(bin_lower, bin_upper[-1:]) if len(bin_lower) else bin_lower
+        y = np.append(counts, counts[-1:]) if len(counts) else counts
+        hover = [f"{low:,.0f} – {high:,.0f}: {count:,.0f}" for low, high, count in zip(lower, upper, counts)]
+        fig = go.Figure(go.Scatter(
+            x=x, y=y, mode='lines', line_shape='hv', fill='tozeroy',
+            hovertext=hover + hover[-1:], hoverinfo='text'
+        ))
+        if log_x:
+            fig.update_xaxes(type='log')
+        return _layout(fig, title, xlabel, ylabel, figsize)
+
+    key = _data_hash('binned_histogram', lower.tobytes(), upper.tobytes(), counts.tobytes(),
+                     title, xlabel, ylabel, figsize, log_x)
+    return _cached_figure(key, build)
+
 
 def plot_heatmap(data, title=None, figsize=(12, 10), cmap="viridis"):
     """Create a correlation heatmap.
-    
+
     Args:
         data (DataFrame): Correlation data to plot
         title (str, optional): Chart title
-        figsize (tuple, optional): Figure size (width, height)
-        cmap (str, optional): Colormap name
-        
+        figsize (tuple, optional): Figure size (width, height) in inches
+        cmap (str, optional): Colorscale name
+
     Returns:
-        Figure: Matplotlib figure
+        Figure: Plotly figure
     """
-    fig, ax = plt.subplots(figsize=figsize)
-    
-    sns.heatmap(data, annot=True, cmap=cmap, linewidths=.5, ax=ax)
-    
-    if title:
-        ax.set_title(title)
-    
-    plt.tight_layout()
-    return fig
+    def build():
+        fig = go.Figure(go.Heatmap(
+            z=data.values,
+            x=[str(column) for column in data.columns],
+            y=[str(index) for index in data.index],
+            colorscale=cmap,
+            texttemplate="%{z}"
+        ))
+        fig.update_yaxes(autorange='reversed')
+        return _layout(fig, title, None, None, figsize)
+
+    key = _data_hash('heatmap', data, list(data.index), title, figsize, cmap)
+    return _cached_figure(key, build)
+
 
 def create_download_link(fig, filename):
-    """Create a download link for a matplotlib figure.
-    
+    """Create a download link for a Plotly figure as an interactive HTML page.
+
     Args:
-        fig (Figure): Matplotlib figure
+        fig (Figure): Plotly figure
         filename (str): Filename for download
-        
+
     Returns:
         str: HTML link for download
     """
-    buf = BytesIO()
-    fig.savefig(buf, format='png', dpi=300)
-    buf.seek(0)
-    img_str = base64.b64encode(buf.read()).decode('utf-8')
-    
-    href = f'<a href="data:file/png;base64,{img_str}" download="{filename}">Download {filename}</a>'
+    html = fig.to_html(include_plotlyjs='cdn', full_html=True)
+    html_str = base64.b64encode(html.encode('utf-8')).decode('utf-8')
+
+    href = f'<a href="data:text/html;base64,{html_str}" download="{filename}">Download {filename}</a>'
     return href
-    
+
+
 def format_size_bytes(size_bytes):
     """Format bytes to human-readable file size.
-    
+
     Args:
         size_bytes (int): Size in bytes
-        
+
     Returns:
         str: Formatted file size
     """
     units = ['B', 'KB', 'MB', 'GB', 'TB']
-    
+
     unit_index = 0
     size = float(size_bytes)
-    
+
     while size >= 1024 and unit_index < len(units) - 1:
         size /= 1024
         unit_index += 1
-        
+
     return f"{size:.2f} {units[unit_index]}"
@@ -4,9 +4,38 @@ Test script for the DuckDB Document Management Analyzer application.
 
 import os
 import sys
+import tempfile
 import unittest
+from datetime import date
+from unittest import mock
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+
+import api
+import config
 from modules.database import DatabaseManager
 from modules.analytics import time_series_analysis, size_distribution_analysis
+from modules.security import parse_principal_list, compute_group_closure, get_effective_groups
+from modules.sketches import SizeSketch
+from modules.data_grid import _order_sql, load_page
+from modules.memory import COMPACT_MIN_ROWS, MemoryBudget, MemoryBudgetExceeded, compact_table, load_frame
+from modules.predicates import (
+    FilterContext, category_predicate_sql, facts_where, instance_where, object_where, path_prefix_sql
+)
+from modules.tag_analysis import parse_tag_set
+try:
+    from fastapi.testclient import TestClient
+except ImportError:  # The test client needs httpx
+    TestClient = None
+from modules.message_analysis import (
+    MAX_TERM_LENGTH, MESSAGE_DAILY_TABLE, MESSAGE_LINKS_TABLE, MESSAGE_TERMS_TABLE, MIN_TERM_LENGTH, TOKEN_PATTERN,
+    build_message_index, refresh_message_tables
+)
+from modules.service_analysis import (
+    SERVICE_ROLLUP_TABLE, _aggregate_instances_sql, refresh_service_rollup
+)
 
 class TestDocumentAnalyzer(unittest.TestCase):
     """Test cases for the Document Analyzer application."""
@@ -55,5 +84,503 @@ class TestDocumentAnalyzer(unittest.TestCase):
         if self.db:
             self.db.close()
 
+class TestGroupClosure(unittest.TestCase):
+    """Test cases for nested group membership resolution."""
+    
+    def test_parse_principal_list(self):
+        """Test parsing of osSecurity member strings."""
+        self.assertEqual(parse_principal_list('["S-1", "S-2"]'), ['S-1', 'S-2'])
+        self.assertEqual(parse_principal_list('S-1, S-2'), ['S-1', 'S-2'])
+        self.assertEqual(parse_principal_list('[]'), [])
+        self.assertEqual(parse_principal_list(None), [])
+    
+    def test_closure_with_cycle(self):
+        """Test that cyclic memberships terminate and are reported."""
+        edges = {1: {10}, 10: {11}, 11: {10}}
+        rows, cyclic = compute_group_closure(edges)
+        
+        groups_of_user = {(group, depth) for principal, group, depth in rows if principal == 1}
+        self.assertEqual(groups_of_user, {(1, 0), (10, 1), (11, 2)})
+        self.assertEqual(cyclic, {10, 11})
+    
+    def test_readers_refresh_closure(self):
+        """Test that effective groups follow osSecurity without an explicit refresh."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = DatabaseManager(os.path.join(tmpdir, 'security.duckdb'))
+            db.conn.execute("""
+                CREATE TABLE osSecurity AS
+                SELECT * FROM (VALUES
+                    (1, 'S-1', '[]', '["S-10"]', 'user'),
+                    (10, 'S-10', '[]', '[]', 'team'),
+                    (11, 'S-11', '["S-10"]', '[]', 'department')
+                ) t(securityId, osId, members, "groups", name)
+            """)
+            self.assertEqual(get_effective_groups(db, 1)['groupId'].tolist(), [1, 10, 11])
+            
+            db.conn.execute("""UPDATE osSecurity SET "groups" = '[]' WHERE securityId = 1""")
+            self.assertEqual(get_effective_groups(db, 1)['groupId'].tolist(), [1])
+            db.close()
+
+class TestSizeSketch(unittest.TestCase):
+    """Test cases for mergeable size sketches."""
+    
+    def test_merged_shards_match_single_pass(self):
+        """Test that merging shard sketches gives the same summary as one sketch."""
+        sizes = list(range(1, 20001))
+        
+        whole = SizeSketch()
+        whole.update(sizes)
+        
+        shards = [SizeSketch(), SizeSketch()]
+        shards[0].update(sizes[:5000])
+        shards[1].update(sizes[5000:])
+        merged = SizeSketch.from_dict(shards[0].to_dict())
+        merged.merge(shards[1])
+        
+        expected, actual = whole.summary(), merged.summary()
+        self.assertEqual(actual['count'], 20000)
+        self.assertEqual(actual['total'], sum(sizes))
+        self.assertEqual(actual['categories'], expected['categories'])
+        self.assertEqual(actual['histogram'], expected['histogram'])
+        self.assertAlmostEqual(actual['std'], expected['std'], places=6)
+        self.assertAlmostEqual(actual['p50'], 10000, delta=100)
+
+class TestServiceRollup(unittest.TestCase):
+    """Test cases for the incremental service rollup."""
+    
+    def setUp(self):
+        """Create a small instances table in a temporary database."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, 'rollup.duckdb'))
+        self.db.conn.execute("""
+            CREATE TABLE instances AS
+            SELECT
+                i AS instanceId,
+                i // 10 AS batchId,
+                i % 3 AS serviceId,
+                'pipe' || (i % 2) AS processPipe,
+                1700000000000 + i * 3600000 AS processTime,
+                1700000000000 + i * 3600000 + 500 AS storeTime,
+                i * 100 AS size,
+                i * 50 AS storeSize
+            FROM range(100) t(i)
+        """)
+    
+    def tearDown(self):
+        """Remove the temporary database."""
+        self.db.conn.close()
+        self.tmpdir.cleanup()
+    
+    def assertRollupMatchesInstances(self):
+        """Check the rollup against an aggregation of all instances."""
+        order = "ORDER BY serviceId, processPipe, day"
+        rollup = self.db.conn.execute(
+            f"SELECT * FROM {self.db.derived_table(SERVICE_ROLLUP_TABLE)} {order}"
+        ).fetchall()
+        expected = self.db.conn.execute(
+            f"SELECT * FROM ({_aggregate_instances_sql('')}) {order}"
+        ).fetchall()
+        self.assertEqual(rollup, expected)
+    
+    def add_batch(self, batch_id):
+        """Insert a new batch of ten instances."""
+        self.db.conn.execute("""
+            INSERT INTO instances
+            SELECT i, $batch, i % 3, 'pipe0', 1800000000000 + i, 1800000000500 + i, i, i
+            FROM range($batch * 10, $batch * 10 + 10) t(i)
+        """, {'batch': batch_id})
+    
+    def test_full_then_incremental(self):
+        """Test that new batches are folded into the rollup."""
+        self.assertEqual(refresh_service_rollup(self.db)['mode'], 'full')
+        self.assertEqual(refresh_service_rollup(self.db)['mode'], 'unchanged')
+        
+        self.add_batch(10)
+        summary = refresh_service_rollup(self.db)
+        self.assertEqual((summary['mode'], summary['instances'], summary['watermark']), ('incremental', 10, 10))
+        self.assertRollupMatchesInstances()
+    
+    def test_changed_rows_trigger_rebuild(self):
+        """Test that a change below the watermark rebuilds the rollup."""
+        refresh_service_rollup(self.db)
+        self.db.conn.execute("UPDATE instances SET storeSize = storeSize + 1 WHERE batchId = 3")
+        self.add_batch(10)
+        
+        self.assertEqual(refresh_service_rollup(self.db)['mode'], 'full')
+        self.assertRollupMatchesInstances()
+    
+    def test_failed_refresh_rolls_back(self):
+        """Test that an interrupted refresh leaves the rollup unchanged."""
+        refresh_service_rollup(self.db)
+        self.add_batch(10)
+        with mock.patch.object(self.db, 'mark_derived_built', side_effect=RuntimeError("interrupted")):
+            with self.assertRaises(RuntimeError):
+                refresh_service_rollup(self.db)
+        
+        self.assertEqual(refresh_service_rollup(self.db)['mode'], 'incremental')
+        self.assertRollupMatchesInstances()
+
+
+class TestMessageIndex(unittest.TestCase):
+    """Test cases for the incremental message index."""
+    
+    def setUp(self):
+        """Create small messages, instances and objects tables in a temporary database."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, 'messages.duckdb'))
+        self.db.conn.execute("""
+            CREATE TABLE messages AS
+            SELECT
+                i AS messageId,
+                'Job ' || i || ' finished: OK-' || (i % 7) AS message,
+                1700000000000 + i * 3600000 AS messageTime
+            FROM range(100) t(i)
+        """)
+        self.db.conn.execute("""
+            CREATE TABLE instances AS
+            SELECT i AS instanceId, i // 2 AS objectId, '[' || i || ',' || (i + 1) || ']' AS messageIds
+            FROM range(20) t(i)
+        """)
+        self.db.conn.execute("""
+            CREATE TABLE objects AS
+            SELECT i AS objectId, CASE WHEN i % 2 = 0 THEN '[' || i || ']' ELSE '' END AS messageIds
+            FROM range(10) t(i)
+        """)
+    
+    def tearDown(self):
+        """Remove the temporary database."""
+        self.db.conn.close()
+        self.tmpdir.cleanup()
+    
+    def assertIndexMatchesMessages(self):
+        """Check the index, duplicates included, against a tokenization of all messages."""
+        order = "ORDER BY term, messageId"
+        index = self.db.conn.execute(
+            f"SELECT term, messageId FROM {self.db.derived_table(MESSAGE_TERMS_TABLE)} {order}"
+        ).fetchall()
+        expected = self.db.conn.execute(f"""
+            SELECT DISTINCT term, messageId
+            FROM (
+                SELECT messageId, UNNEST(string_split_regex(lower(message), '{TOKEN_PATTERN}')) AS term
+                FROM messages
+            )
+            WHERE length(term) BETWEEN {MIN_TERM_LENGTH} AND {MAX_TERM_LENGTH}
+            {order}
+        """).fetchall()
+        self.assertEqual(index, expected)
+    
+    def add_messages(self, start, count=10):
+        """Insert new messages with ids from start."""
+        self.db.conn.execute("""
+            INSERT INTO messages
+            SELECT i, 'Retry ' || i || ' failed', 1800000000000 + i
+            FROM range($start, $start + $count) t(i)
+        """, {'start': start, 'count': count})
+    
+    def test_full_then_incremental(self):
+        """Test that only new messages are tokenized on refresh."""
+        self.assertEqual(build_message_index(self.db), 100)
+        self.assertEqual(build_message_index(self.db), 0)
+        
+        self.add_messages(100)
+        self.assertEqual(build_message_index(self.db), 10)
+        self.assertIndexMatchesMessages()
+        
+        refresh_message_tables(self.db)
+        links = self.db.conn.execute(
+            f"SELECT COUNT(*) FROM {self.db.derived_table(MESSAGE_LINKS_TABLE)}"
+        ).fetchone()[0]
+        self.assertEqual(links, 20 * 2 + 5)
+        days = self.db.conn.execute(
+            f"SELECT SUM(message_count) FROM {self.db.derived_table(MESSAGE_DAILY_TABLE)}"
+        ).fetchone()[0]
+        self.assertEqual(days, 110)
+    
+    def test_changed_messages_trigger_rebuild(self):
+        """Test that a change below the watermark rebuilds the index."""
+        build_message_index(self.db)
+        self.db.conn.execute("UPDATE messages SET message = 'Job rewritten' WHERE messageId = 5")
+        self.add_messages(100)
+        
+        self.assertEqual(build_message_index(self.db), 110)
+        self.assertIndexMatchesMessages()
+        
+        self.db.conn.execute("DELETE FROM messages WHERE messageId = 7")
+        self.assertEqual(build_message_index(self.db), 109)
+        self.assertIndexMatchesMessages()
+    
+    def test_failed_refresh_rolls_back(self):
+        """Test that an interrupted refresh leaves the index unchanged."""
+        build_message_index(self.db)
+        self.add_messages(100)
+        with mock.patch.object(self.db, 'mark_derived_built', side_effect=RuntimeError("interrupted")):
+            with self.assertRaises(RuntimeError):
+                build_message_index(self.db)
+        
+        indexed = self.db.conn.execute(
+            f"SELECT COUNT(DISTINCT messageId) FROM {self.db.derived_table(MESSAGE_TERMS_TABLE)}"
+        ).fetchone()[0]
+        self.assertEqual(indexed, 100)
+        self.assertEqual(build_message_index(self.db), 10)
+        self.assertIndexMatchesMessages()
+
+@unittest.skipIf(TestClient is None, "fastapi.testclient requires httpx")
+class TestApi(unittest.TestCase):
+    """Test cases for the headless API."""
+    
+    def setUp(self):
+        """Start the API on a small temporary database."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmpdir.name, 'api.duckdb')
+        conn = duckdb.connect(db_path)
+        conn.execute("CREATE TABLE services AS SELECT i AS serviceId, 'service' || i AS name FROM range(3) t(i)")
+        conn.execute("""
+            CREATE TABLE instances AS
+            SELECT
+                i AS instanceId,
+                i // 10 AS batchId,
+                i % 3 AS serviceId,
+                'pipe' AS processPipe,
+                1700000000000 + i * 3600000 AS processTime,
+                1700000000000 + i * 3600000 + 500 AS storeTime,
+                i * 100 AS size,
+                i * 50 AS storeSize
+            FROM range(30) t(i)
+        """)
+        conn.close()
+        
+        patches = [
+            mock.patch.dict(api.settings, {'db_path': db_path, 'derived_path': None, 'workers': 2}),
+            mock.patch.object(config, 'CACHE_DIR', os.path.join(self.tmpdir.name, 'cache')),
+            # The datasets requested here build the derived tables they read
+            mock.patch.object(api, 'warm_up', lambda db: None)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = TestClient(api.app)
+        self.client.__enter__()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.addCleanup(self.client.__exit__, None, None, None)
+    
+    def test_dataset_and_revalidation(self):
+        """Test that a dataset carries an ETag that revalidates to 304."""
+        response = self.client.get('/reports/services/compression')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+        etag = response.headers['etag']
+        
+        response = self.client.get('/reports/services/compression', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+    
+    def test_failed_query_has_no_etag(self):
+        """Test that a failed query is a 500 without an ETag."""
+        api.state['db'].conn.execute("ALTER TABLE services RENAME TO old_services")
+        
+        response = self.client.get('/reports/services/compression')
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn('etag', response.headers)
+
+class TestTagFilters(unittest.TestCase):
+    """Test cases for tag parsing and tag filters."""
+    
+    def setUp(self):
+        """Create tagged objects and instances in an in-memory database."""
+        self.db = DatabaseManager(":memory:")
+        self.db.conn.execute("""
+            CREATE TABLE tagSets AS
+            SELECT * FROM (VALUES (1, '["red"]'), (2, '["blue", "green"]')) t(tagSetId, tagSet)
+        """)
+        self.db.conn.execute("""
+            CREATE TABLE objects AS
+            SELECT * FROM (VALUES (1, '["red"]', 10), (2, '["blue"]', 20), (3, NULL, 30))
+                t(objectId, tags, primarySize)
+        """)
+        # Instance 10 is tagged through tagSetId only, 11 through its tags only
+        self.db.conn.execute("""
+            CREATE TABLE instances AS
+            SELECT * FROM (VALUES
+                (10, 1, NULL, 2, 100),
+                (11, 2, '["red", "blue"]', NULL, 200),
+                (12, 3, NULL, NULL, 300)
+            ) t(instanceId, objectId, tags, tagSetId, size)
+        """)
+    
+    def matching(self, table, column, where):
+        """Ids of the rows of a table matching a predicate."""
+        rows = self.db.conn.execute(f"SELECT {column} FROM {table} WHERE {where} ORDER BY 1").fetchall()
+        return [row[0] for row in rows]
+    
+    def test_parse_tag_set(self):
+        """Test parsing of the tag set string formats."""
+        self.assertEqual(parse_tag_set('["a", "b", "a"]'), ['a', 'b'])
+        self.assertEqual(parse_tag_set('[{"key": "team", "value": "ops"}, {"key": "draft"}]'), ['team=ops', 'draft'])
+        self.assertEqual(parse_tag_set('{"team": "ops"}'), ['team=ops'])
+        self.assertEqual(parse_tag_set('a; b, c'), ['a', 'b', 'c'])
+        self.assertEqual(parse_tag_set('[]'), [])
+        self.assertEqual(parse_tag_set(None), [])
+    
+    def test_tag_filter(self):
+        """Test that tag filters match tag strings and tagSetIds."""
+        red = FilterContext(tags=('red',))
+        self.assertEqual(self.matching('objects', 'objectId', object_where(self.db, red)), [1])
+        self.assertEqual(self.matching('instances', 'instanceId', instance_where(self.db, red)), [11])
+        
+        green = FilterContext(tags=('green',))
+        self.assertEqual(self.matching('objects', 'objectId', object_where(self.db, green)), [])
+        self.assertEqual(self.matching('instances i', 'instanceId', instance_where(self.db, green, alias='i')), [10])
+        
+        blue = FilterContext(tags=('blue',))
+        self.assertEqual(self.matching('instances f', 'instanceId', facts_where(self.db, blue, alias='f')), [10, 11])
+
+class TestMemoryBudget(unittest.TestCase):
+    """Test cases for loading results within a memory budget."""
+    
+    ROWS = 200_000
+    
+    def reader(self):
+        """Stream a result of ROWS sequential ids in small batches."""
+        table = pa.table({'id': pa.array(range(self.ROWS), pa.int64())})
+        return table.to_reader(max_chunksize=10_000)
+    
+    def test_sample_is_uniform(self):
+        """Test that a result over budget is thinned uniformly and marked as a sample."""
+        budget = MemoryBudget(self.ROWS * 8 // 5, action='sample')
+        df = load_frame(self.reader(), budget, rng=np.random.default_rng(0))
+        
+        self.assertEqual(df.attrs['sample'], {'rows': len(df), 'total_rows': self.ROWS})
+        self.assertLess(len(df), self.ROWS // 4)
+        self.assertGreater(len(df), self.ROWS // 20)
+        # Early and late batches are kept at the same rate
+        first_half = (df['id'] < self.ROWS // 2).mean()
+        self.assertAlmostEqual(first_half, 0.5, delta=0.02)
+        self.assertEqual(df['id'].dtype, np.int64)
+        self.assertGreater(budget.used_bytes, 0)
+        self.assertEqual(budget.sampled_loads, 1)
+    
+    def test_result_within_budget_is_complete(self):
+        """Test that a result fitting the budget is loaded in full."""
+        df = load_frame(self.reader(), MemoryBudget(self.ROWS * 16))
+        self.assertEqual(len(df), self.ROWS)
+        self.assertNotIn('sample', df.attrs)
+    
+    def test_refuse(self):
+        """Test that the refuse action raises instead of sampling."""
+        with self.assertRaises(MemoryBudgetExceeded):
+            load_frame(self.reader(), MemoryBudget(self.ROWS, action='refuse'))
+        
+        budget = MemoryBudget(1024)
+        budget.charge(1024, 1, 1)
+        with self.assertRaises(MemoryBudgetExceeded):
+            load_frame(self.reader(), budget)
+    
+    def test_compact_types(self):
+        """Test that decimals become float64 and integers keep int64."""
+        for rows in (10, COMPACT_MIN_ROWS * 2):
+            table = pa.table({
+                'total': pa.array([2 ** 40 + i for i in range(rows)], pa.decimal128(38, 0)),
+                'count': pa.array(range(rows), pa.int64())
+            })
+            compacted = compact_table(table)
+            self.assertEqual(compacted.schema.field('total').type, pa.float64())
+            self.assertEqual(compacted.schema.field('count').type, pa.int64())
+
+class TestDataGrid(unittest.TestCase):
+    """Test cases for keyset pagination of data grids."""
+    
+    def setUp(self):
+        """Create a listing with NULL and tied sort values."""
+        self.db = DatabaseManager(":memory:")
+        self.db.conn.execute("""
+            CREATE TABLE listing AS
+            SELECT
+                i AS id,
+                CASE WHEN i % 5 = 0 THEN NULL ELSE i % 4 END AS size
+            FROM range(1, 48) t(i)
+        """)
+    
+    def test_pages_match_ordered_fetch(self):
+        """Test that paging forward returns every row once, in sort order."""
+        for sort_column in ('size', 'id'):
+            for descending in (False, True):
+                with self.subTest(sort_column=sort_column, descending=descending):
+                    expected = [row[0] for row in self.db.conn.execute(
+                        f"SELECT id FROM listing ORDER BY {_order_sql(sort_column, 'id', descending)}"
+                    ).fetchall()]
+                    
+                    state = {'pages': {}, 'bookmarks': {0: None}}
+                    paged, page = [], 0
+                    while True:
+                        rows = load_page(self.db, state, 'listing', 'id', sort_column, descending,
+                                         [], {}, page, page_size=6)
+                        if rows.empty:
+                            break
+                        paged.extend(rows['id'].tolist())
+                        page += 1
+                    
+                    self.assertEqual(paged, expected)
+                    # Pages after the first two were read after a bookmark, not with OFFSET;
+                    # sorted by size, the last bookmarks sit in the NULL values
+                    self.assertIn(page - 1, state['bookmarks'])
+                    if sort_column == 'size':
+                        self.assertIsNone(state['bookmarks'][page - 1][0])
+
+class TestFilterPredicates(unittest.TestCase):
+    """Test cases for the SQL predicates of the filter context."""
+    
+    def setUp(self):
+        """Create folders, objects and facts in an in-memory database."""
+        self.db = DatabaseManager(":memory:")
+        self.db.conn.execute("""
+            CREATE TABLE parentPaths AS
+            SELECT * FROM (VALUES
+                (1, '/root/a'), (2, '/root/a/b/'), (3, '/root/ab'), (4, '\\root\\a\\c'), (5, '/root/a0')
+            ) t(parentId, parentPath)
+        """)
+        # createdAt: 2023-12-31 23:59, 2024-01-31 23:00 and 2024-02-01 00:00 (UTC)
+        self.db.conn.execute("""
+            CREATE TABLE objects AS
+            SELECT * FROM (VALUES
+                (1, 'pdf', 1704067140000),
+                (2, '.PDF', 1706742000000),
+                (3, 'xyz', 1706745600000),
+                (4, NULL, 1706742000000),
+                (5, 'xlsx', 1706742000000)
+            ) t(objectId, extension, createdAt)
+        """)
+        self.db.conn.execute("""
+            CREATE TABLE facts AS
+            SELECT objectId AS instanceId, epoch_ms(createdAt) AS createTime FROM objects
+        """)
+    
+    def matching(self, table, column, where):
+        """Ids of the rows of a table matching a predicate."""
+        rows = self.db.conn.execute(f"SELECT {column} FROM {table} WHERE {where} ORDER BY 1").fetchall()
+        return [row[0] for row in rows]
+    
+    def test_path_prefix(self):
+        """Test that a folder matches its subfolders but not its siblings."""
+        for prefix in ('/root/a', '/root/a/', '\\root\\a'):
+            with self.subTest(prefix=prefix):
+                where = path_prefix_sql(self.db, prefix)
+                self.assertEqual(self.matching('parentPaths', 'parentId', where), [1, 2, 4])
+    
+    def test_category_predicate(self):
+        """Test category matching, including the default category of unknown and missing extensions."""
+        documents = category_predicate_sql(self.db, ('documents',), 'extension')
+        self.assertEqual(self.matching('objects', 'objectId', documents), [1, 2])
+        
+        other = category_predicate_sql(self.db, (config.DEFAULT_FILE_CATEGORY,), 'extension')
+        self.assertEqual(self.matching('objects', 'objectId', other), [3, 4])
+        
+        both = category_predicate_sql(self.db, ('spreadsheets', config.DEFAULT_FILE_CATEGORY), 'extension')
+        self.assertEqual(self.matching('objects', 'objectId', both), [3, 4, 5])
+    
+    def test_end_date_is_inclusive(self):
+        """Test that the whole end day is included and the next day excluded."""
+        january = FilterContext(start=date(2024, 1, 1), end=date(2024, 1, 31))
+        self.assertEqual(self.matching('objects', 'objectId', object_where(self.db, january)), [2, 4, 5])
+        self.assertEqual(self.matching('facts f', 'instanceId', facts_where(self.db, january, alias='f')), [2, 4, 5])
+
 if __name__ == '__main__':
     unittest.main()
@@ -2,192 +2,265 @@
 """
 Script to analyze relationships between tables in the Aparavi Data Suite database.
 This analyzes the interconnections particularly focusing on objectId.
+
+Every table is profiled once, in parallel: its row count and, for each key
+column (a column with "id" in its name), the non-null count, min/max and a
+HyperLogLog sketch of the distinct values. The profiles are the column
+statistics of the schema catalog (modules.catalog), so they take one scan
+per table and are reused until the database changes. Key overlap and join cardinality between tables are then estimated from the
+profiles without joining any tables; --exact also counts them in the
+database, from per-key counts so many-to-many keys do not multiply rows.
 """
 
-import duckdb
-import pandas as pd
+import argparse
 import json
+import sys
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from modules.catalog import get_catalog, table_stats
+from modules.database import DatabaseManager
+from modules.sketches import HLL_PRECISION
 
-# Connect to database
+# Default database path
 DB_PATH = "sample.duckdb"
-conn = duckdb.connect(DB_PATH)
+
+# Tables profiled at the same time
+PROFILE_WORKERS = 4
+
+# Database manager opened by main()
+db = None
 
 def get_tables():
     """Get list of all tables in the database"""
-    result = conn.execute('PRAGMA show_tables').fetchall()
-    return [table[0] for table in result]
+    return get_catalog(db).table_names()
 
 def get_table_schema(table_name):
-    """Get schema information for a table"""
-    schema = conn.execute(f'PRAGMA table_info({table_name})').fetchall()
+    """Get schema information for a table (from the catalog)"""
+    info = get_catalog(db).table(table_name)
     return {
         'name': table_name,
-        'columns': [col[1] for col in schema],
-        'primary_key': next((col[1] for col in schema if col[5]), None),
-        'foreign_keys': [col[1] for col in schema if "id" in col[1].lower() and col[5] == 0]
+        'columns': info.column_names,
+        'types': {column.name: column.type for column in info.columns},
+        'primary_key': info.primary_key,
+        'foreign_keys': [column.name for column in info.columns if "id" in column.name.lower() and not column.primary_key]
     }
 
-def get_table_count(table_name):
-    """Get the number of rows in a table"""
-    return conn.execute(f'SELECT COUNT(*) FROM {table_name}').fetchone()[0]
+def get_key_columns(table_name):
+    """Get the columns of a table that can relate it to other tables"""
+    return [col for col in get_table_schema(table_name)['columns'] if "id" in col.lower()]
+
+def profile_table(table_name, precision=HLL_PRECISION):
+    """Profile a table's key columns.
+
+    The statistics of all columns come from the catalog, which scans the
+    table once per database version.
+
+    Args:
+        table_name (str): Table to profile
+        precision (int): HyperLogLog precision of the distinct sketches
+
+    Returns:
+        dict: name, rows, and the ColumnStats of each key column
+    """
+    stats = table_stats(db, table_name, precision)
+    return {
+        'name': table_name,
+        'rows': stats.row_count,
+        'columns': {col: stats.columns[col] for col in get_key_columns(table_name)}
+    }
+
+def profile_tables(tables, precision=HLL_PRECISION, workers=PROFILE_WORKERS):
+    """Profile tables in parallel, each on its own cursor"""
+    profiles = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {table: pool.submit(profile_table, table, precision) for table in tables}
+        for table, future in futures.items():
+            try:
+                profiles[table] = future.result()
+            except Exception as e:
+                print(f"Error profiling {table}: {e}")
+    return profiles
+
+def ranges_overlap(column1, column2):
+    """Check whether the min/max ranges of two key columns can share values"""
+    if column1.non_null == 0 or column2.non_null == 0:
+        return False
+    if None in (column1.min, column1.max, column2.min, column2.max):
+        return True
+    try:
+        return column1.min <= column2.max and column2.min <= column1.max
+    except TypeError:
+        # Values of different types are not comparable; let the sketches decide
+        return True
+
+def estimate_relationship(profile1, profile2, col):
+    """Estimate key overlap and join cardinality of two tables from their profiles.
 
-def analyze_join_counts(tables_info):
+    The shared distinct keys follow from inclusion-exclusion over the merged
+    sketches; each shared key is assumed to occur as often as an average key
+    of its table.
+
+    Returns:
+        dict: distinct keys on each side, shared keys and joined rows
+    """
+    column1, column2 = profile1['columns'][col], profile2['columns'][col]
+    distinct1 = column1.sketch.count()
+    distinct2 = column2.sketch.count()
+
+    shared = 0.0
+    if ranges_overlap(column1, column2):
+        union = column1.sketch.union(column2.sketch).count()
+        shared = min(max(distinct1 + distinct2 - union, 0.0), distinct1, distinct2)
+
+    join_rows = 0.0
+    if shared and distinct1 and distinct2:
+        join_rows = shared * (column1.non_null / distinct1) * (column2.non_null / distinct2)
+
+    return {
+        'distinct_keys': [round(distinct1), round(distinct2)],
+        'shared_keys': round(shared),
+        'join_rows': round(join_rows)
+    }
+
+def exact_relationship(table1, table2, col):
+    """Count shared keys and joined rows of two tables in the database"""
+    shared, join_rows = db.conn.execute(f'''
+        WITH
+            t1 AS (SELECT "{col}" AS k, COUNT(*) AS n FROM "{table1}" WHERE "{col}" IS NOT NULL GROUP BY 1),
+            t2 AS (SELECT "{col}" AS k, COUNT(*) AS n FROM "{table2}" WHERE "{col}" IS NOT NULL GROUP BY 1)
+        SELECT COUNT(*), COALESCE(SUM(t1.n * t2.n), 0)
+        FROM t1 JOIN t2 ON t1.k = t2.k
+    ''').fetchone()
+    return {'shared_keys': shared, 'join_rows': int(join_rows)}
+
+def analyze_join_counts(profiles, exact=False):
     """Analyze the number of matching rows between tables based on column names"""
     join_counts = defaultdict(dict)
-    
-    for i, table1 in enumerate(tables_info):
-        for table2 in tables_info[i+1:]:
+    tables = list(profiles)
+
+    for i, table1 in enumerate(tables):
+        for table2 in tables[i+1:]:
             # Find common columns with "id" in the name
-            common_id_columns = [col for col in table1['columns'] if "id" in col.lower() and col in table2['columns']]
-            
+            common_id_columns = [col for col in profiles[table1]['columns'] if col in profiles[table2]['columns']]
+
             for col in common_id_columns:
-                try:
-                    # Count matches between tables
-                    count = conn.execute(f'''
-                        SELECT COUNT(*) 
-                        FROM {table1['name']} t1 
-                        JOIN {table2['name']} t2 
-                        ON t1.{col} = t2.{col}
-                    ''').fetchone()[0]
-                    
-                    if count > 0:
-                        join_counts[f"{table1['name']}<->{table2['name']}"][col] = count
-                except Exception as e:
-                    print(f"Error analyzing join between {table1['name']} and {table2['name']} on {col}: {e}")
-    
+                relationship = estimate_relationship(profiles[table1], profiles[table2], col)
+                if exact:
+                    try:
+                        relationship['exact'] = exact_relationship(table1, table2, col)
+                    except Exception as e:
+                        print(f"Error analyzing join between {table1} and {table2} on {col}: {e}")
+
+                if relationship['join_rows'] > 0 or relationship.get('exact', {}).get('join_rows', 0) > 0:
+                    join_counts[f"{table1}<->{table2}"][col] = relationship
+
     return join_counts
 
-def analyze_objectid_relationships():
-    """Specifically analyze relationships based on objectId"""
-    tables = get_tables()
+def matching_rows(profiles, table, target, col, exact=False):
+    """Count (or estimate) the rows of a table whose key occurs in a target table"""
+    if exact:
+        return db.conn.execute(f'''
+            SELECT COUNT(*) FROM "{table}"
+            WHERE "{col}" IN (SELECT "{col}" FROM "{target}")
+        ''').fetchone()[0]
+
+    column = profiles[table]['columns'][col]
+    relationship = estimate_relationship(profiles[table], profiles[target], col)
+    distinct = relationship['distinct_keys'][0]
+    if not distinct:
+        return 0
+    return round(column.non_null * min(relationship['shared_keys'] / distinct, 1.0))
+
+def analyze_key_relationships(profiles, col, target, exact=False):
+    """Analyze how the rows of every table with a key column match a target table"""
+    tables_with_key = [table for table, profile in profiles.items() if col in profile['columns']]
+    print(f"Tables containing {col}: {tables_with_key}")
+
     relationships = {}
-    
-    # Find tables with objectId column
-    tables_with_objectid = []
-    for table in tables:
-        schema = get_table_schema(table)
-        if 'objectId' in schema['columns']:
-            tables_with_objectid.append(table)
-            
-    print(f"Tables containing objectId: {tables_with_objectid}")
-    
-    # Analyze relationships through objectId
-    for table in tables_with_objectid:
-        count = get_table_count(table)
+    for table in tables_with_key:
+        count = profiles[table]['rows']
         relationships[table] = {
             'total_rows': count
         }
-        
-        if table != 'objects':
+
+        if table != target and target in profiles and col in profiles[target]['columns']:
             try:
-                # Count rows that match with objects table
-                match_count = conn.execute(f'''
-                    SELECT COUNT(*) 
-                    FROM {table} t 
-                    JOIN objects o 
-                    ON t.objectId = o.objectId
-                ''').fetchone()[0]
-                
-                relationships[table]['matches_with_objects'] = match_count
+                match_count = matching_rows(profiles, table, target, col, exact)
+                relationships[table][f'matches_with_{target}'] = match_count
                 relationships[table]['match_percentage'] = round((match_count / count) * 100, 2) if count > 0 else 0
             except Exception as e:
-                print(f"Error analyzing objectId relationship for {table}: {e}")
-    
+                print(f"Error analyzing {col} relationship for {table}: {e}")
+
     return relationships
 
-def analyze_parent_relationships():
+def analyze_objectid_relationships(profiles, exact=False):
+    """Specifically analyze relationships based on objectId"""
+    return analyze_key_relationships(profiles, 'objectId', 'objects', exact)
+
+def analyze_parent_relationships(profiles, exact=False):
     """Analyze relationships based on parentId"""
-    tables = get_tables()
-    parent_relationships = {}
-    
-    # Find tables with parentId column
-    tables_with_parentid = []
-    for table in tables:
-        schema = get_table_schema(table)
-        if 'parentId' in schema['columns']:
-            tables_with_parentid.append(table)
-            
-    print(f"Tables containing parentId: {tables_with_parentid}")
-    
-    # Analyze relationships through parentId
-    for table in tables_with_parentid:
-        count = get_table_count(table)
-        parent_relationships[table] = {
-            'total_rows': count
-        }
-        
-        if 'parentPaths' in tables:
-            try:
-                # Count rows that match with parentPaths table
-                match_count = conn.execute(f'''
-                    SELECT COUNT(*) 
-                    FROM {table} t 
-                    JOIN parentPaths p 
-                    ON t.parentId = p.parentId
-                ''').fetchone()[0]
-                
-                parent_relationships[table]['matches_with_parentPaths'] = match_count
-                parent_relationships[table]['match_percentage'] = round((match_count / count) * 100, 2) if count > 0 else 0
-            except Exception as e:
-                print(f"Error analyzing parentId relationship for {table}: {e}")
-    
-    return parent_relationships
+    return analyze_key_relationships(profiles, 'parentId', 'parentPaths', exact)
 
 def sample_joined_data():
     """Get sample of data showing relationships between key tables"""
     # Sample join between objects and instances
-    objects_instances = conn.execute('''
-        SELECT 
-            o.objectId, 
-            o.name, 
+    objects_instances = db.conn.execute('''
+        SELECT
+            o.objectId,
+            o.name,
             o.extension,
             i.instanceId,
             i.size,
             i.createTime,
             i.modifyTime
-        FROM 
+        FROM
             objects o
-        JOIN 
+        JOIN
             instances i ON o.objectId = i.objectId
         LIMIT 5
     ''').fetchall()
-    
+
     # Sample join between objects, instances, and parentPaths
-    objects_instances_paths = conn.execute('''
-        SELECT 
-            o.objectId, 
-            o.name, 
+    objects_instances_paths = db.conn.execute('''
+        SELECT
+            o.objectId,
+            o.name,
             i.size,
             p.parentPath
-        FROM 
+        FROM
             objects o
-        JOIN 
+        JOIN
             instances i ON o.objectId = i.objectId
-        JOIN 
+        JOIN
             parentPaths p ON o.parentId = p.parentId
         LIMIT 5
     ''').fetchall()
-    
+
     # Sample complex join with classifications
-    complex_join = conn.execute('''
-        SELECT 
-            o.objectId, 
-            o.name, 
+    complex_join = db.conn.execute('''
+        SELECT
+            o.objectId,
+            o.name,
             i.size,
             p.parentPath,
             c.classificationKey
-        FROM 
+        FROM
             objects o
-        JOIN 
+        JOIN
             instances i ON o.objectId = i.objectId
-        JOIN 
+        JOIN
             parentPaths p ON o.parentId = p.parentId
         LEFT JOIN
             classifications c ON i.classificationId = c.classificationId
         LIMIT 5
     ''').fetchall()
-    
+
     return {
         'objects_instances': objects_instances,
         'objects_instances_paths': objects_instances_paths,
@@ -196,46 +269,75 @@ def sample_joined_data():
 
 def main():
     """Main analysis function"""
-    # Get all tables and their schemas
+    global db
+
+    parser = argparse.ArgumentParser(description='Analyze relationships between the database tables')
+
+    parser.add_argument('--db', type=str, default=DB_PATH,
+                        help='Path to the DuckDB database')
+
+    parser.add_argument('--exact', action='store_true',
+                        help='Also count shared keys and joined rows exactly (slower)')
+
+    parser.add_argument('--workers', type=int, default=PROFILE_WORKERS,
+                        help='Tables profiled in parallel')
+
+    parser.add_argument('--precision', type=int, default=HLL_PRECISION,
+                        help='HyperLogLog precision of the distinct sketches (4-16)')
+
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"Error: Database not found at {args.db}")
+        sys.exit(1)
+
+    db = DatabaseManager(args.db, cache_dir=config.CACHE_DIR, cache_ttl=config.CACHE_TTL, read_only=True)
+
+    # Profile all tables once
     tables = get_tables()
+    start = time.perf_counter()
+    profiles = profile_tables(tables, args.precision, args.workers)
+    print(f"Profiled {len(profiles)} tables in {time.perf_counter() - start:.1f}s")
     tables_info = [get_table_schema(table) for table in tables]
-    
+
     # Analyze objectId relationships
     print("\n===== OBJECT ID RELATIONSHIPS =====")
-    objectid_relationships = analyze_objectid_relationships()
+    objectid_relationships = analyze_objectid_relationships(profiles, args.exact)
     print(json.dumps(objectid_relationships, indent=4))
-    
+
     # Analyze parentId relationships
     print("\n===== PARENT ID RELATIONSHIPS =====")
-    parent_relationships = analyze_parent_relationships()
+    parent_relationships = analyze_parent_relationships(profiles, args.exact)
     print(json.dumps(parent_relationships, indent=4))
-    
+
     # Get general relationship counts between tables
     print("\n===== TABLE JOIN RELATIONSHIPS =====")
-    join_counts = analyze_join_counts(tables_info)
+    if not args.exact:
+        print("(estimated from the profiles; run with --exact for exact counts)")
+    join_counts = analyze_join_counts(profiles, args.exact)
     print(json.dumps(join_counts, indent=4))
-    
+
     # Sample joined data
     print("\n===== SAMPLE JOINED DATA =====")
     samples = sample_joined_data()
-    
+
     print("\nObjects-Instances Join (5 samples):")
     print(samples['objects_instances'])
-    
+
     print("\nObjects-Instances-Paths Join (5 samples):")
     print(samples['objects_instances_paths'])
-    
+
     print("\nComplex Join with Classifications (5 samples):")
     print(samples['complex_join'])
-    
+
     # Summarize findings
     print("\n===== RELATIONSHIP SUMMARY =====")
     print(f"Total tables: {len(tables)}")
-    
+
     tables_with_objectid = [t for t in tables_info if 'objectId' in t['columns']]
     print(f"Tables with objectId: {len(tables_with_objectid)}")
     print(f"- {', '.join(t['name'] for t in tables_with_objectid)}")
-    
+
     tables_with_parentid = [t for t in tables_info if 'parentId' in t['columns']]
     print(f"Tables with parentId: {len(tables_with_parentid)}")
     print(f"- {', '.join(t['name'] for t in tables_with_parentid)}")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Benchmark for effective-permission queries backed by the group closure table.
+
+Builds (or incrementally refreshes) the osSecurity group closure and times
+effective-access queries for a set of principals. Use --synthetic to generate
+an in-memory database with nested groups and millions of objects instead of
+reading an Aparavi database.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.database import DatabaseManager
+from modules.security import (
+    refresh_group_closure, refresh_permission_grants, effective_access_summary
+)
+
+# Default database path (relative to this script)
+DEFAULT_DB_PATH = str(Path(__file__).parent.parent / "sample.duckdb")
+
+
+def create_synthetic_database(db, num_objects, num_users, num_groups):
+    """Populate an empty database with nested groups, permissions and objects.
+
+    Args:
+        db (DatabaseManager): Database manager on an empty database
+        num_objects (int): Number of objects to generate
+        num_users (int): Number of user principals
+        num_groups (int): Number of group principals
+    """
+    db.conn.execute(f"""
+        CREATE TABLE osSecurity AS
+        SELECT
+            i AS securityId,
+            'node' AS nodeObjectId,
+            'S-' || i AS osId,
+            1 AS isLocal,
+            (i > {num_users})::BIGINT AS isGroup,
+            -- Groups nest in chains of ten, and each chain closes into a cycle
+            CASE WHEN i > {num_users} AND (i - {num_users}) % 10 = 0
+                THEN '["S-' || (i - 9) || '"]'
+                WHEN i > {num_users}
+                THEN '["S-' || (i + 1) || '"]'
+                ELSE '[]' END AS members,
+            CASE WHEN i <= {num_users}
+                THEN '["S-' || ({num_users} + 1 + (i % {num_groups})) || '"]'
+                ELSE '[]' END AS "groups",
+            'BUILTIN' AS authority,
+            'principal' || i AS name
+        FROM range(1, {num_users + num_groups + 1}) t(i)
+    """)
+
+    db.conn.execute(f"""
+        CREATE TABLE osPermissions AS
+        SELECT
+            i AS permissionId,
+            'node' AS nodeObjectId,
+            '*p' || ({num_users} + 1 + (i % {num_groups})) || ':4*p'
+                || ({num_users} + 1 + ((i * 7) % {num_groups})) || ':1*' AS permissionSet,
+            0::BIGINT AS createdAt,
+            0::BIGINT AS updatedAt
+        FROM range(1, 1001) t(i)
+    """)
+
+    db.conn.execute(f"""
+        CREATE TABLE objects AS
+        SELECT
+            'o' || i AS objectId,
+            (1 + (i * 2654435761) % 1000)::BIGINT AS permissionId
+        FROM range({num_objects}) t(i)
+    """)
+
+
+def time_call(func, *args, **kwargs):
+    """Run a function and return its result with the elapsed seconds."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Main function to handle command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark effective-permission queries')
+
+    parser.add_argument('--db', type=str, default=DEFAULT_DB_PATH,
+                        help='Path to DuckDB database file')
+
+    parser.add_argument('--synthetic', action='store_true',
+                        help='Benchmark against a generated in-memory database')
+
+    parser.add_argument('--objects', type=int, default=5_000_000,
+                        help='Number of objects to generate with --synthetic')
+
+    parser.add_argument('--users', type=int, default=20_000,
+                        help='Number of users to generate with --synthetic')
+
+    parser.add_argument('--groups', type=int, default=2_000,
+                        help='Number of groups to generate with --synthetic')
+
+    parser.add_argument('--principals', type=int, default=10,
+                        help='Number of principals to query')
+
+    args = parser.parse_args()
+
+    if args.synthetic:
+        db = DatabaseManager(':memory:')
+        print(f"Generating {args.objects:,} objects, {args.users:,} users and {args.groups:,} groups...")
+        create_synthetic_database(db, args.objects, args.users, args.groups)
+    else:
+        db = DatabaseManager(args.db)
+
+    summary, elapsed = time_call(refresh_group_closure, db, full=True)
+    print(f"Full closure build: {elapsed:.3f}s ({summary['rows']:,} rows, "
+          f"{len(summary['cycles'])} principals in cycles)")
+
+    grant_count, elapsed = time_call(refresh_permission_grants, db)
+    print(f"Permission grants: {elapsed:.3f}s ({grant_count:,} rows)")
+
+    summary, elapsed = time_call(refresh_group_closure, db)
+    print(f"Incremental refresh with no changes: {elapsed:.3f}s ({summary['mode']})")
+
+    principals = db.query(f"""
+        SELECT securityId FROM osSecurity
+        WHERE isGroup = 0
+        ORDER BY securityId
+        LIMIT {args.principals}
+    """)['securityId'].tolist()
+
+    timings = []
+    for security_id in principals:
+        result, elapsed = time_call(effective_access_summary, db, int(security_id))
+        timings.append(elapsed)
+        print(f"Principal {security_id}: {int(result['object_count'].sum()):,} objects in {elapsed:.3f}s")
+
+    if timings:
+        print(f"\nEffective-access queries: max {max(timings):.3f}s, "
+              f"avg {sum(timings) / len(timings):.3f}s over {len(timings)} principals")
+
+    if principals:
+        db.conn.execute(f"""
+            UPDATE osSecurity SET "groups" = '[]' WHERE securityId = {int(principals[0])}
+        """)
+        summary, elapsed = time_call(refresh_group_closure, db)
+        print(f"Incremental refresh after one change: {elapsed:.3f}s "
+              f"({summary['recomputed']} principals recomputed)")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,24 @@ for external analysis or backup purposes.
 """
 
 import duckdb
-import pandas as pd
 import os
+import sys
 import json
 import argparse
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.query_plan import table_columns
+
+# COPY options per export format
+COPY_FORMATS = {
+    'csv': "FORMAT CSV, HEADER",
+    'json': "FORMAT JSON, ARRAY true",
+    'parquet': "FORMAT PARQUET, COMPRESSION ZSTD"
+}
+
 # Default database path (relative to this script)
 DEFAULT_DB_PATH = str(Path(__file__).parent.parent / "sample.duckdb")
 
@@ -20,9 +31,12 @@ def get_tables(conn):
     result = conn.execute('PRAGMA show_tables').fetchall()
     return [table[0] for table in result]
 
-def export_table(conn, table_name, output_dir, format='csv', sample=False, sample_size=1000):
+def export_table(conn, table_name, output_dir, format='csv', sample=False, sample_size=1000, exclude=None):
     """Export a single table to the specified format
     
+    Rows are streamed to the file by DuckDB instead of being loaded into a
+    DataFrame, and only the listed columns are read.
+    
     Args:
         conn: DuckDB connection
         table_name: Name of the table to export
@@ -30,33 +44,29 @@ def export_table(conn, table_name, output_dir, format='csv', sample=False, sampl
         format: Export format (csv, json, parquet)
         sample: Whether to export only a sample
         sample_size: Number of rows to sample
+        exclude: Columns to leave out of the export
     
     Returns:
         Path to the exported file
     """
-    query = f"SELECT * FROM {table_name}"
+    if format not in COPY_FORMATS:
+        raise ValueError(f"Unsupported format: {format}")
+    
+    columns = ", ".join(f'"{column}"' for column in table_columns(conn, table_name, exclude))
+    query = f"SELECT {columns} FROM {table_name}"
     if sample:
         query += f" LIMIT {sample_size}"
     
-    df = conn.execute(query).fetch_df()
-    
     # Create filename
     filename = f"{table_name}.{format}"
     output_path = output_dir / filename
     
-    # Export based on format
-    if format == 'csv':
-        df.to_csv(output_path, index=False)
-    elif format == 'json':
-        df.to_json(output_path, orient='records', indent=2)
-    elif format == 'parquet':
-        df.to_parquet(output_path, index=False)
-    else:
-        raise ValueError(f"Unsupported format: {format}")
+    target = str(output_path).replace("'", "''")
+    conn.execute(f"COPY ({query}) TO '{target}' ({COPY_FORMATS[format]})")
     
     return output_path
 
-def export_all_tables(db_path, output_dir=None, formats=None, sample=False, sample_size=1000):
+def export_all_tables(db_path, output_dir=None, formats=None, sample=False, sample_size=1000, exclude=None):
     """Export all tables in the database
     
     Args:
@@ -65,6 +75,7 @@ def export_all_tables(db_path, output_dir=None, formats=None, sample=False, samp
         formats: List of formats to export (defaults to ['csv'])
         sample: Whether to export only a sample
         sample_size: Number of rows to sample
+        exclude: Columns to leave out, as table.column strings
     
     Returns:
         Dictionary with export statistics
@@ -85,8 +96,14 @@ def export_all_tables(db_path, output_dir=None, formats=None, sample=False, samp
     # Create output directory if it doesn't exist
     output_dir.mkdir(parents=True, exist_ok=True)
     
+    # Columns to leave out per table
+    excluded = {}
+    for entry in exclude or []:
+        table, _, column = entry.partition('.')
+        excluded.setdefault(table, []).append(column)
+    
     # Connect to database
-    conn = duckdb.connect(db_path)
+    conn = duckdb.connect(db_path, read_only=True)
     
     # Get list of tables
     tables = get_tables(conn)
@@ -99,6 +116,7 @@ def export_all_tables(db_path, output_dir=None, formats=None, sample=False, samp
         'formats': formats,
         'sample_mode': sample,
         'sample_size': sample_size if sample else None,
+        'excluded_columns': exclude or [],
         'exports': {}
     }
     
@@ -108,7 +126,8 @@ def export_all_tables(db_path, output_dir=None, formats=None, sample=False, samp
         
         for fmt in formats:
             try:
-                output_path = export_table(conn, table, output_dir, format=fmt, sample=sample, sample_size=sample_size)
+                output_path = export_table(conn, table, output_dir, format=fmt, sample=sample, sample_size=sample_size,
+                                           exclude=excluded.get(table))
                 export_stats['exports'][table][fmt] = {
                     'path': str(output_path),
                     'success': True
@@ -145,6 +164,9 @@ def main():
     parser.add_argument('--sample-size', type=int, default=1000,
                         help='Number of rows to sample if --sample is used')
     
+    parser.add_argument('--exclude', type=str, nargs='*', default=None,
+                        help='Columns to leave out, e.g. --exclude instances.metadata')
+    
     args = parser.parse_args()
     
     print(f"Starting export from {args.db}...")
@@ -154,7 +176,8 @@ def main():
         output_dir=args.output,
         formats=args.formats,
         sample=args.sample,
-        sample_size=args.sample_size
+        sample_size=args.sample_size,
+        exclude=args.exclude
     )
     
     # Print summary
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+Utility to generate a static HTML bundle of every dashboard report.
+
+The bundle (index.html, one page per report with embedded chart specs, and
+the report datasets as Parquet files) opens in any browser, so a weekly
+snapshot can be shared without running the dashboard. Run it from cron.
+
+The derived tables the reports read (fact table, rollups, indexes) are built
+once, then independent reports are generated in parallel worker processes
+that open the database and the derived tables read-only.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from modules.categories import ensure_category_table
+from modules.database import DatabaseManager
+from modules.fact_tables import build_instance_facts
+from modules.predicates import build_folder_index
+from modules.message_analysis import refresh_message_tables
+from modules.report_bundle import REPORT_BUILDERS, build_report, write_assets, write_index, write_report
+from modules.service_analysis import refresh_service_rollup
+from modules.tag_analysis import build_tag_tables
+
+# Default database path (relative to this script)
+DEFAULT_DB_PATH = str(Path(__file__).parent.parent / "sample.duckdb")
+
+# Database manager of a worker process
+_db = None
+
+
+def open_database(db_path, derived_path, read_only=False):
+    """Open the database as the dashboard does (snapshot mode included)."""
+    return DatabaseManager(
+        db_path,
+        derived_path=derived_path,
+        cache_dir=config.CACHE_DIR,
+        cache_ttl=config.CACHE_TTL,
+        snapshot_dir=config.SNAPSHOT_DIR if config.SNAPSHOT_MODE else None,
+        read_only=read_only
+    )
+
+
+def build_derived_tables(db_path, derived_path):
+    """Build the derived tables shared by all reports.
+
+    Args:
+        db_path (str): Database path
+        derived_path (str): Derived database path
+
+    Returns:
+        str: Database fingerprint the tables were built from
+    """
+    db = open_database(db_path, derived_path)
+    try:
+        ensure_category_table(db)
+        build_instance_facts(db)
+        refresh_service_rollup(db)
+        build_folder_index(db)
+        build_tag_tables(db)
+        if db.get_row_count('messages') > 0:
+            refresh_message_tables(db)
+        return db.get_fingerprint()
+    finally:
+        db.close()
+
+
+def init_worker(db_path, derived_path):
+    """Open the database read-only in a worker process."""
+    global _db
+    _db = open_database(db_path, derived_path, read_only=True)
+    # Progress bars of concurrent workers would interleave in the log
+    _db.conn.execute("SET enable_progress_bar = false")
+
+
+def generate_report(report_id, output_dir):
+    """Build one report and write it into the bundle (runs in a worker).
+
+    Args:
+        report_id (str): Report key
+        output_dir (str): Bundle directory
+
+    Returns:
+        tuple: (summary from write_report, seconds taken)
+    """
+    start = time.perf_counter()
+    summary = write_report(build_report(_db, report_id), output_dir)
+    return summary, time.perf_counter() - start
+
+
+def generate_bundle(db_path, derived_path, output_dir, report_ids, workers):
+    """Generate the static report bundle.
+
+    Args:
+        db_path (str): Database path
+        derived_path (str): Derived database path
+        output_dir (str): Bundle directory
+        report_ids (list): Reports to generate
+        workers (int): Number of worker processes
+
+    Returns:
+        list: Summaries of the generated reports
+    """
+    start = time.perf_counter()
+    fingerprint = build_derived_tables(db_path, derived_path)
+    print(f"Derived tables ready in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(output_dir, exist_ok=True)
+    write_assets(output_dir)
+
+    summaries = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+        initargs=(db_path, derived_path)
+    ) as pool:
+        futures = {pool.submit(generate_report, report_id, output_dir): report_id for report_id in report_ids}
+        for future in as_completed(futures):
+            report_id = futures[future]
+            try:
+                summary, elapsed = future.result()
+            except Exception as e:
+                print(f"  {report_id}: failed ({e})")
+                continue
+            summaries.append(summary)
+            rows = sum(summary['rows'].values())
+            print(f"  {report_id}: {summary['charts']} charts, {rows:,} rows in {elapsed:.1f}s")
+            for name, error in summary['errors'].items():
+                print(f"    warning: could not load {name}: {error}")
+
+    # Keep the report order of the dashboard
+    summaries.sort(key=lambda summary: report_ids.index(summary['report_id']))
+    write_index(output_dir, summaries, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), fingerprint)
+    print(f"Bundle written to {output_dir} in {time.perf_counter() - start:.1f}s")
+    return summaries
+
+
+def main():
+    """Main function to handle command line arguments"""
+    available = [report_id for report_id in config.REPORTS if report_id in REPORT_BUILDERS]
+
+    parser = argparse.ArgumentParser(description='Generate a static HTML bundle of the dashboard reports')
+
+    parser.add_argument('--db', type=str, default=DEFAULT_DB_PATH,
+                        help='Path to the DuckDB database')
+
+    parser.add_argument('--derived', type=str, default=config.DERIVED_DB_PATH,
+                        help='Path of the derived tables database (use a separate file while the dashboard is running)')
+
+    parser.add_argument('--output', type=str, default=None,
+                        help='Bundle directory (default: reports/static/[timestamp])')
+
+    parser.add_argument('--reports', nargs='+', choices=available, default=available,
+                        help='Reports to include (default: all)')
+
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: one per CPU, at most one per report)')
+
+    args = parser.parse_args()
+
+    if not config.SNAPSHOT_MODE and not Path(args.db).exists():
+        print(f"Error: Database not found at {args.db}")
+        sys.exit(1)
+
+    output_dir = args.output or str(
+        Path(__file__).parent.parent / "reports" / "static" / datetime.now().strftime("%Y%m%d_%H%M%S")
+    )
+    workers = args.workers or min(os.cpu_count() or 1, len(args.reports))
+
+    generate_bundle(str(Path(args.db).resolve()), args.derived, output_dir, args.reports, workers)
+
+
+if __name__ == "__main__":
+    main()
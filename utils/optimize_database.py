@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+"""
+Utility to write a sorted copy of an Aparavi database for reporting.
+
+The Aparavi collector writes objects and instances in scan order, so DuckDB's
+per-row-group min/max statistics (zone maps) rarely let a filtered query skip
+data. This utility copies the database into a new file with the fact tables
+sorted by the columns reports filter on:
+
+- objects by (parentId, extension): folder-filtered reports
+- instances by (serviceId, createTime): service and time-range reports
+
+The source database is attached read-only and never modified, so the command
+is safe to run against a live file or a copy. Report queries are timed against
+the source and the optimized copy to show the effect; point the dashboard at
+the optimized file once it looks good.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.timestamps import epoch_ms_range_sql, valid_epoch_ms_sql
+
+# Default database path (relative to this script)
+DEFAULT_DB_PATH = str(Path(__file__).parent.parent / "sample.duckdb")
+
+# Sort keys per table; tables not listed are copied in their original order
+SORT_KEYS = {
+    'objects': ['parentId', 'extension'],
+    'instances': ['serviceId', 'createTime']
+}
+
+# Catalog name the source database is attached under
+SOURCE_CATALOG = "source_db"
+
+
+def parse_sort_overrides(values):
+    """Parse --sort arguments of the form table=col1,col2.
+
+    Args:
+        values (list): Raw --sort values
+
+    Returns:
+        dict: Table -> list of sort columns
+    """
+    sort_keys = dict(SORT_KEYS)
+    for value in values or []:
+        table, _, columns = value.partition('=')
+        if not table or not columns:
+            raise ValueError(f"Invalid --sort value: {value} (expected table=col1,col2)")
+        sort_keys[table] = [column.strip() for column in columns.split(',') if column.strip()]
+    return sort_keys
+
+
+def write_optimized_copy(source_path, output_path, sort_keys):
+    """Copy a database into a new file with the fact tables sorted.
+
+    Args:
+        source_path (str): Source DuckDB database (opened read-only)
+        output_path (str): Output DuckDB database (must not exist)
+        sort_keys (dict): Table -> sort columns
+
+    Returns:
+        dict: Table -> (row count, seconds to copy, sort columns used)
+    """
+    conn = duckdb.connect(output_path)
+    output_catalog = conn.execute("SELECT current_database()").fetchone()[0]
+    source = source_path.replace("'", "''")
+    conn.execute(f"ATTACH '{source}' AS {SOURCE_CATALOG} (READ_ONLY)")
+
+    # Copy the schema (tables, constraints, views) without data
+    conn.execute(f'COPY FROM DATABASE {SOURCE_CATALOG} TO "{output_catalog}" (SCHEMA)')
+
+    tables = [row[0] for row in conn.execute("""
+        SELECT table_name FROM duckdb_tables()
+        WHERE database_name = ? AND schema_name = 'main'
+        ORDER BY table_name
+    """, [SOURCE_CATALOG]).fetchall()]
+
+    results = {}
+    for table in tables:
+        columns = {row[0] for row in conn.execute("""
+            SELECT column_name FROM duckdb_columns()
+            WHERE database_name = ? AND table_name = ?
+        """, [SOURCE_CATALOG, table]).fetchall()}
+        keys = [key for key in sort_keys.get(table, []) if key in columns]
+        order_clause = f"ORDER BY {', '.join(keys)}" if keys else ""
+
+        start = time.perf_counter()
+        conn.execute(f"""
+            INSERT INTO "{output_catalog}".main.{table}
+            SELECT * FROM {SOURCE_CATALOG}.main.{table}
+            {order_clause}
+        """)
+        elapsed = time.perf_counter() - start
+
+        source_rows = conn.execute(f"SELECT COUNT(*) FROM {SOURCE_CATALOG}.main.{table}").fetchone()[0]
+        copied_rows = conn.execute(f'SELECT COUNT(*) FROM "{output_catalog}".main.{table}').fetchone()[0]
+        if source_rows != copied_rows:
+            raise RuntimeError(f"Row count mismatch for {table}: {source_rows} vs {copied_rows}")
+
+        results[table] = (copied_rows, elapsed, keys)
+        sorted_note = f" sorted by {', '.join(keys)}" if keys else ""
+        print(f"  {table}: {copied_rows:,} rows in {elapsed:.2f}s{sorted_note}")
+
+    conn.execute("DETACH " + SOURCE_CATALOG)
+    conn.execute("CHECKPOINT")
+    conn.close()
+    return results
+
+
+def build_benchmark_queries(conn):
+    """Build report-style queries with filters taken from the data.
+
+    Args:
+        conn: DuckDB connection to the source database
+
+    Returns:
+        list: (name, SQL) pairs
+    """
+    queries = []
+
+    folder = conn.execute("""
+        SELECT parentId FROM objects
+        WHERE parentId IS NOT NULL
+        GROUP BY parentId
+        ORDER BY COUNT(*) DESC
+        LIMIT 1
+    """).fetchone()
+    if folder:
+        parent_id = str(folder[0]).replace("'", "''")
+        queries.append(("Folder contents", f"""
+            SELECT extension, COUNT(*), SUM(primarySize)
+            FROM objects
+            WHERE parentId = '{parent_id}'
+            GROUP BY extension
+        """))
+
+    time_range = conn.execute(f"""
+        SELECT
+            quantile_disc(createTime, 0.45),
+            quantile_disc(createTime, 0.55),
+            MIN(serviceId)
+        FROM instances
+        WHERE {valid_epoch_ms_sql('createTime')}
+    """).fetchone()
+    if time_range and time_range[0] is not None:
+        start, end, service_id = time_range
+        queries.append(("Time range", f"""
+            SELECT COUNT(*), SUM(size)
+            FROM instances
+            WHERE {epoch_ms_range_sql('createTime', start, end)}
+        """))
+        queries.append(("Service and time range", f"""
+            SELECT COUNT(*), SUM(size)
+            FROM instances
+            WHERE serviceId = {int(service_id)}
+              AND {epoch_ms_range_sql('createTime', start, end)}
+        """))
+        queries.append(("Service totals", f"""
+            SELECT COUNT(*), SUM(size), SUM(storeSize)
+            FROM instances
+            WHERE serviceId = {int(service_id)}
+        """))
+
+    return queries
+
+
+def time_query(conn, sql, repeat):
+    """Run a query several times and return the median seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run_benchmarks(source_path, output_path, repeat):
+    """Time the benchmark queries against both databases.
+
+    Args:
+        source_path (str): Original database
+        output_path (str): Optimized database
+        repeat (int): Runs per query
+
+    Returns:
+        list: (name, source seconds, optimized seconds) tuples
+    """
+    source = duckdb.connect(source_path, read_only=True)
+    optimized = duckdb.connect(output_path, read_only=True)
+    try:
+        results = []
+        for name, sql in build_benchmark_queries(source):
+            # Row order of grouped results depends on the physical layout
+            if sorted(source.execute(sql).fetchall()) != sorted(optimized.execute(sql).fetchall()):
+                print(f"  Warning: results differ for '{name}'")
+            results.append((name, time_query(source, sql, repeat), time_query(optimized, sql, repeat)))
+        return results
+    finally:
+        source.close()
+        optimized.close()
+
+
+def main():
+    """Main function to handle command line arguments"""
+    parser = argparse.ArgumentParser(description='Write a sorted copy of the database for faster reports')
+
+    parser.add_argument('--db', type=str, default=DEFAULT_DB_PATH,
+                        help='Path to the source DuckDB database (opened read-only)')
+
+    parser.add_argument('--output', type=str, default=None,
+                        help='Path of the optimized copy (default: <db>.optimized.duckdb)')
+
+    parser.add_argument('--sort', type=str, nargs='*', default=None,
+                        help='Override sort keys, e.g. --sort objects=parentId,extension')
+
+    parser.add_argument('--overwrite', action='store_true',
+                        help='Replace the output file if it exists')
+
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per benchmark query')
+
+    parser.add_argument('--skip-benchmark', action='store_true',
+                        help='Only write the optimized copy')
+
+    args = parser.parse_args()
+
+    source_path = Path(args.db).resolve()
+    if not source_path.exists():
+        print(f"Error: Database not found at {source_path}")
+        sys.exit(1)
+
+    output_path = Path(args.output) if args.output else source_path.with_name(f"{source_path.stem}.optimized.duckdb")
+    output_path = output_path.resolve()
+    if output_path == source_path:
+        print("Error: The output must be a different file than the source database")
+        sys.exit(1)
+
+    if output_path.exists():
+        if not args.overwrite:
+            print(f"Error: {output_path} already exists (use --overwrite to replace it)")
+            sys.exit(1)
+        output_path.unlink()
+        Path(f"{output_path}.wal").unlink(missing_ok=True)
+
+    try:
+        sort_keys = parse_sort_overrides(args.sort)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"Writing optimized copy of {source_path} to {output_path}...")
+    write_optimized_copy(str(source_path), str(output_path), sort_keys)
+
+    print(f"Size: {source_path.stat().st_size / 1024**2:,.1f} MB -> {output_path.stat().st_size / 1024**2:,.1f} MB")
+
+    if args.skip_benchmark:
+        return
+
+    print(f"\nBenchmarking report queries (median of {args.repeat} runs):")
+    print(f"  {'Query':<26} {'Original':>10} {'Optimized':>10} {'Speedup':>8}")
+    for name, before, after in run_benchmarks(str(source_path), str(output_path), args.repeat):
+        speedup = before / after if after > 0 else float('inf')
+        print(f"  {name:<26} {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Utility to export the Aparavi database to a Parquet snapshot for the dashboard.
+
+The dashboard in snapshot mode (config.SNAPSHOT_MODE) reads views over the
+snapshot instead of opening the database the collector writes to. Each run
+attaches the source read-only for the duration of the export only, writes a
+new snapshot version, swaps the manifest and prunes old versions. Run it from
+cron, or with --interval to keep exporting in a loop.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from modules.snapshot import SNAPSHOT_KEEP, write_snapshot
+
+# Default database path (relative to this script)
+DEFAULT_DB_PATH = str(Path(__file__).parent.parent / "sample.duckdb")
+
+
+def directory_size(path):
+    """Get the total size of the files below a directory in bytes."""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path)
+        for name in files
+    )
+
+
+def export_snapshot(source_path, snapshot_dir, keep):
+    """Write one snapshot version and print a summary.
+
+    Args:
+        source_path (str): Source DuckDB database
+        snapshot_dir (str): Snapshot directory
+        keep (int): Number of snapshot versions to keep
+    """
+    start = time.perf_counter()
+    manifest = write_snapshot(source_path, snapshot_dir, keep)
+    elapsed = time.perf_counter() - start
+
+    version_dir = os.path.join(snapshot_dir, manifest['version'])
+    print(f"Snapshot {manifest['version']} written in {elapsed:.2f}s")
+    for name, dataset in manifest['datasets'].items():
+        partitions = f" partitioned by {', '.join(dataset['partition_by'])}" if dataset['partition_by'] else ""
+        size = directory_size(os.path.join(version_dir, name))
+        print(f"  {name}: {dataset['rows']:,} rows, {size / 1024**2:,.1f} MB{partitions}")
+    print(f"Size: {os.path.getsize(source_path) / 1024**2:,.1f} MB -> {directory_size(version_dir) / 1024**2:,.1f} MB")
+
+
+def main():
+    """Main function to handle command line arguments"""
+    parser = argparse.ArgumentParser(description='Export the database to a Parquet snapshot for the dashboard')
+
+    parser.add_argument('--db', type=str, default=DEFAULT_DB_PATH,
+                        help='Path to the source DuckDB database (opened read-only)')
+
+    parser.add_argument('--output', type=str, default=config.SNAPSHOT_DIR,
+                        help='Snapshot directory (default: config.SNAPSHOT_DIR)')
+
+    parser.add_argument('--keep', type=int, default=SNAPSHOT_KEEP,
+                        help='Number of snapshot versions to keep on disk')
+
+    parser.add_argument('--interval', type=int, default=None,
+                        help='Export again every N seconds instead of exiting')
+
+    args = parser.parse_args()
+
+    source_path = Path(args.db).resolve()
+    if not source_path.exists():
+        print(f"Error: Database not found at {source_path}")
+        sys.exit(1)
+
+    os.makedirs(args.output, exist_ok=True)
+
+    while True:
+        try:
+            export_snapshot(str(source_path), args.output, args.keep)
+        except Exception as e:
+            # A locked or partially written source is retried on the next run
+            print(f"Error writing snapshot: {e}")
+            if args.interval is None:
+                sys.exit(1)
+
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,48 +2,51 @@
 """
 Utility to visualize the database schema and create an entity-relationship diagram.
 This generates a visual representation of the database tables and their relationships.
+
+Tables, columns and row counts come from the schema catalog (modules.catalog),
+which is read once per database version and shared with the dashboard.
 """
 
-import duckdb
-import pandas as pd
-import os
+import sys
 import json
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from modules.catalog import get_catalog
+from modules.database import DatabaseManager
+
 # Database connection
 DB_PATH = str(Path(__file__).parent.parent / "sample.duckdb")
 
 def get_schema_info():
-    """Extract schema information from the database"""
-    conn = duckdb.connect(DB_PATH)
+    """Extract schema information from the database catalog"""
+    db = DatabaseManager(DB_PATH, cache_dir=config.CACHE_DIR, cache_ttl=config.CACHE_TTL, read_only=True)
+    try:
+        catalog = get_catalog(db)
+    finally:
+        db.close()
     
-    # Get all tables
-    tables = conn.execute('PRAGMA show_tables').fetchall()
-    tables = [table[0] for table in tables]
+    tables = catalog.table_names()
     
     schema_info = {}
     relationships = []
     
     for table in tables:
-        # Get column info
-        columns = conn.execute(f'PRAGMA table_info({table})').fetchall()
-        column_info = []
-        primary_key = None
-        
-        for col in columns:
-            column_info.append({
-                'name': col[1],
-                'type': col[2],
-                'nullable': not col[3],
-                'primary_key': bool(col[5])
-            })
-            
-            if col[5]:  # Is primary key
-                primary_key = col[1]
-        
+        info = catalog.table(table)
         schema_info[table] = {
-            'columns': column_info,
-            'primary_key': primary_key
+            'columns': [
+                {
+                    'name': column.name,
+                    'type': column.type,
+                    'nullable': column.nullable,
+                    'primary_key': column.primary_key
+                }
+                for column in info.columns
+            ],
+            'primary_key': info.primary_key,
+            'estimated_rows': info.estimated_rows
         }
     
     # Infer relationships based on column names (simplified approach)
@@ -146,6 +149,7 @@ def generate_schema_summary():
         summary.append(f"### {table}")
         summary.append(f"- Primary Key: {pk}")
         summary.append(f"- Column Count: {column_count}")
+        summary.append(f"- Estimated Rows: {info['estimated_rows']:,}")
         
         # Referenced by
         references = [r for r in schema_info['relationships'] if r['from_table'] == table]